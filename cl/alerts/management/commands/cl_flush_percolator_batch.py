@@ -0,0 +1,21 @@
+from django.conf import settings
+
+from cl.alerts.tasks import flush_percolator_batch
+from cl.lib.command_utils import PeriodicCommand, logger
+
+
+class Command(PeriodicCommand):
+    help = """Flush the percolator batch periodically. Documents saved by
+    signals are gathered in Redis and percolated together every
+    PERCOLATOR_BATCH_WINDOW seconds, using one multi-document percolator query
+    per batch."""
+
+    def get_interval(self) -> int:
+        return int(settings.PERCOLATOR_BATCH_WINDOW)
+
+    def run_once(self, testing_mode: bool) -> None:
+        flushed = flush_percolator_batch()
+        if flushed:
+            logger.info(
+                "Scheduled %s batched documents for percolation.", flushed
+            )
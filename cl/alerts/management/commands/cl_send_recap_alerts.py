@@ -2,10 +2,13 @@ import copy
 import datetime
 import time
 import traceback
-from typing import Any, Literal
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, Literal
 
 import pytz
 from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 from django.http import QueryDict
@@ -22,6 +25,7 @@ from cl.alerts.tasks import send_search_alert_emails
 from cl.alerts.utils import (
     TaskCompletionStatus,
     add_document_hit_to_alert_set,
+    get_alert_query_hash,
     has_document_alert_hit_been_triggered,
     scheduled_alert_hits_limit_reached,
 )
@@ -29,8 +33,12 @@ from cl.api.models import WebhookEventType
 from cl.api.tasks import send_search_alert_webhook_es
 from cl.lib.command_utils import VerboseCommand, logger
 from cl.lib.date_time import dt_as_local_date
-from cl.lib.elasticsearch_utils import do_es_sweep_alert_query
+from cl.lib.elasticsearch_utils import (
+    build_es_sweep_alert_searches,
+    do_es_sweep_alert_queries,
+)
 from cl.lib.redis_utils import get_redis_interface
+from cl.lib.types import EsSweepAlertSearches
 from cl.search.documents import (
     DocketDocument,
     ESRECAPSweepDocument,
@@ -436,28 +444,185 @@ def filter_rd_alert_hits(
     return rds_to_send
 
 
-def query_alerts(
-    search_params: QueryDict,
-) -> tuple[list[Hit] | None, Response | None, Response | None]:
+AlertResults = tuple[list[Hit] | None, Response | None, Response | None]
+
+
+def query_alerts_batch(
+    alerts_searches: list[EsSweepAlertSearches],
+) -> list[AlertResults]:
+    """Query the sweep index for a batch of alerts using a single multi
+    search request.
+
+    :param alerts_searches: The searches of each alert.
+    :return: The results of each alert, in the same order.
+    """
     try:
-        search_query = RECAPSweepDocument.search()
-        child_search_query = ESRECAPSweepDocument.search()
-        return do_es_sweep_alert_query(
-            search_query,
-            child_search_query,
-            search_params,
-        )
-    except (
-        UnbalancedParenthesesQuery,
-        UnbalancedQuotesQuery,
-        BadProximityQuery,
-        TransportError,
-        ConnectionError,
-        RequestError,
-    ):
+        alerts_results = do_es_sweep_alert_queries(alerts_searches)
+    except (TransportError, ConnectionError, RequestError):
         traceback.print_exc()
-        logger.info(f"Search for this alert failed: {search_params}\n")
-        return None, None, None
+        logger.info(
+            f"Search for a batch of {len(alerts_searches)} alerts failed.\n"
+        )
+        return [(None, None, None)] * len(alerts_searches)
+
+    for alert_searches, alert_results in zip(alerts_searches, alerts_results):
+        if alert_results is None:
+            logger.info(f"Search for this alert failed: {alert_searches.cd}\n")
+    return [
+        alert_results or (None, None, None) for alert_results in alerts_results
+    ]
+
+
+class SharedAlertResults:
+    """Hold the results of the alert queries of a sweep until every alert
+    that shares them has been served.
+
+    Each distinct query is run once per sweep and its results fan out to all
+    the alerts saved with an equivalent query. Every alert gets its own copy
+    of the results since they're filtered in place for each alert.
+    """
+
+    def __init__(self, alerts: Iterable[Alert]) -> None:
+        self.pending = Counter(
+            get_alert_query_hash(alert.query) for alert in alerts
+        )
+        self.results: dict[str, AlertResults] = {}
+
+    def __contains__(self, query_hash: str) -> bool:
+        return query_hash in self.results
+
+    def reserve(self, query_hash: str, count: int) -> None:
+        """Make sure the results of a query are kept for at least count
+        alerts, e.g. for alerts created after the sweep started.
+        """
+        self.pending[query_hash] = max(self.pending[query_hash], count)
+
+    def add(self, query_hash: str, results: AlertResults) -> None:
+        self.results[query_hash] = results
+
+    def take(self, query_hash: str) -> AlertResults:
+        """Get the results of a query for one of its alerts. The results are
+        released once the last alert that shares the query takes them.
+
+        :param query_hash: The hash of the alert query.
+        :return: The results of the query.
+        """
+        self.pending[query_hash] -= 1
+        if self.pending[query_hash] > 0:
+            return copy.deepcopy(self.results[query_hash])
+        del self.pending[query_hash]
+        return self.results.pop(query_hash)
+
+
+def query_alerts_in_batches(
+    alerts: list[Alert], shared_results: SharedAlertResults | None = None
+) -> dict[int, AlertResults]:
+    """Query the sweep index for many alerts.
+
+    Alerts with equivalent queries are grouped and each distinct query is
+    sent only once, including queries already run for alerts of another user
+    or rate during the sweep. The searches of RECAP_SWEEP_ALERTS_BATCH_SIZE
+    queries are sent together in a single multi search request, and up to
+    RECAP_SWEEP_ALERTS_WORKERS requests are sent in parallel. Queries are
+    built in the calling thread, so only the requests to ES run in the
+    workers.
+
+    :param alerts: The alerts to query.
+    :param shared_results: The results shared across the sweep. If not
+    provided, the results are only shared within these alerts.
+    :return: A dict mapping each alert ID to its results, as returned by
+    do_es_sweep_alert_query.
+    """
+    if shared_results is None:
+        shared_results = SharedAlertResults(alerts)
+
+    alerts_by_query: defaultdict[str, list[Alert]] = defaultdict(list)
+    for alert in alerts:
+        alerts_by_query[get_alert_query_hash(alert.query)].append(alert)
+
+    queries_to_run = []
+    alerts_searches = []
+    for query_hash, query_alerts in alerts_by_query.items():
+        shared_results.reserve(query_hash, len(query_alerts))
+        if query_hash in shared_results:
+            continue
+        search_params = QueryDict(query_alerts[0].query.encode(), mutable=True)
+        try:
+            alert_searches = build_es_sweep_alert_searches(
+                RECAPSweepDocument.search(),
+                ESRECAPSweepDocument.search(),
+                search_params,
+            )
+        except (
+            UnbalancedParenthesesQuery,
+            UnbalancedQuotesQuery,
+            BadProximityQuery,
+        ):
+            traceback.print_exc()
+            logger.info(f"Search for this alert failed: {search_params}\n")
+            alert_searches = None
+        if alert_searches is None:
+            # Remember invalid queries too, so they're not built again.
+            shared_results.add(query_hash, (None, None, None))
+            continue
+        queries_to_run.append(query_hash)
+        alerts_searches.append(alert_searches)
+
+    batch_size = int(settings.RECAP_SWEEP_ALERTS_BATCH_SIZE)
+    batches = [
+        alerts_searches[i : i + batch_size]
+        for i in range(0, len(alerts_searches), batch_size)
+    ]
+    with ThreadPoolExecutor(
+        max_workers=max(int(settings.RECAP_SWEEP_ALERTS_WORKERS), 1)
+    ) as executor:
+        batches_results = executor.map(query_alerts_batch, batches)
+        queries_results = [
+            query_results
+            for batch_results in batches_results
+            for query_results in batch_results
+        ]
+    for query_hash, query_results in zip(queries_to_run, queries_results):
+        shared_results.add(query_hash, query_results)
+
+    return {
+        alert.pk: shared_results.take(query_hash)
+        for query_hash, query_alerts in alerts_by_query.items()
+        for alert in query_alerts
+    }
+
+
+def get_users_alerts(
+    rate: str, members_only: bool = False
+) -> Iterator[list[tuple[User, list[Alert]]]]:
+    """Get the users with RECAP alerts of a rate and their alerts, in groups
+    of users that have about as many alerts as are queried in one round of
+    parallel batches.
+
+    :param rate: The rate of the alerts.
+    :param members_only: Whether to skip users who are not members.
+    :return: An iterator over lists of (user, alerts) tuples.
+    """
+    alert_users = User.objects.filter(alerts__rate=rate).distinct()
+    group_size = int(settings.RECAP_SWEEP_ALERTS_BATCH_SIZE) * max(
+        int(settings.RECAP_SWEEP_ALERTS_WORKERS), 1
+    )
+    users_alerts = []
+    alerts_count = 0
+    for user in alert_users:
+        if members_only and not user.profile.is_member:
+            continue
+        alerts = list(
+            user.alerts.filter(rate=rate, alert_type=SEARCH_TYPES.RECAP)
+        )
+        users_alerts.append((user, alerts))
+        alerts_count += len(alerts)
+        if alerts_count >= group_size:
+            yield users_alerts
+            users_alerts = []
+            alerts_count = 0
+    if users_alerts:
+        yield users_alerts
 
 
 def process_alert_hits(
@@ -548,7 +713,10 @@ def send_search_alert_webhooks(
 
 
 def query_and_send_alerts(
-    r: Redis, rate: Literal["rt", "dly"], query_date: datetime.date
+    r: Redis,
+    rate: Literal["rt", "dly"],
+    query_date: datetime.date,
+    shared_results: SharedAlertResults | None = None,
 ) -> None:
     """Query the sweep index and send alerts based on the specified rate
     and date.
@@ -556,65 +724,75 @@ def query_and_send_alerts(
     :param r: The Redis interface.
     :param rate: The rate at which to query alerts.
     :param query_date: The daily re_index query date.
+    :param shared_results: Optional, the query results shared across the
+    sweep.
     :return: None.
     """
 
-    alert_users: UserProfile.user = User.objects.filter(
-        alerts__rate=rate
-    ).distinct()
     alerts_sent_count = 0
     now_time = datetime.datetime.now()
-    for user in alert_users:
-        if rate == Alert.REAL_TIME and not user.profile.is_member:
-            continue
-        alerts = user.alerts.filter(rate=rate, alert_type=SEARCH_TYPES.RECAP)
-        logger.info(f"Running alerts for user '{user}': {alerts}")
-
-        hits = []
-        alerts_to_update = []
-        for alert in alerts:
-            search_params = QueryDict(alert.query.encode(), mutable=True)
-            results, parent_results, child_results = query_alerts(
-                search_params
-            )
-            if not results:
-                continue
-            alerts_to_update.append(alert.pk)
-            search_type = search_params.get("type", SEARCH_TYPES.RECAP)
-            results_to_send = process_alert_hits(
-                r, results, parent_results, child_results, alert.pk, query_date
-            )
-            if not results_to_send:
-                continue
-            hits.append(
-                [
-                    alert,
-                    search_type,
-                    results_to_send,
-                    len(results_to_send),
-                ]
-            )
-            alert.query_run = search_params.urlencode()  # type: ignore
-            alert.date_last_hit = timezone.now()
-            alert.save()
+    alerts_to_update = []
+    for users_alerts in get_users_alerts(
+        rate, members_only=rate == Alert.REAL_TIME
+    ):
+        alerts_results = query_alerts_in_batches(
+            [alert for _, alerts in users_alerts for alert in alerts],
+            shared_results,
+        )
+        for user, alerts in users_alerts:
+            logger.info(f"Running alerts for user '{user}': {alerts}")
 
-            # Send webhooks
-            send_search_alert_webhooks(user, results_to_send, alert.pk)
+            hits = []
+            for alert in alerts:
+                results, parent_results, child_results = alerts_results.get(
+                    alert.pk, (None, None, None)
+                )
+                if not results:
+                    continue
+                alerts_to_update.append(alert.pk)
+                search_params = QueryDict(alert.query.encode(), mutable=True)
+                search_type = search_params.get("type", SEARCH_TYPES.RECAP)
+                results_to_send = process_alert_hits(
+                    r,
+                    results,
+                    parent_results,
+                    child_results,
+                    alert.pk,
+                    query_date,
+                )
+                if not results_to_send:
+                    continue
+                hits.append(
+                    [
+                        alert,
+                        search_type,
+                        results_to_send,
+                        len(results_to_send),
+                    ]
+                )
+                alert.query_run = search_params.urlencode()  # type: ignore
+                alert.date_last_hit = now_time
 
-        if hits:
-            send_search_alert_emails.delay([(user.pk, hits)])
-            alerts_sent_count += 1
+                # Send webhooks
+                send_search_alert_webhooks(user, results_to_send, alert.pk)
 
-        # Update Alert's date_last_hit in bulk.
-        Alert.objects.filter(id__in=alerts_to_update).update(
-            date_last_hit=now_time
-        )
-        async_to_sync(tally_stat)(f"alerts.sent.{rate}", inc=alerts_sent_count)
-        logger.info(f"Sent {alerts_sent_count} {rate} email alerts.")
+            if hits:
+                send_search_alert_emails.delay([(user.pk, hits)])
+                alerts_sent_count += 1
+
+    # Update Alert's date_last_hit in bulk.
+    Alert.objects.filter(id__in=alerts_to_update).update(
+        date_last_hit=now_time
+    )
+    async_to_sync(tally_stat)(f"alerts.sent.{rate}", inc=alerts_sent_count)
+    logger.info(f"Sent {alerts_sent_count} {rate} email alerts.")
 
 
 def query_and_schedule_alerts(
-    r: Redis, rate: Literal["wly", "mly"], query_date: datetime.date
+    r: Redis,
+    rate: Literal["wly", "mly"],
+    query_date: datetime.date,
+    shared_results: SharedAlertResults | None = None,
 ) -> None:
     """Query the sweep index and schedule alerts based on the specified rate
     and date.
@@ -622,60 +800,70 @@ def query_and_schedule_alerts(
     :param r: The Redis interface.
     :param rate: The rate at which to query alerts.
     :param query_date: The daily re_index query date.
+    :param shared_results: Optional, the query results shared across the
+    sweep.
     :return: None.
     """
 
-    alert_users = User.objects.filter(alerts__rate=rate).distinct()
     docket_content_type = ContentType.objects.get(
         app_label="search", model="docket"
     )
-    for user in alert_users:
-        alerts = user.alerts.filter(rate=rate, alert_type=SEARCH_TYPES.RECAP)
-        logger.info(f"Running '{rate}' alerts for user '{user}': {alerts}")
-        scheduled_hits_to_create = []
-        for alert in alerts:
-            search_params = QueryDict(alert.query.encode(), mutable=True)
-            results, parent_results, child_results = query_alerts(
-                search_params
-            )
-            if not results:
-                continue
-
-            results_to_send = process_alert_hits(
-                r, results, parent_results, child_results, alert.pk, query_date
-            )
-            if not results_to_send:
-                continue
-            for hit in results_to_send:
-                # Schedule DAILY, WEEKLY and MONTHLY Alerts
-                if scheduled_alert_hits_limit_reached(alert.pk, user.pk):
-                    # Skip storing hits for this alert-user combination because
-                    # the SCHEDULED_ALERT_HITS_LIMIT has been reached.
+    for users_alerts in get_users_alerts(rate):
+        alerts_results = query_alerts_in_batches(
+            [alert for _, alerts in users_alerts for alert in alerts],
+            shared_results,
+        )
+        for user, alerts in users_alerts:
+            logger.info(f"Running '{rate}' alerts for user '{user}': {alerts}")
+            scheduled_hits_to_create = []
+            for alert in alerts:
+                results, parent_results, child_results = alerts_results.get(
+                    alert.pk, (None, None, None)
+                )
+                if not results:
                     continue
 
-                child_result_objects = []
-                hit_copy = copy.deepcopy(hit)
-                if hasattr(hit_copy, "child_docs"):
-                    for child_doc in hit_copy.child_docs:
-                        child_result_objects.append(
-                            child_doc["_source"].to_dict()
+                results_to_send = process_alert_hits(
+                    r,
+                    results,
+                    parent_results,
+                    child_results,
+                    alert.pk,
+                    query_date,
+                )
+                if not results_to_send:
+                    continue
+                for hit in results_to_send:
+                    # Schedule DAILY, WEEKLY and MONTHLY Alerts
+                    if scheduled_alert_hits_limit_reached(alert.pk, user.pk):
+                        # Skip storing hits for this alert-user combination
+                        # because the SCHEDULED_ALERT_HITS_LIMIT has been
+                        # reached.
+                        continue
+
+                    child_result_objects = []
+                    hit_copy = copy.deepcopy(hit)
+                    if hasattr(hit_copy, "child_docs"):
+                        for child_doc in hit_copy.child_docs:
+                            child_result_objects.append(
+                                child_doc["_source"].to_dict()
+                            )
+                    hit_copy["child_docs"] = child_result_objects
+                    scheduled_hits_to_create.append(
+                        ScheduledAlertHit(
+                            user=user,
+                            alert=alert,
+                            document_content=hit_copy.to_dict(),
+                            content_type=docket_content_type,
+                            object_id=hit_copy.docket_id,
                         )
-                hit_copy["child_docs"] = child_result_objects
-                scheduled_hits_to_create.append(
-                    ScheduledAlertHit(
-                        user=user,
-                        alert=alert,
-                        document_content=hit_copy.to_dict(),
-                        content_type=docket_content_type,
-                        object_id=hit_copy.docket_id,
                     )
-                )
-                # Send webhooks
-                send_search_alert_webhooks(user, results_to_send, alert.pk)
+                    # Send webhooks
+                    send_search_alert_webhooks(user, results_to_send, alert.pk)
 
-        # Create scheduled WEEKLY and MONTHLY Alerts in bulk.
-        if scheduled_hits_to_create:
-            ScheduledAlertHit.objects.bulk_create(scheduled_hits_to_create)
+            # Create scheduled WEEKLY and MONTHLY Alerts in bulk.
+            if scheduled_hits_to_create:
+                ScheduledAlertHit.objects.bulk_create(scheduled_hits_to_create)
 
 
 class Command(VerboseCommand):
@@ -727,10 +915,27 @@ class Command(VerboseCommand):
                 )
             )
         ).date()
-        query_and_send_alerts(r, Alert.REAL_TIME, query_date)
-        query_and_send_alerts(r, Alert.DAILY, query_date)
-        query_and_schedule_alerts(r, Alert.WEEKLY, query_date)
-        query_and_schedule_alerts(r, Alert.MONTHLY, query_date)
+        # Run each distinct alert query once for all the rates. Real time
+        # alerts of users who are not members are skipped as in
+        # get_users_alerts, so their queries aren't kept for them.
+        sweep_alerts = Alert.objects.filter(
+            alert_type=SEARCH_TYPES.RECAP,
+            rate__in=[
+                Alert.REAL_TIME,
+                Alert.DAILY,
+                Alert.WEEKLY,
+                Alert.MONTHLY,
+            ],
+        ).select_related("user__profile", "user__membership")
+        shared_results = SharedAlertResults(
+            alert
+            for alert in sweep_alerts.iterator()
+            if alert.rate != Alert.REAL_TIME or alert.user.profile.is_member
+        )
+        query_and_send_alerts(r, Alert.REAL_TIME, query_date, shared_results)
+        query_and_send_alerts(r, Alert.DAILY, query_date, shared_results)
+        query_and_schedule_alerts(r, Alert.WEEKLY, query_date, shared_results)
+        query_and_schedule_alerts(r, Alert.MONTHLY, query_date, shared_results)
         r.delete("alert_sweep:main_re_index_completed")
         r.delete("alert_sweep:rd_re_index_completed")
         r.delete("alert_sweep:query_date")
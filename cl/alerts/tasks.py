@@ -1,4 +1,6 @@
 import copy
+import pickle
+from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from importlib import import_module
@@ -10,12 +12,14 @@ from celery import Task
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
 from django.db import transaction
 from django.template import loader
 from django.urls import reverse
 from django.utils.timezone import now
 from elasticsearch.exceptions import ConnectionError
+from elasticsearch_dsl import connections
 
 from cl.alerts.models import Alert, DocketAlert, ScheduledAlertHit
 from cl.alerts.utils import (
@@ -27,8 +31,10 @@ from cl.alerts.utils import (
     override_alert_query,
     percolate_document,
     percolate_es_document,
+    percolate_es_documents,
     prepare_percolator_content,
     scheduled_alert_hits_limit_reached,
+    split_percolator_hits,
     transform_percolator_child_document,
 )
 from cl.api.models import WebhookEventType
@@ -50,6 +56,7 @@ from cl.lib.string_utils import trunc
 from cl.recap.constants import COURT_TIMEZONES
 from cl.search.models import Docket, DocketEntry
 from cl.search.types import (
+    ESDictDocument,
     ESDocumentNameType,
     PercolatorResponseType,
     SaveDocumentResponseType,
@@ -62,6 +69,9 @@ from cl.users.models import UserProfile
 
 es_document_module = import_module("cl.search.documents")
 
+PERCOLATOR_BATCH_KEY = "alerts.percolator_batch"
+PERCOLATOR_BATCH_FLUSH_SEMAPHORE = "alerts.percolator_batch.flushing"
+
 
 def make_alert_key(d_pk: int) -> str:
     return f"docket.alert.enqueued:{d_pk}"
@@ -912,6 +922,13 @@ def send_or_schedule_search_alerts(
         self.request.chain = None
         return None
 
+    if settings.PERCOLATOR_BATCH_ENABLED:
+        # Percolate the document later along with the other documents saved
+        # within the same window.
+        add_document_to_percolator_batch(response)
+        self.request.chain = None
+        return None
+
     app_label = response.app_label
     document_id = response.document_id
     document_content = response.document_content
@@ -960,6 +977,192 @@ def send_or_schedule_search_alerts(
     )
 
 
+def add_document_to_percolator_batch(response: SaveESDocumentReturn) -> None:
+    """Append a saved document to the Redis percolator batch.
+
+    If the batch grows to PERCOLATOR_BATCH_MAX_SIZE documents, a flush is
+    scheduled right away instead of waiting for the next window.
+
+    :param response: The `SaveESDocumentReturn` object of the document.
+    :return: None
+    """
+    r = get_redis_interface("CACHE", decode_responses=False)
+    batch_size = r.rpush(PERCOLATOR_BATCH_KEY, pickle.dumps(response))
+    if batch_size >= int(
+        settings.PERCOLATOR_BATCH_MAX_SIZE
+    ) and create_redis_semaphore(
+        "CACHE",
+        PERCOLATOR_BATCH_FLUSH_SEMAPHORE,
+        ttl=int(settings.PERCOLATOR_BATCH_WINDOW),
+    ):
+        flush_percolator_batch.delay()
+
+
+@app.task(ignore_result=True)
+def flush_percolator_batch() -> int:
+    """Pop all the documents from the Redis percolator batch and schedule
+    their percolation in batches of PERCOLATOR_BATCH_MAX_SIZE documents.
+
+    :return: The number of documents flushed.
+    """
+    r = get_redis_interface("CACHE", decode_responses=False)
+    batch_size = int(settings.PERCOLATOR_BATCH_MAX_SIZE)
+    flushed = 0
+    while True:
+        # Read and remove the documents in a single transaction so that
+        # documents added concurrently are either flushed now or in the next
+        # run.
+        pipe = r.pipeline()
+        pipe.lrange(PERCOLATOR_BATCH_KEY, 0, batch_size - 1)
+        pipe.ltrim(PERCOLATOR_BATCH_KEY, batch_size, -1)
+        documents = pipe.execute()[0]
+        if not documents:
+            break
+        send_or_schedule_search_alerts_batch.delay(
+            [pickle.loads(document) for document in documents]
+        )
+        flushed += len(documents)
+
+    delete_redis_semaphore("CACHE", PERCOLATOR_BATCH_FLUSH_SEMAPHORE)
+    return flushed
+
+
+def percolate_search_alerts_batch(
+    app_label: str, responses: list[SaveESDocumentReturn]
+) -> list[SendAlertsResponse]:
+    """Percolate many documents of the same type using a single percolator
+    query, and split the alerts triggered by document.
+
+    :param app_label: The app label of the documents.
+    :param responses: The `SaveESDocumentReturn` objects of the documents.
+    :return: A list of SendAlertsResponse, one for each document that
+    triggered alerts.
+    """
+
+    documents: list[ESDictDocument] = []
+    child_documents: list[ESDictDocument] = []
+    parent_documents: list[ESDictDocument] = []
+    documents_content: list[ESDictDocument] = []
+    percolator_index = es_document_index = None
+    for response in responses:
+        try:
+            percolator_index, es_document_index, documents_to_percolate = (
+                prepare_percolator_content(app_label, response.document_id)
+            )
+        except ObjectDoesNotExist:
+            # The document was deleted while it waited in the batch.
+            continue
+        if documents_to_percolate:
+            # Use the main document as the content to render in alerts, like
+            # send_or_schedule_search_alerts does.
+            main_document, child_document, parent_document = (
+                documents_to_percolate
+            )
+            documents.append(main_document)
+            child_documents.append(child_document)
+            parent_documents.append(parent_document)
+            documents_content.append(main_document)
+
+    if es_document_index:
+        # Percolating a document by ID makes ES fetch its source, so fetch all
+        # of them at once and percolate them inline instead.
+        es = connections.get_connection()
+        es_docs = es.mget(
+            index=es_document_index,
+            body={"ids": [response.document_id for response in responses]},
+        )["docs"]
+        for response, es_doc in zip(responses, es_docs):
+            if not es_doc.get("found"):
+                continue
+            documents.append(es_doc["_source"])
+            documents_content.append(response.document_content)
+
+    if not documents:
+        return []
+
+    percolate_args: tuple = (percolator_index, documents, app_label)
+    if child_documents:
+        percolate_args += (child_documents, parent_documents)
+    percolator_responses = percolate_es_documents(*percolate_args)
+    if not percolator_responses.main_response:
+        return []
+
+    main_alerts_triggered, rd_alerts_triggered, d_alerts_triggered = (
+        fetch_all_search_alerts_results(
+            percolator_responses,
+            *percolate_args,
+            percolate_function=percolate_es_documents,
+        )
+    )
+    documents_count = len(documents)
+    main_hits_by_document = split_percolator_hits(
+        main_alerts_triggered, documents_count
+    )
+    rd_hits_by_document = split_percolator_hits(
+        rd_alerts_triggered, documents_count
+    )
+    d_hits_by_document = split_percolator_hits(
+        d_alerts_triggered, documents_count
+    )
+    return [
+        SendAlertsResponse(
+            main_alerts_triggered=main_hits,
+            rd_alerts_triggered=rd_hits,
+            d_alerts_triggered=d_hits,
+            document_content=document_content,
+            app_label_model=app_label,
+        )
+        for main_hits, rd_hits, d_hits, document_content in zip(
+            main_hits_by_document,
+            rd_hits_by_document,
+            d_hits_by_document,
+            documents_content,
+        )
+        if main_hits
+    ]
+
+
+@app.task(
+    bind=True,
+    autoretry_for=(ConnectionError,),
+    max_retries=3,
+    interval_start=5,
+    ignore_result=True,
+)
+def send_or_schedule_search_alerts_batch(
+    self: Task, responses: list[SaveESDocumentReturn]
+) -> None:
+    """Percolate a batch of saved documents and process the alerts each of
+    them triggered.
+
+    This is the batched version of send_or_schedule_search_alerts. Documents
+    are percolated in one request per document type, and the alerts
+    triggered by each document are processed by its own
+    percolator_response_processing task, just like when they are percolated
+    one by one.
+
+    :param self: The celery task
+    :param responses: The `SaveESDocumentReturn` objects of the documents.
+    :return: None
+    """
+
+    responses_by_app_label: dict[str, list[SaveESDocumentReturn]] = (
+        defaultdict(list)
+    )
+    for response in responses:
+        responses_by_app_label[response.app_label].append(response)
+
+    # Percolate all the documents before processing any response, so that a
+    # retry doesn't process the alerts of some documents twice.
+    alerts_responses = []
+    for app_label, app_label_responses in responses_by_app_label.items():
+        alerts_responses.extend(
+            percolate_search_alerts_batch(app_label, app_label_responses)
+        )
+    for alerts_response in alerts_responses:
+        percolator_response_processing.delay(alerts_response)
+
+
 # New task
 @app.task(
     bind=True,
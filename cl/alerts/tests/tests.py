@@ -38,10 +38,15 @@ from cl.alerts.models import (
     ScheduledAlertHit,
 )
 from cl.alerts.tasks import (
+    PERCOLATOR_BATCH_KEY,
     get_docket_notes_and_tags_by_user,
     send_alert_and_webhook,
 )
-from cl.alerts.utils import InvalidDateError, percolate_es_document
+from cl.alerts.utils import (
+    InvalidDateError,
+    percolate_es_document,
+    percolate_es_documents,
+)
 from cl.api.factories import WebhookFactory
 from cl.api.models import (
     WEBHOOK_EVENT_STATUS,
@@ -53,6 +58,7 @@ from cl.audio.factories import AudioWithParentsFactory
 from cl.audio.models import Audio
 from cl.donate.models import NeonMembership
 from cl.favorites.factories import NoteFactory, UserTagFactory
+from cl.lib.redis_utils import get_redis_interface
 from cl.lib.test_helpers import SimpleUserDataMixin, opinion_v3_search_api_keys
 from cl.people_db.factories import PersonFactory
 from cl.search.documents import AudioDocument, AudioPercolator
@@ -1949,6 +1955,89 @@ class SearchAlertsOAESTests(ESIndexTestCase, TestCase):
         self.assertEqual(r.json()["count"], 1)
         rt_oral_argument.delete()
 
+    @override_settings(PERCOLATOR_BATCH_ENABLED=True)
+    def test_percolate_documents_in_batch(self, mock_abort_audio):
+        """Are documents saved within the same window percolated together,
+        and are the alerts each of them triggered sent as if they were
+        percolated one by one?
+        """
+        r = get_redis_interface("CACHE")
+        r.delete(PERCOLATOR_BATCH_KEY)
+        with mock.patch(
+            "cl.api.webhooks.requests.post",
+            side_effect=lambda *args, **kwargs: MockResponse(
+                200, mock_raw=True
+            ),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                rt_oral_argument = AudioWithParentsFactory.create(
+                    case_name="RT Test OA",
+                    docket__court=self.court_1,
+                    docket__date_argued=now().date(),
+                    docket__docket_number="19-5735",
+                )
+                rt_oral_argument_2 = AudioWithParentsFactory.create(
+                    case_name="Batch Percolation",
+                    docket=self.docket,
+                )
+
+            # The documents wait in the batch until it's flushed.
+            self.assertEqual(len(mail.outbox), 0)
+            self.assertEqual(r.llen(PERCOLATOR_BATCH_KEY), 2)
+
+            with mock.patch(
+                "cl.alerts.tasks.percolate_es_documents",
+                wraps=percolate_es_documents,
+            ) as mock_percolate:
+                call_command("cl_flush_percolator_batch", testing_mode=True)
+            self.assertEqual(mock_percolate.call_count, 1)
+
+        self.assertEqual(r.llen(PERCOLATOR_BATCH_KEY), 0)
+        # Two emails for the first document, one for each RT alert that
+        # matched it, and one for the second document.
+        self.assertEqual(len(mail.outbox), 3)
+        batch_emails = [
+            email for email in mail.outbox if "Batch Percolation" in email.body
+        ]
+        self.assertEqual(len(batch_emails), 1)
+        self.assertEqual(batch_emails[0].to, [self.user_profile.user.email])
+        self.assertNotIn(rt_oral_argument.case_name, batch_emails[0].body)
+        # Highlights belong to the document they were found in.
+        self.assertNotIn("19-5735", batch_emails[0].alternatives[0][0])
+        for email in mail.outbox:
+            if email not in batch_emails:
+                self.assertIn(
+                    "<strong>19-5735</strong>", email.alternatives[0][0]
+                )
+
+        # A batch of a single document keeps its highlights, which
+        # Elasticsearch doesn't prefix with the document slot.
+        mail.outbox = []
+        with mock.patch(
+            "cl.api.webhooks.requests.post",
+            side_effect=lambda *args, **kwargs: MockResponse(
+                200, mock_raw=True
+            ),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                rt_oral_argument_3 = AudioWithParentsFactory.create(
+                    case_name="RT Test OA",
+                    docket__court=self.court_1,
+                    docket__date_argued=now().date(),
+                    docket__docket_number="19-5735",
+                )
+            self.assertEqual(r.llen(PERCOLATOR_BATCH_KEY), 1)
+            call_command("cl_flush_percolator_batch", testing_mode=True)
+
+        self.assertEqual(r.llen(PERCOLATOR_BATCH_KEY), 0)
+        self.assertEqual(len(mail.outbox), 2)
+        for email in mail.outbox:
+            self.assertIn("<strong>19-5735</strong>", email.alternatives[0][0])
+
+        rt_oral_argument.delete()
+        rt_oral_argument_2.delete()
+        rt_oral_argument_3.delete()
+
     def test_send_oa_search_alert_webhooks(self, mock_abort_audio):
         """Can we send RT OA search alerts?"""
 
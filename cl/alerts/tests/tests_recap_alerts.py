@@ -4,6 +4,7 @@ from unittest import mock
 import time_machine
 from django.core import mail
 from django.core.management import call_command
+from django.http import QueryDict
 from django.test.utils import override_settings
 from django.urls import reverse
 from django.utils.timezone import now
@@ -21,12 +22,14 @@ from cl.alerts.models import (
 )
 from cl.alerts.utils import (
     build_plain_percolator_query,
+    normalize_alert_query,
     percolate_es_document,
     prepare_percolator_content,
 )
 from cl.api.factories import WebhookFactory
 from cl.api.models import WebhookEvent, WebhookEventType
 from cl.donate.models import NeonMembership
+from cl.lib.elasticsearch_utils import do_es_sweep_alert_queries
 from cl.lib.redis_utils import get_redis_interface
 from cl.lib.test_helpers import RECAPSearchTestCase
 from cl.people_db.factories import (
@@ -149,6 +152,144 @@ class RECAPAlertsSweepIndexTest(
         html_content = self.get_html_content_from_email(mail.outbox[1])
         self.assertIn(dly_recap_alert.name, html_content)
 
+    @override_settings(
+        RECAP_SWEEP_ALERTS_BATCH_SIZE=1, RECAP_SWEEP_ALERTS_WORKERS=2
+    )
+    def test_send_recap_alerts_in_msearch_batches(self, mock_prefix) -> None:
+        """Confirm alerts are queried in multi-search batches, a bad query
+        doesn't affect the other alerts in its batch, and date_last_hit is
+        updated for every alert that got hits.
+        """
+        dly_alerts = [
+            AlertFactory(
+                user=user_profile.user,
+                rate=Alert.DAILY,
+                name=f"Test DLY RECAP Alert {i}",
+                query='q="401 Civil"&type=r',
+            )
+            for i, user_profile in enumerate(
+                [self.user_profile, self.user_profile, self.user_profile_2]
+            )
+        ]
+        no_hits_alert = AlertFactory(
+            user=self.user_profile_2.user,
+            rate=Alert.DAILY,
+            name="Test DLY RECAP Alert No Hits",
+            query='q="Lorem Ipsum Dolor"&type=r',
+        )
+        bad_query_alert = AlertFactory(
+            user=self.user_profile.user,
+            rate=Alert.DAILY,
+            name="Test DLY RECAP Alert Bad Query",
+            query='q=("401 Civil"&type=r',
+        )
+
+        with mock.patch(
+            "cl.api.webhooks.requests.post",
+            side_effect=lambda *args, **kwargs: MockResponse(
+                200, mock_raw=True
+            ),
+        ), mock.patch(
+            "cl.alerts.management.commands.cl_send_recap_alerts.do_es_sweep_alert_queries",
+            side_effect=do_es_sweep_alert_queries,
+        ) as mock_queries:
+            call_command("cl_send_recap_alerts", testing_mode=True)
+
+        # The two distinct valid queries are sent in two batches of one.
+        self.assertEqual(mock_queries.call_count, 2)
+        # One email per user, each one including only their alerts with hits.
+        self.assertEqual(
+            len(mail.outbox), 2, msg="Outgoing emails don't match."
+        )
+        emails = {email.to[0]: email for email in mail.outbox}
+        html_content = self.get_html_content_from_email(
+            emails[self.user_profile.user.email]
+        )
+        self._confirm_number_of_alerts(html_content, 2)
+        self.assertIn(dly_alerts[0].name, html_content)
+        self.assertIn(dly_alerts[1].name, html_content)
+        self.assertNotIn(bad_query_alert.name, html_content)
+        html_content = self.get_html_content_from_email(
+            emails[self.user_profile_2.user.email]
+        )
+        self._confirm_number_of_alerts(html_content, 1)
+        self.assertIn(dly_alerts[2].name, html_content)
+        # The emails link to the query run for each alert.
+        query_run = QueryDict(dly_alerts[2].query.encode()).urlencode()
+        self.assertIn(
+            f"?{query_run}&edit_alert={dly_alerts[2].pk}", html_content
+        )
+
+        for alert in dly_alerts:
+            alert.refresh_from_db()
+            self.assertIsNotNone(alert.date_last_hit)
+        for alert in [no_hits_alert, bad_query_alert]:
+            alert.refresh_from_db()
+            self.assertIsNone(alert.date_last_hit)
+
+    def test_run_equivalent_alert_queries_once(self, mock_prefix) -> None:
+        """Confirm alerts with equivalent queries are queried once per sweep
+        and their results are sent to every alert, across users and rates.
+        """
+        self.assertEqual(
+            normalize_alert_query('type=r&q= "401 Civil" &page=2&court='),
+            normalize_alert_query('q="401 Civil"&type=r'),
+        )
+        rt_alert = AlertFactory(
+            user=self.user_profile.user,
+            rate=Alert.REAL_TIME,
+            name="Test RT RECAP Alert",
+            query='q="401 Civil"&type=r',
+        )
+        dly_alert = AlertFactory(
+            user=self.user_profile.user,
+            rate=Alert.DAILY,
+            name="Test DLY RECAP Alert One",
+            query='type=r&q="401 Civil"',
+        )
+        dly_alert_2 = AlertFactory(
+            user=self.user_profile_2.user,
+            rate=Alert.DAILY,
+            name="Test DLY RECAP Alert Two",
+            query='type=r&q= "401 Civil" &page=2',
+        )
+
+        with mock.patch(
+            "cl.api.webhooks.requests.post",
+            side_effect=lambda *args, **kwargs: MockResponse(
+                200, mock_raw=True
+            ),
+        ), mock.patch(
+            "cl.alerts.management.commands.cl_send_recap_alerts.do_es_sweep_alert_queries",
+            side_effect=do_es_sweep_alert_queries,
+        ) as mock_queries:
+            call_command("cl_send_recap_alerts", testing_mode=True)
+
+        # A single search was sent for the three alerts.
+        self.assertEqual(mock_queries.call_count, 1)
+        self.assertEqual(len(mock_queries.call_args.args[0]), 1)
+
+        # Every alert got its hits, filtered by its own alert hits set.
+        self.assertEqual(
+            len(mail.outbox), 3, msg="Outgoing emails don't match."
+        )
+        emails_content = [
+            (email.to[0], self.get_html_content_from_email(email))
+            for email in mail.outbox
+        ]
+        for alert in [rt_alert, dly_alert, dly_alert_2]:
+            alert_emails = [
+                (to, html_content)
+                for to, html_content in emails_content
+                if alert.name in html_content
+            ]
+            self.assertEqual(len(alert_emails), 1)
+            to, html_content = alert_emails[0]
+            self._confirm_number_of_alerts(html_content, 1)
+            self.assertEqual(to, alert.user.email)
+            alert.refresh_from_db()
+            self.assertIsNotNone(alert.date_last_hit)
+
     def test_index_daily_recap_documents(self, mock_prefix) -> None:
         """Test index_daily_recap_documents method over different documents
         conditions.
@@ -1,7 +1,8 @@
 import copy
 from dataclasses import dataclass
 from datetime import date
-from typing import Any, Set
+from typing import Any, Callable, Set
+from urllib.parse import urlencode
 
 from django.apps import apps
 from django.conf import settings
@@ -19,6 +20,7 @@ from cl.alerts.models import (
     ScheduledAlertHit,
 )
 from cl.lib.command_utils import logger
+from cl.lib.crypto import sha256
 from cl.lib.elasticsearch_utils import (
     add_es_highlighting,
     add_fields_boosting,
@@ -51,6 +53,9 @@ from cl.search.types import (
     PercolatorResponses,
 )
 
+# Search parameters that don't change the results of an alert query.
+ALERT_QUERY_IGNORED_PARAMS = {"page", "edit_alert", "show_alert_modal"}
+
 
 @dataclass
 class DocketAlertReportObject:
@@ -189,6 +194,7 @@ def percolate_es_document(
     Docket percolator response (if applicable).
     """
 
+    percolate_query_child = percolate_query_parent = None
     if document_index:
         # If document_index is provided, use it along with the document_id to refer
         # to the document to percolate.
@@ -224,6 +230,105 @@ def percolate_es_document(
             "build the percolator query."
         )
 
+    return execute_percolator_queries(
+        percolator_index,
+        app_label,
+        percolate_query,
+        percolate_query_child,
+        percolate_query_parent,
+        main_search_after,
+        rd_search_after,
+        d_search_after,
+    )
+
+
+def percolate_es_documents(
+    percolator_index: str,
+    documents: list[ESDictDocument],
+    app_label: str,
+    child_documents: list[ESDictDocument] | None = None,
+    parent_documents: list[ESDictDocument] | None = None,
+    main_search_after: int | None = None,
+    rd_search_after: int | None = None,
+    d_search_after: int | None = None,
+) -> PercolatorResponses:
+    """Percolate many documents at once against the Elasticsearch Percolator
+    queries.
+
+    This is the batched version of percolate_es_document. Every alert that
+    matches at least one of the documents is returned once, and the documents
+    it matched are listed in its _percolator_document_slot field. Use
+    split_percolator_hits to get the hits of each document.
+
+    :param percolator_index: The ES percolator index name.
+    :param documents: The full documents to percolate.
+    :param app_label: The app label and model that belongs to the documents
+    being percolated.
+    :param child_documents: For RECAPDocuments, the documents with only child
+    fields, in the same order as documents.
+    :param parent_documents: For RECAPDocuments, the documents with only
+    parent fields, in the same order as documents.
+    :param main_search_after: Optional the ES main percolator query
+    search_after param  for deep pagination.
+    :param rd_search_after: Optional the ES RECAPDocument percolator query
+    search_after param  for deep pagination.
+    :param d_search_after: Optional the ES Docket document percolator query
+    search_after param  for deep pagination.
+    :return: A PercolatorResponses dataclass containing the main percolator
+    response, the RECAPDocument percolator response (if applicable), and the
+    Docket percolator response (if applicable).
+    """
+
+    percolate_query = Q(
+        "percolate", field="percolator_query", documents=documents
+    )
+    percolate_query_child = percolate_query_parent = None
+    if child_documents is not None and parent_documents is not None:
+        percolate_query_child = Q(
+            "percolate", field="percolator_query", documents=child_documents
+        )
+        percolate_query_parent = Q(
+            "percolate", field="percolator_query", documents=parent_documents
+        )
+    return execute_percolator_queries(
+        percolator_index,
+        app_label,
+        percolate_query,
+        percolate_query_child,
+        percolate_query_parent,
+        main_search_after,
+        rd_search_after,
+        d_search_after,
+    )
+
+
+def execute_percolator_queries(
+    percolator_index: str,
+    app_label: str | None,
+    percolate_query: Query,
+    percolate_query_child: Query | None,
+    percolate_query_parent: Query | None,
+    main_search_after: int | None,
+    rd_search_after: int | None,
+    d_search_after: int | None,
+) -> PercolatorResponses:
+    """Run the main, RECAPDocument and Docket percolator queries in a single
+    multi search request.
+
+    :param percolator_index: The ES percolator index name.
+    :param app_label: The app label and model that belongs to the document
+    being percolated.
+    :param percolate_query: The percolate query of the full document.
+    :param percolate_query_child: The percolate query of the document with
+    only child fields, used for RECAPDocuments.
+    :param percolate_query_parent: The percolate query of the document with
+    only parent fields, used for RECAPDocuments.
+    :param main_search_after: The main query search_after param.
+    :param rd_search_after: The RECAPDocument query search_after param.
+    :param d_search_after: The Docket query search_after param.
+    :return: A PercolatorResponses dataclass with the responses.
+    """
+
     exclude_rate_off = Q("term", rate=Alert.OFF)
     final_query = Q(
         "bool",
@@ -291,7 +396,11 @@ def percolate_es_document(
 
 
 def fetch_all_search_alerts_results(
-    initial_responses: PercolatorResponses, *args
+    initial_responses: PercolatorResponses,
+    *args,
+    percolate_function: Callable[..., PercolatorResponses] = (
+        percolate_es_document
+    ),
 ) -> tuple[list[Hit], list[Hit], list[Hit]]:
     """Fetches all search alerts results based on a given percolator query and
     the initial responses. It retrieves all the search results that exceed the
@@ -300,6 +409,8 @@ def fetch_all_search_alerts_results(
     :param initial_responses: A PercolatorResponses dataclass containing the
     initial ES Percolator Responses.
     :param args: Additional arguments to pass to the percolate_es_document method.
+    :param percolate_function: The function used to request the following
+    pages, percolate_es_document or percolate_es_documents.
     :return: A three-tuple containing the main percolator results, the
     RECAPDocument percolator results (if applicable), and the Docket
     percolator results (if applicable).
@@ -334,7 +445,7 @@ def fetch_all_search_alerts_results(
             "rd_search_after": rd_search_after,
             "d_search_after": d_search_after,
         }
-        responses = percolate_es_document(*args, **search_after_params)
+        responses = percolate_function(*args, **search_after_params)
         if not responses.main_response:
             break
 
@@ -366,6 +477,54 @@ def fetch_all_search_alerts_results(
     return all_main_alert_hits, all_rd_alert_hits, all_d_alert_hits
 
 
+def split_percolator_hits(
+    hits: list[Hit], documents_count: int
+) -> list[list[Hit]]:
+    """Split the hits of a multi-document percolator query by the document
+    they matched.
+
+    When many documents are percolated at once, Elasticsearch prefixes the
+    highlighted fields with the slot of the document they belong to. Each
+    document gets a copy of the hit with only its highlights, without the
+    prefix, so it looks like the hit of a single document percolator query.
+    A single document's highlights aren't prefixed, so its hits are returned
+    as they are.
+
+    :param hits: The hits returned by percolate_es_documents.
+    :param documents_count: The number of documents percolated.
+    :return: A list with the hits of each document, in the order the
+    documents were percolated.
+    """
+
+    if documents_count == 1:
+        return [list(hits)]
+
+    hits_by_slot: list[list[Hit]] = [[] for _ in range(documents_count)]
+    for hit in hits:
+        highlight = (
+            hit.meta.highlight.to_dict()
+            if hasattr(hit.meta, "highlight")
+            else None
+        )
+        for slot in hit.meta.fields["_percolator_document_slot"]:
+            if highlight is None:
+                hits_by_slot[slot].append(hit)
+                continue
+            prefix = f"{slot}_"
+            slot_hit = copy.deepcopy(hit)
+            slot_highlight = {
+                field.removeprefix(prefix): fragments
+                for field, fragments in highlight.items()
+                if field.startswith(prefix)
+            }
+            if slot_highlight:
+                slot_hit.meta.highlight = slot_highlight
+            else:
+                del slot_hit.meta.highlight
+            hits_by_slot[slot].append(slot_hit)
+    return hits_by_slot
+
+
 def override_alert_query(
     alert: Alert, cut_off_date: date | None = None
 ) -> QueryDict:
@@ -390,6 +549,36 @@ def override_alert_query(
     return qd
 
 
+def normalize_alert_query(query: str) -> str:
+    """Normalize an alert query string, so equivalent queries saved by
+    different users compare equal.
+
+    Parameters are sorted, values are stripped, and empty values and
+    parameters that don't change the search results are dropped.
+
+    :param query: The alert query string.
+    :return: The normalized query string.
+    """
+    qd = QueryDict(query.encode())
+    params = sorted(
+        (key, value.strip())
+        for key, values in qd.lists()
+        if key not in ALERT_QUERY_IGNORED_PARAMS
+        for value in values
+        if value.strip()
+    )
+    return urlencode(params)
+
+
+def get_alert_query_hash(query: str) -> str:
+    """Get a hash that identifies the results of an alert query.
+
+    :param query: The alert query string.
+    :return: The SHA256 hash of the normalized query.
+    """
+    return sha256(normalize_alert_query(query))
+
+
 # TODO: Remove after scheduled OA alerts have been processed.
 def alert_hits_limit_reached(alert_pk: int, user_pk: int) -> bool:
     """Check if the alert hits limit has been reached for a specific alert-user
@@ -0,0 +1,89 @@
+from datetime import date
+
+from cl.api.utils import (
+    get_latency_histogram,
+    get_latency_percentiles,
+    get_logging_prefix,
+    make_date_str_list,
+)
+from cl.lib.command_utils import VerboseCommand
+from cl.lib.redis_utils import get_redis_interface
+
+PERCENTILES = (50, 95, 99)
+
+
+def get_logged_endpoints(api_version: str, start: str, end: str) -> set[str]:
+    """Get the names of the endpoints that received requests during a date
+    range.
+
+    :param api_version: The API version to get the endpoints for.
+    :param start: The beginning date (inclusive).
+    :param end: The end date (inclusive).
+    :return: A set of endpoint names.
+    """
+    r = get_redis_interface("STATS")
+    pipe = r.pipeline()
+    api_prefix = get_logging_prefix(api_version)
+    for d in make_date_str_list(start, end):
+        pipe.zrange(f"{api_prefix}.endpoint.d:{d}.counts", 0, -1)
+    return set().union(*pipe.execute())
+
+
+class Command(VerboseCommand):
+    help = """Print the p50, p95 and p99 response times of the API endpoints
+    during a date range, computed from their latency histograms."""
+
+    def add_arguments(self, parser):
+        today = date.today().isoformat()
+        parser.add_argument(
+            "--api-version",
+            default="v4",
+            choices=["v3", "v4"],
+            help="The API version to report on.",
+        )
+        parser.add_argument(
+            "--start",
+            default=today,
+            help="The beginning date (inclusive), in ISO-8601 format.",
+        )
+        parser.add_argument(
+            "--end",
+            default=today,
+            help="The end date (inclusive), in ISO-8601 format.",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            help="The endpoint to report on, e.g. 'docket-list'. Can be "
+            "repeated. Defaults to all the endpoints that got requests.",
+        )
+
+    def handle(self, *args, **options):
+        super().handle(*args, **options)
+        api_version = options["api_version"]
+        start, end = options["start"], options["end"]
+        endpoints = options["endpoint"] or get_logged_endpoints(
+            api_version, start, end
+        )
+
+        rows = []
+        for endpoint in endpoints:
+            histogram = get_latency_histogram(
+                endpoint, start, end, api_version
+            )
+            percentiles = get_latency_percentiles(histogram, PERCENTILES)
+            if not percentiles:
+                continue
+            rows.append((endpoint, sum(histogram.values()), percentiles))
+
+        # Slowest endpoints first.
+        rows.sort(key=lambda row: row[2][PERCENTILES[-1]], reverse=True)
+        self.stdout.write(
+            f"{'endpoint':<40} {'count':>10} "
+            + " ".join(f"{f'p{p} (ms)':>10}" for p in PERCENTILES)
+        )
+        for endpoint, count, percentiles in rows:
+            self.stdout.write(
+                f"{endpoint:<40} {count:>10} "
+                + " ".join(f"{percentiles[p]:>10}" for p in PERCENTILES)
+            )
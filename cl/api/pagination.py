@@ -1,11 +1,12 @@
 import datetime
 from base64 import b64decode, b64encode
 from collections import defaultdict
+from dataclasses import dataclass
 from urllib.parse import parse_qs, urlencode
 
 from django.conf import settings
 from django.core.paginator import InvalidPage
-from django.db.models import QuerySet
+from django.db.models import F, Q, QuerySet
 from rest_framework.exceptions import NotFound
 from rest_framework.pagination import (
     BasePagination,
@@ -21,11 +22,181 @@ from cl.search.models import SEARCH_TYPES
 from cl.search.types import ESCursor
 
 
+@dataclass(frozen=True)
+class KeysetCursor:
+    ordering: str
+    value: str | None
+    pk: int
+
+
+class KeysetCursorPagination(BasePagination):
+    """Forward-only keyset pagination for orderings on non-unique fields.
+
+    Rows are ordered by the requested field and then by ID to break ties, and
+    each page starts right after the (value, ID) of the last row of the
+    previous page. Unlike CursorPagination, which uses the position of a
+    single field plus an offset, pages don't get slower when many rows share
+    the same value, and unlike PageNumberPagination there is no OFFSET, so
+    every page costs the same no matter how deep it is. NULL values are sorted
+    last in ascending order and first in descending order.
+    """
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        self.base_url = None
+        self.request = None
+        self.cursor = None
+        self.ordering = ""
+        self.next_position = None
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        ordering: str,
+        page_size: int,
+    ) -> list:
+        """Fetch the page of results that follows the cursor in the request.
+
+        :param queryset: The Django QuerySet to be paginated.
+        :param request: The DRF Request object.
+        :param ordering: The requested ordering, e.g. "-date_filed".
+        :param page_size: The number of results per page.
+        :return: A list with the results in the page.
+        """
+        self.base_url = request.build_absolute_uri()
+        self.request = request
+        self.ordering = ordering
+        self.cursor = self.decode_cursor(request)
+        if self.cursor and self.cursor.ordering != ordering:
+            # The cursor was generated for a different sorting key.
+            raise NotFound(self.invalid_cursor_message)
+
+        field_name = ordering.lstrip("-")
+        field = queryset.model._meta.get_field(field_name)
+        descending = ordering.startswith("-")
+        if descending:
+            order = (F(field_name).desc(nulls_first=True), "-pk")
+        else:
+            order = (F(field_name).asc(nulls_last=True), "pk")
+        queryset = queryset.order_by(*order)
+        if self.cursor:
+            queryset = queryset.filter(
+                self.get_position_filter(
+                    field_name, field.null, descending, self.cursor
+                )
+            )
+
+        # Fetch one more row than needed to know if there is a next page.
+        results = list(queryset[: page_size + 1])
+        self.next_position = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            last = results[-1]
+            value = getattr(last, field.attname)
+            if value is not None:
+                value = (
+                    value.isoformat()
+                    if hasattr(value, "isoformat")
+                    else str(value)
+                )
+            self.next_position = (value, last.pk)
+        return results
+
+    @staticmethod
+    def get_position_filter(
+        field_name: str,
+        nullable: bool,
+        descending: bool,
+        cursor: KeysetCursor,
+    ) -> Q:
+        """Build the filter that selects the rows after the cursor position.
+
+        :param field_name: The name of the ordering field.
+        :param nullable: Whether the ordering field can be NULL.
+        :param descending: Whether the ordering is descending.
+        :param cursor: The cursor with the position of the last row returned.
+        :return: A Q object with the filter.
+        """
+        value, pk = cursor.value, cursor.pk
+        if descending:
+            if value is None:
+                # NULLs come first, continue with the remaining NULLs and
+                # then with every non-NULL value.
+                return Q(**{f"{field_name}__isnull": True, "pk__lt": pk}) | Q(
+                    **{f"{field_name}__isnull": False}
+                )
+            return Q(**{f"{field_name}__lt": value}) | Q(
+                **{field_name: value, "pk__lt": pk}
+            )
+
+        if value is None:
+            # NULLs come last, only the remaining NULLs are left.
+            return Q(**{f"{field_name}__isnull": True, "pk__gt": pk})
+        position_filter = Q(**{f"{field_name}__gt": value}) | Q(
+            **{field_name: value, "pk__gt": pk}
+        )
+        if nullable:
+            position_filter |= Q(**{f"{field_name}__isnull": True})
+        return position_filter
+
+    def get_paginated_response(self, data, count: int | None = None):
+        response = {
+            "next": self.get_next_link(),
+            "previous": None,
+            "results": data,
+        }
+        if count is not None:
+            response = {"count": count, **response}
+        return Response(response)
+
+    def get_next_link(self) -> str | None:
+        if self.next_position is None:
+            return None
+        value, pk = self.next_position
+        cursor = KeysetCursor(ordering=self.ordering, value=value, pk=pk)
+        return self.encode_cursor(cursor)
+
+    def decode_cursor(self, request: Request) -> KeysetCursor | None:
+        """Given a request with a cursor, return a `KeysetCursor` instance."""
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse_qs(querystring, keep_blank_values=True)
+            ordering = tokens["o"][0]
+            value = tokens.get("v", [None])[0]
+            pk = int(tokens["p"][0])
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return KeysetCursor(ordering=ordering, value=value, pk=pk)
+
+    def encode_cursor(self, cursor: KeysetCursor) -> str:
+        """Given a KeysetCursor instance, return an url with encoded cursor."""
+        tokens = {"o": cursor.ordering, "p": cursor.pk}
+        if cursor.value is not None:
+            tokens["v"] = cursor.value
+        querystring = urlencode(tokens)
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+
 class VersionBasedPagination(PageNumberPagination):
     """The base paginator for handling V3 and V4 DB endpoints.
     This supports CursorPagination for V4 endpoints when sorting by "id" or
-    "date_created". It uses PageNumberPagination for V3 endpoints and for V4
-    endpoints when sorting by fields that don't support CursorPagination.
+    "date_created", and keyset pagination for V4 endpoints when sorting by
+    one of the indexed fields in the view's keyset_ordering_fields and
+    keyset=on is requested. It uses PageNumberPagination for V3 endpoints
+    and for V4 endpoints otherwise.
+
+    Cursor and keyset responses only include the total count of results when
+    requested using count=on, since counting large tables is expensive.
     """
 
     max_pagination_depth = 100
@@ -42,13 +213,18 @@ class VersionBasedPagination(PageNumberPagination):
         "date_completed": "date",
         "-date_completed": "date",
     }
+    count_query_param = "count"
+    keyset_query_param = "keyset"
     ordering = ""
     cursor_ordering_fields = []
+    keyset_ordering_fields = []
 
     def __init__(self):
         super().__init__()
         self.cursor_paginator = CursorPagination()
         self.cursor_paginator.page_size = self.page_size
+        self.keyset_paginator = KeysetCursorPagination()
+        self.count = None
 
     def do_v4_cursor_pagination(self):
         """Determine if v4 cursor pagination should be applied.
@@ -75,6 +251,46 @@ class VersionBasedPagination(PageNumberPagination):
             requested_ordering,
         )
 
+    def do_v4_keyset_pagination(self) -> tuple[bool, str]:
+        """Determine if v4 keyset pagination should be applied.
+
+        Keyset pagination is only used when requested using keyset=on while
+        sorting by one of the view's keyset_ordering_fields, since its
+        responses don't include the previous page or, by default, the count.
+        Other clients keep their shallow page-number pagination.
+
+        :return: A two tuple containing:
+        - A boolean indicating if keyset pagination should be applied.
+        - The requested ordering key if applicable.
+        """
+
+        requested_ordering = self.request.query_params.get(
+            "order_by", self.ordering
+        )
+        all_keyset_ordering_fields = self.generate_all_cursor_fields(
+            self.keyset_ordering_fields
+        )
+        return (
+            all(
+                [
+                    self.version == "v4",
+                    requested_ordering,
+                    requested_ordering in all_keyset_ordering_fields,
+                    self.keyset_requested(),
+                    self.page_query_param not in self.request.query_params,
+                ]
+            ),
+            requested_ordering,
+        )
+
+    def count_requested(self) -> bool:
+        """Check if the total count of results was requested."""
+        return self.request.query_params.get(self.count_query_param) == "on"
+
+    def keyset_requested(self) -> bool:
+        """Check if keyset pagination was requested."""
+        return self.request.query_params.get(self.keyset_query_param) == "on"
+
     def paginate_queryset(self, queryset, request, view=None):
         """
         Paginate a queryset if required, either returning a
@@ -85,6 +301,8 @@ class VersionBasedPagination(PageNumberPagination):
             self.ordering = view.ordering
         if hasattr(view, "cursor_ordering_fields"):
             self.cursor_ordering_fields = view.cursor_ordering_fields
+        if hasattr(view, "keyset_ordering_fields"):
+            self.keyset_ordering_fields = view.keyset_ordering_fields
 
         self.version = request.version
         self.request = request
@@ -92,11 +310,27 @@ class VersionBasedPagination(PageNumberPagination):
             self.do_v4_cursor_pagination()
         )
         if do_cursor_pagination:
+            if self.count_requested():
+                self.count = queryset.count()
             # Handle the queryset using CursorPagination
             return self.handle_database_cursor_pagination(
                 request, requested_ordering, queryset, view
             )
 
+        do_keyset_pagination, requested_ordering = (
+            self.do_v4_keyset_pagination()
+        )
+        if do_keyset_pagination:
+            if self.count_requested():
+                self.count = queryset.count()
+            # Handle the queryset using keyset pagination
+            return self.keyset_paginator.paginate_queryset(
+                queryset,
+                request,
+                requested_ordering,
+                self.get_page_size(request),
+            )
+
         # Handle the queryset using PageNumberPagination
         return self.handle_shallow_only_page_number_pagination(
             request, queryset
@@ -106,7 +340,17 @@ class VersionBasedPagination(PageNumberPagination):
         do_cursor_pagination, _ = self.do_v4_cursor_pagination()
         if do_cursor_pagination:
             # Get paginated response for CursorPagination
-            return self.cursor_paginator.get_paginated_response(data)
+            response = self.cursor_paginator.get_paginated_response(data)
+            if self.count is not None:
+                response.data = {"count": self.count, **response.data}
+            return response
+
+        do_keyset_pagination, _ = self.do_v4_keyset_pagination()
+        if do_keyset_pagination:
+            # Get paginated response for keyset pagination
+            return self.keyset_paginator.get_paginated_response(
+                data, self.count
+            )
 
         # Get paginated response for PageNumberPagination
         return super().get_paginated_response(data)
@@ -1,4 +1,6 @@
 import json
+import math
+from collections import Counter
 from datetime import date, timedelta
 from http import HTTPStatus
 from typing import Any, Dict
@@ -26,7 +28,14 @@ from cl.api.api_permissions import V3APIPermission
 from cl.api.factories import WebhookEventFactory, WebhookFactory
 from cl.api.models import WEBHOOK_EVENT_STATUS, WebhookEvent, WebhookEventType
 from cl.api.pagination import VersionBasedPagination
-from cl.api.utils import LoggingMixin, get_logging_prefix
+from cl.api.utils import (
+    LoggingMixin,
+    api_usage_buffer,
+    get_latency_bucket,
+    get_latency_histogram,
+    get_latency_percentiles,
+    get_logging_prefix,
+)
 from cl.api.views import coverage_data
 from cl.api.webhooks import send_webhook_event
 from cl.audio.api_views import AudioViewSet
@@ -388,6 +397,45 @@ class ApiEventCreationTestCase(TestCase):
         )
         self.assertEqual(event_descriptions, expected_descriptions)
 
+    @override_settings(
+        API_USAGE_BUFFER_ENABLED=True, API_USAGE_BUFFER_FLUSH_INTERVAL=60000
+    )
+    @mock.patch(
+        "cl.api.utils.get_logging_prefix",
+        return_value="api:Test",
+    )
+    @mock.patch.object(LoggingMixin, "milestones", new=[1, 2])
+    async def test_api_usage_buffered_and_flushed(
+        self, mock_logging_prefix
+    ) -> None:
+        """Are buffered API requests written to Redis and their events
+        created only when the buffer is flushed?
+        """
+        await self.hit_the_api("v3")
+        await self.hit_the_api("v3")
+        self.assertIsNone(self.r.get("api:Test.count"))
+        self.assertEqual(await Event.objects.acount(), 0)
+
+        await sync_to_async(api_usage_buffer.flush)()
+        self.assertEqual(int(self.r.get("api:Test.count")), 2)
+        self.assertEqual(
+            self.r.zscore("api:Test.user.counts", self.user.pk), 2.0
+        )
+        self.assertEqual(
+            self.r.zscore("api:Test.endpoint.counts", self.endpoint_name), 2
+        )
+        event_descriptions = {
+            event.description async for event in Event.objects.all()
+        }
+        self.assertEqual(
+            event_descriptions,
+            {
+                "API v3 has logged 1 total requests.",
+                f"User '{self.user.username}' has placed their 1st API v3 request.",
+                f"User '{self.user.username}' has placed their 2nd API v3 request.",
+            },
+        )
+
     # Set the api prefix so that other tests
     # run in parallel do not affect this one.
     @mock.patch(
@@ -421,6 +469,34 @@ class ApiEventCreationTestCase(TestCase):
             int(self.r.get("api:v3-Test.timing")), 10, delta=2000
         )
 
+        # Latency histogram
+        histogram = get_latency_histogram(
+            self.endpoint_name, date.today(), date.today(), "v3"
+        )
+        self.assertEqual(sum(histogram.values()), 1)
+
+    def test_get_latency_percentiles(self) -> None:
+        """Are percentiles estimated as the upper bound of their bucket?"""
+        histogram = Counter(
+            {
+                get_latency_bucket(10): 90,
+                get_latency_bucket(300): 8,
+                get_latency_bucket(10**6): 2,
+            }
+        )
+        self.assertEqual(
+            get_latency_percentiles(histogram),
+            {50: 10, 95: 300, 99: math.inf},
+        )
+        self.assertEqual(get_latency_percentiles(Counter()), {})
+
+    def test_get_latency_bucket(self) -> None:
+        """Does every response time up to a bound fall in its own bucket?"""
+        self.assertEqual(get_latency_bucket(1), 0)
+        self.assertEqual(get_latency_bucket(2), 1)
+        self.assertEqual(get_latency_bucket(15), 6)
+        self.assertEqual(get_latency_bucket(16), 7)
+
     @mock.patch(
         "cl.api.utils.get_logging_prefix",
         side_effect=lambda *args, **kwargs: f"{get_logging_prefix(*args, **kwargs)}-Test",
@@ -1685,6 +1761,93 @@ class V4DRFPaginationTest(TestCase):
         ids = [result["id"] for result in results]
         await self._compare_page_results(ids, "-id", 0, 5)
 
+    async def test_keyset_pagination_non_unique_sorting(self) -> None:
+        """Confirm keyset pagination is used when sorting by an indexed field
+        with repeated and NULL values, and that it returns every result once
+        in the expected order.
+        """
+
+        for i in range(7):
+            await sync_to_async(DocketFactory)(
+                court=self.court,
+                source=Docket.HARVARD,
+                pacer_case_id=f"1236{i + 1}",
+                date_blocked=date(2015, 8, i % 3 + 1),
+            )
+
+        for order_by in ["date_blocked", "-date_blocked"]:
+            params = {"order_by": order_by, "keyset": "on", "count": "on"}
+            with mock.patch.object(
+                DocketViewSet, "pagination_class", ExamplePagination
+            ):
+                response = await self.async_client.get(
+                    reverse("docket-list", kwargs={"version": "v4"}), params
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["count"], 17)
+            self.assertIsNone(response.json()["previous"])
+
+            ids = [result["id"] for result in response.json()["results"]]
+            next_page_url = response.json()["next"]
+            while next_page_url:
+                self.assertNotIn("page=", next_page_url)
+                with mock.patch.object(
+                    DocketViewSet, "pagination_class", ExamplePagination
+                ):
+                    response = await self.async_client.get(next_page_url)
+                self.assertEqual(response.status_code, 200)
+                ids.extend(
+                    result["id"] for result in response.json()["results"]
+                )
+                next_page_url = response.json()["next"]
+
+            # NULLs are sorted last in ascending order and first in
+            # descending order, ties are broken by ID.
+            descending = order_by.startswith("-")
+            dockets = [d async for d in Docket.objects.all()]
+            dockets.sort(
+                key=lambda d: (
+                    d.date_blocked is None,
+                    d.date_blocked or date.min,
+                    d.pk,
+                ),
+                reverse=descending,
+            )
+            self.assertEqual(ids, [d.pk for d in dockets], msg=order_by)
+
+        # The total count is only included when requested.
+        with mock.patch.object(
+            DocketViewSet, "pagination_class", ExamplePagination
+        ):
+            response = await self.async_client.get(
+                reverse("docket-list", kwargs={"version": "v4"}),
+                {"order_by": "date_blocked", "keyset": "on"},
+            )
+        self.assertNotIn("count", response.json())
+
+        # A cursor can't be reused with a different sorting key.
+        next_page_url = response.json()["next"].replace(
+            "order_by=date_blocked", "order_by=-date_blocked"
+        )
+        with mock.patch.object(
+            DocketViewSet, "pagination_class", ExamplePagination
+        ):
+            response = await self.async_client.get(next_page_url)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["detail"], "Invalid cursor")
+
+        # Without keyset=on, the response keeps the page-based shape.
+        with mock.patch.object(
+            DocketViewSet, "pagination_class", ExamplePagination
+        ):
+            response = await self.async_client.get(
+                reverse("docket-list", kwargs={"version": "v4"}),
+                {"order_by": "date_blocked"},
+            )
+        self.assertEqual(response.json()["count"], 17)
+        self.assertIn("previous", response.json())
+        self.assertIn("page=2", response.json()["next"])
+
     async def test_next_page_invalid_cursor_request(self) -> None:
         """Confirm that an invalid cursor error message is raised if the
         sorting key is changed to an incompatible one from the current cursor.
@@ -165,6 +165,11 @@ router.register(
     citations_views.CitationLookupViewSet,
     basename="citation-lookup",
 )
+router.register(
+    r"citation-graph",
+    citations_views.CitationGraphViewSet,
+    basename="citation-graph",
+)
 
 API_TITLE = "CourtListener Legal Data API"
 
@@ -1,5 +1,10 @@
+import atexit
 import logging
-from collections import OrderedDict, defaultdict
+import math
+import os
+import threading
+from bisect import bisect_left
+from collections import Counter, OrderedDict, defaultdict
 from datetime import date, datetime, timedelta, timezone
 from typing import Dict, List, Set, TypedDict, Union
 
@@ -9,6 +14,7 @@ from dateutil.rrule import DAILY, rrule
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.humanize.templatetags.humanize import intcomma, ordinal
+from django.db import connections
 from django.db.models import F
 from django.urls import resolve
 from django.utils.decorators import method_decorator
@@ -17,7 +23,6 @@ from django.utils.timezone import now
 from django.views.decorators.cache import cache_page
 from django.views.decorators.vary import vary_on_headers
 from django_ratelimit.core import get_header
-from eyecite.tokenizers import HyperscanTokenizer
 from requests import Response
 from rest_framework import serializers
 from rest_framework.exceptions import Throttled
@@ -29,13 +34,13 @@ from rest_framework_filters import FilterSet, RelatedFilter
 from rest_framework_filters.backends import RestFrameworkFilterBackend
 
 from cl.api.models import WEBHOOK_EVENT_STATUS, Webhook, WebhookEvent
+from cl.citations.tokenizers import HYPERSCAN_TOKENIZER
 from cl.citations.utils import filter_out_non_case_law_and_non_valid_citations
 from cl.lib.redis_utils import get_redis_interface
 from cl.stats.models import Event
 from cl.stats.utils import MILESTONES_FLAT, get_milestone_range
 from cl.users.tasks import notify_failing_webhook
 
-HYPERSCAN_TOKENIZER = HyperscanTokenizer(cache_dir=".hyperscan")
 BOOLEAN_LOOKUPS = ["exact"]
 DATETIME_LOOKUPS = [
     "exact",
@@ -193,6 +198,225 @@ def get_logging_prefix(api_version: str) -> str:
     return f"api:{api_version}"
 
 
+# The upper bounds, in milliseconds, of the buckets of the API latency
+# histograms. They grow exponentially so every bucket has a similar relative
+# precision. Slower responses fall in an overflow bucket.
+LATENCY_BUCKETS_MS = (
+    # fmt: off
+    1, 2, 3, 5, 7,
+    10, 15, 20, 30, 50, 70,
+    100, 150, 200, 300, 500, 700,
+    1_000, 1_500, 2_000, 3_000, 5_000, 7_000,
+    10_000, 15_000, 20_000, 30_000, 50_000, 70_000,
+    # fmt: on
+)
+
+
+def get_latency_bucket(response_ms: int) -> int:
+    """Get the index of the latency histogram bucket of a response time.
+
+    :param response_ms: The response time in milliseconds.
+    :return: The bucket index, len(LATENCY_BUCKETS_MS) for the overflow bucket.
+    """
+    return bisect_left(LATENCY_BUCKETS_MS, response_ms)
+
+
+def make_latency_histogram_key(api_prefix: str, d: str, endpoint: str) -> str:
+    """The Redis hash that counts the responses of an endpoint on a day per
+    latency bucket. Hashes from many days or workers can be merged by adding
+    up their buckets.
+    """
+    return f"{api_prefix}.endpoint.d:{d}.latency:{endpoint}"
+
+
+class APIUsageBuffer:
+    """Tally API usage stats in memory and write them to Redis in a single
+    pipeline from a background thread.
+
+    Requests only update in-memory counters under a lock. The background
+    thread flushes them every API_USAGE_BUFFER_FLUSH_INTERVAL milliseconds,
+    or sooner once API_USAGE_BUFFER_MAX_REQUESTS requests are pending, and
+    creates the milestone events crossed by the new totals.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.flush_requested = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.pid: int | None = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.num_requests = 0
+        # Keys incremented with INCR, and their increments.
+        self.counts: Counter[str] = Counter()
+        # Sorted set keys incremented with ZINCRBY, their members and
+        # increments.
+        self.scores: defaultdict[str, Counter[str]] = defaultdict(Counter)
+        # Latency histogram keys, their buckets and increments.
+        self.latencies: defaultdict[str, Counter[int]] = defaultdict(Counter)
+        # Hash keys that map IP addresses to user pks.
+        self.ip_maps: defaultdict[str, dict[str, str]] = defaultdict(dict)
+        # The API version of the global count keys, to create milestones.
+        self.count_versions: dict[str, str] = {}
+        # The username, user ID, API version and milestones of the users
+        # counted in each user counts key.
+        self.user_milestones: dict[
+            tuple[str, str], tuple[str, int, str, list[int]]
+        ] = {}
+
+    def _ensure_thread(self) -> None:
+        """Start the flush thread, or restart it if the process forked."""
+        if self.thread is not None and self.pid == os.getpid():
+            return
+        self.pid = os.getpid()
+        self._reset()
+        self.thread = threading.Thread(
+            target=self._run, name="api-usage-buffer", daemon=True
+        )
+        self.thread.start()
+
+    def _run(self) -> None:
+        interval = settings.API_USAGE_BUFFER_FLUSH_INTERVAL / 1000
+        while True:
+            self.flush_requested.wait(interval)
+            self.flush_requested.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.exception("Unable to flush API usage stats: %s", e)
+
+    def add(
+        self,
+        api_prefix: str,
+        api_version: str,
+        user: User,
+        client_ip: str | None,
+        endpoint: str,
+        response_ms: int,
+        milestones: list[int],
+    ) -> None:
+        """Tally a logged API request.
+
+        :param api_prefix: The prefix of the Redis keys.
+        :param api_version: The API version requested.
+        :param user: The user that made the request.
+        :param client_ip: The IP address of the client.
+        :param endpoint: The name of the endpoint requested.
+        :param response_ms: The response time in milliseconds.
+        :param milestones: The user request counts that create an event.
+        :return: None
+        """
+        d = date.today().isoformat()
+        user_pk = str(user.pk or "AnonymousUser")
+        with self.lock:
+            self._ensure_thread()
+            self.num_requests += 1
+            # Global and daily tallies for all URLs.
+            self.counts[f"{api_prefix}.count"] += 1
+            self.counts[f"{api_prefix}.d:{d}.count"] += 1
+            self.counts[f"{api_prefix}.timing"] += response_ms
+            self.counts[f"{api_prefix}.d:{d}.timing"] += response_ms
+            self.count_versions[f"{api_prefix}.count"] = api_version
+
+            # User, endpoint and timing tallies.
+            self.scores[f"{api_prefix}.user.counts"][user_pk] += 1
+            self.scores[f"{api_prefix}.user.d:{d}.counts"][user_pk] += 1
+            self.scores[f"{api_prefix}.endpoint.counts"][endpoint] += 1
+            self.scores[f"{api_prefix}.endpoint.d:{d}.counts"][endpoint] += 1
+            self.scores[f"{api_prefix}.endpoint.d:{d}.timings"][
+                endpoint
+            ] += response_ms
+            self.latencies[
+                make_latency_histogram_key(api_prefix, d, endpoint)
+            ][get_latency_bucket(response_ms)] += 1
+            if user.is_authenticated:
+                self.user_milestones[
+                    (f"{api_prefix}.user.counts", user_pk)
+                ] = (user.username, user.pk, api_version, milestones)
+
+            if client_ip is not None:
+                self.ip_maps[f"{api_prefix}.d:{d}.ip_map"][client_ip] = user_pk
+
+            if self.num_requests >= settings.API_USAGE_BUFFER_MAX_REQUESTS:
+                self.flush_requested.set()
+
+    def flush(self) -> None:
+        """Write the pending tallies to Redis and create the events of the
+        milestones they reached.
+
+        :return: None
+        """
+        with self.lock:
+            if not self.num_requests:
+                return
+            counts, scores, ip_maps = self.counts, self.scores, self.ip_maps
+            latencies = self.latencies
+            count_versions = self.count_versions
+            user_milestones = self.user_milestones
+            self._reset()
+
+        r = get_redis_interface("STATS")
+        pipe = r.pipeline()
+        for key, amount in counts.items():
+            pipe.incr(key, amount)
+        for key, members in scores.items():
+            for member, amount in members.items():
+                pipe.zincrby(key, amount, member)
+        for key, ip_map in ip_maps.items():
+            pipe.hset(key, mapping=ip_map)
+            pipe.expire(key, 60 * 60 * 24 * 14)  # Two weeks
+        for key, buckets in latencies.items():
+            for bucket, amount in buckets.items():
+                pipe.hincrby(key, bucket, amount)
+        results = iter(pipe.execute())
+
+        events = []
+        for key, amount in counts.items():
+            total_count = next(results)
+            if key not in count_versions:
+                continue
+            for milestone in MILESTONES_FLAT:
+                if total_count - amount < milestone <= total_count:
+                    events.append(
+                        Event(
+                            description=f"API {count_versions[key]} has "
+                            f"logged {int(milestone)} total requests."
+                        )
+                    )
+        for key, members in scores.items():
+            for member, amount in members.items():
+                user_count = int(next(results))
+                if (key, member) not in user_milestones:
+                    continue
+                username, user_id, api_version, milestones = user_milestones[
+                    (key, member)
+                ]
+                for milestone in milestones:
+                    if user_count - amount < milestone <= user_count:
+                        events.append(
+                            Event(
+                                description="User '%s' has placed their %s "
+                                "API %s request."
+                                % (
+                                    username,
+                                    intcomma(ordinal(int(milestone))),
+                                    api_version,
+                                ),
+                                user_id=user_id,
+                            )
+                        )
+        if events:
+            Event.objects.bulk_create(events)
+            if threading.current_thread() is self.thread:
+                # Don't keep idle DB connections open from the flush thread.
+                connections.close_all()
+
+
+api_usage_buffer = APIUsageBuffer()
+atexit.register(api_usage_buffer.flush)
+
+
 class LoggingMixin:
     """Log requests to Redis
 
@@ -226,8 +450,11 @@ class LoggingMixin:
             # Don't log things like 401, 403, etc.,
             # noinspection PyBroadException
             try:
-                results = self._log_request(request)
-                self._handle_events(results, request.user, request.version)
+                if settings.API_USAGE_BUFFER_ENABLED:
+                    self._buffer_request(request)
+                else:
+                    results = self._log_request(request)
+                    self._handle_events(results, request.user, request.version)
             except Exception as e:
                 logger.exception(
                     "Unable to log API response timing info: %s", e
@@ -244,13 +471,36 @@ class LoggingMixin:
 
         return max(response_ms, 0)
 
+    @staticmethod
+    def _get_endpoint(request) -> str:
+        """Get the URL name of the requested endpoint, reusing the match
+        resolved while dispatching the request when available.
+        """
+        if request.resolver_match is not None:
+            return request.resolver_match.url_name
+        return resolve(request.path_info).url_name
+
+    def _buffer_request(self, request) -> None:
+        """Tally the request in the process' API usage buffer, to be written
+        to Redis and checked for milestones by its background thread.
+        """
+        api_usage_buffer.add(
+            get_logging_prefix(request.version),
+            request.version,
+            request.user,
+            get_header(request, "CloudFront-Viewer-Address").split(":")[0],
+            self._get_endpoint(request),
+            self._get_response_ms(),
+            self.milestones,
+        )
+
     def _log_request(self, request):
         d = date.today().isoformat()
         user = request.user
         client_ip = get_header(request, "CloudFront-Viewer-Address").split(
             ":"
         )[0]
-        endpoint = resolve(request.path_info).url_name
+        endpoint = self._get_endpoint(request)
         response_ms = self._get_response_ms()
 
         r = get_redis_interface("STATS")
@@ -288,6 +538,13 @@ class LoggingMixin:
         timing_key = f"{api_prefix}.endpoint.d:{d}.timings"
         pipe.zincrby(timing_key, response_ms, endpoint)
 
+        # Count the response in the endpoint's latency histogram for the day,
+        # to compute percentiles of the response time.
+        pipe.hincrby(
+            make_latency_histogram_key(api_prefix, d, endpoint),
+            get_latency_bucket(response_ms),
+        )
+
         results = pipe.execute()
         return results
 
@@ -704,6 +961,66 @@ def get_avg_ms_for_endpoint(endpoint: str, d: datetime) -> float:
     return results[0] / results[1]
 
 
+def get_latency_histogram(
+    endpoint: str,
+    start: Union[str, datetime],
+    end: Union[str, datetime],
+    api_version: str = "v3",
+) -> Counter[int]:
+    """Merge the daily latency histograms of an endpoint during a date range
+
+    :param endpoint: The endpoint to get the histogram for. Typically
+    something like 'docket-list' or 'docket-detail'
+    :param start: The beginning date (inclusive) you want the results for.
+    :param end: The end date (inclusive) you want the results for.
+    :param api_version: The API version to get the histogram for.
+    :return: A Counter mapping bucket indexes to their number of responses.
+    """
+    r = get_redis_interface("STATS")
+    pipe = r.pipeline()
+    api_prefix = get_logging_prefix(api_version)
+    for d in make_date_str_list(start, end):
+        pipe.hgetall(make_latency_histogram_key(api_prefix, d, endpoint))
+
+    histogram: Counter[int] = Counter()
+    for daily_histogram in pipe.execute():
+        for bucket, count in daily_histogram.items():
+            histogram[int(bucket)] += int(count)
+    return histogram
+
+
+def get_latency_percentiles(
+    histogram: Counter[int], percentiles: tuple[int, ...] = (50, 95, 99)
+) -> dict[int, float]:
+    """Estimate percentiles of the response time from a latency histogram
+
+    Each percentile is reported as the upper bound of the bucket it falls in,
+    or infinity if it falls in the overflow bucket.
+
+    :param histogram: A Counter mapping bucket indexes to their number of
+    responses, as returned by get_latency_histogram.
+    :param percentiles: The percentiles to estimate.
+    :return: A dict mapping each percentile to its estimated response time
+    in milliseconds. Empty if the histogram is empty.
+    """
+    total = sum(histogram.values())
+    if not total:
+        return {}
+
+    results = {}
+    cumulative = 0
+    pending = sorted(percentiles)
+    for bucket in sorted(histogram):
+        cumulative += histogram[bucket]
+        while pending and cumulative >= total * pending[0] / 100:
+            results[pending.pop(0)] = (
+                LATENCY_BUCKETS_MS[bucket]
+                if bucket < len(LATENCY_BUCKETS_MS)
+                else math.inf
+            )
+    return results
+
+
 def get_next_webhook_retry_date(retry_counter: int) -> datetime:
     """Returns the next retry datetime to schedule a webhook retry based on its
     current retry counter.
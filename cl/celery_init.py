@@ -2,7 +2,10 @@ import os
 import sys
 
 from celery import Celery
+from celery.signals import worker_init
+from django.conf import settings
 
+from cl.citations.tokenizers import preload_hyperscan_db
 from cl.lib.celery_utils import throttle_task
 
 # set the default Django settings module for the 'celery' program.
@@ -30,3 +33,12 @@ def debug_task(self) -> None:
 def fail_task(self) -> float:
     # Useful for things like sentry
     return 1 / 0
+
+
+@worker_init.connect
+def preload_hyperscan(**kwargs) -> None:
+    """Load the Hyperscan database in the main worker process, before the
+    pool processes are forked, so they share it.
+    """
+    if settings.HYPERSCAN_PRELOAD:
+        preload_hyperscan_db()
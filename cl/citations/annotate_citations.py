@@ -72,21 +72,45 @@ def create_cited_html(
     :param citation_resolutions: A map of lists of citations in the opinion
     :return The new HTML containing citations
     """
-    if opinion.source_is_html:  # If opinion was originally HTML...
+    return annotate_cited_text(
+        opinion.source_text,
+        opinion.cleaned_text,
+        opinion.source_is_html,
+        generate_annotations(citation_resolutions),
+    )
+
+
+def annotate_cited_text(
+    source_text: str,
+    cleaned_text: str,
+    source_is_html: bool,
+    annotations: List[List],
+) -> str:
+    """Insert citation annotations into the text of an opinion.
+
+    This only takes plain values, so it can run in another process.
+
+    :param source_text: The text the opinion was cleaned from.
+    :param cleaned_text: The cleaned text the citations were found in.
+    :param source_is_html: Whether the source text is HTML.
+    :param annotations: The annotations made by generate_annotations.
+    :return The new HTML containing citations
+    """
+    if source_is_html:  # If opinion was originally HTML...
         new_html = annotate_citations(
-            plain_text=opinion.cleaned_text,
-            annotations=generate_annotations(citation_resolutions),
-            source_text=opinion.source_text,
+            plain_text=cleaned_text,
+            annotations=annotations,
+            source_text=source_text,
             unbalanced_tags="skip",  # Don't risk overwriting existing tags
         )
     else:  # Else, present `source_text` wrapped in <pre> HTML tags...
         new_html = annotate_citations(
-            plain_text=opinion.cleaned_text,
+            plain_text=cleaned_text,
             annotations=[
                 [a[0], f"</pre>{a[1]}", f'{a[2]}<pre class="inline">']
-                for a in generate_annotations(citation_resolutions)
+                for a in annotations
             ],
-            source_text=f'<pre class="inline">{html.escape(opinion.source_text)}</pre>',
+            source_text=f'<pre class="inline">{html.escape(source_text)}</pre>',
         )
 
     # Return the newly-annotated text
@@ -1,6 +1,8 @@
+from django.conf import settings
 from rest_framework import serializers
 from rest_framework.serializers import ValidationError
 
+from cl.citations.graph import Direction
 from cl.search.api_serializers import OpinionClusterSerializer
 
 
@@ -68,3 +70,41 @@ class CitationAPIResponseSerializer(serializers.Serializer):
             many=True,
             context={"request": self.context["request"]},
         ).data
+
+
+class CitationGraphTraversalSerializer(serializers.Serializer):
+    opinion = serializers.IntegerField(min_value=1)
+    direction = serializers.ChoiceField(
+        choices=[d.value for d in Direction], default=Direction.CITED_BY
+    )
+    hops = serializers.IntegerField(min_value=1, default=1)
+    court = serializers.CharField(required=False)
+    filed_after = serializers.DateField(required=False)
+    filed_before = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+
+    def validate_hops(self, value):
+        if value > settings.CITATION_GRAPH_MAX_HOPS:
+            raise ValidationError(
+                f"Ensure this value is less than or equal to "
+                f"{settings.CITATION_GRAPH_MAX_HOPS}."
+            )
+        return value
+
+    def validate_court(self, value):
+        # Courts are separated by spaces, like in the search API.
+        return value.split()
+
+
+class CitationGraphPathSerializer(serializers.Serializer):
+    source = serializers.IntegerField(min_value=1)
+    target = serializers.IntegerField(min_value=1)
+    max_hops = serializers.IntegerField(min_value=1, default=4)
+
+    def validate_max_hops(self, value):
+        if value > settings.CITATION_GRAPH_MAX_HOPS:
+            raise ValidationError(
+                f"Ensure this value is less than or equal to "
+                f"{settings.CITATION_GRAPH_MAX_HOPS}."
+            )
+        return value
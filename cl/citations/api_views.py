@@ -6,6 +6,7 @@ from django.db.models import QuerySet
 from django.template.defaultfilters import slugify
 from django.utils.safestring import SafeString
 from eyecite.models import FullCaseCitation, ShortCaseCitation
+from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound
 from rest_framework.mixins import CreateModelMixin
 from rest_framework.permissions import IsAuthenticated
@@ -18,6 +19,14 @@ from cl.api.utils import CitationCountRateThrottle, LoggingMixin
 from cl.citations.api_serializers import (
     CitationAPIRequestSerializer,
     CitationAPIResponseSerializer,
+    CitationGraphPathSerializer,
+    CitationGraphTraversalSerializer,
+)
+from cl.citations.graph import (
+    CitationGraph,
+    get_citation_graph,
+    shortest_citation_path,
+    traverse_citations,
 )
 from cl.citations.types import CitationAPIResponse
 from cl.citations.utils import SLUGIFIED_EDITIONS, get_canonicals_from_reporter
@@ -260,3 +269,74 @@ class CitationLookupViewSet(LoggingMixin, CreateModelMixin, GenericViewSet):
             ),
             "clusters": clusters,
         }
+
+
+class CitationGraphViewSet(LoggingMixin, GenericViewSet):
+    """Answer multi-hop questions about the citations between opinions using
+    the memory-mapped citation graph, instead of chaining lookups of the
+    opinions-cited endpoint.
+    """
+
+    permission_classes = [V3APIPermission]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not settings.CITATION_GRAPH_ENABLED:
+            raise NotFound("The citation graph is not available.")
+
+    @staticmethod
+    def get_graph() -> CitationGraph:
+        graph = get_citation_graph()
+        if graph is None:
+            raise NotFound("The citation graph is not available.")
+        return graph
+
+    @action(detail=False, methods=["get"])
+    def traverse(self, request: Request, *args, **kwargs):
+        """Get the opinions within a number of hops citing, or cited by, an
+        opinion, closest first.
+        """
+        serializer = CitationGraphTraversalSerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        opinion_ids, hops = traverse_citations(
+            self.get_graph(),
+            data["opinion"],
+            data["direction"],
+            data["hops"],
+            court_ids=data.get("court"),
+            filed_after=data.get("filed_after"),
+            filed_before=data.get("filed_before"),
+        )
+        limit = data["limit"]
+        return Response(
+            {
+                "count": len(opinion_ids),
+                "results": [
+                    {"id": opinion_id, "hops": hop}
+                    for opinion_id, hop in zip(
+                        opinion_ids[:limit].tolist(), hops[:limit].tolist()
+                    )
+                ],
+            }
+        )
+
+    @action(detail=False, methods=["get"])
+    def path(self, request: Request, *args, **kwargs):
+        """Get the shortest chain of citations from the source opinion to the
+        target opinion.
+        """
+        serializer = CitationGraphPathSerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        path = shortest_citation_path(
+            self.get_graph(),
+            data["source"],
+            data["target"],
+            data["max_hops"],
+        )
+        if path is None:
+            raise NotFound("No citation path found within max_hops.")
+        return Response({"hops": len(path) - 1, "path": path})
@@ -0,0 +1,605 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from enum import StrEnum
+from itertools import batched
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Day number used for opinions whose cluster has no date filed.
+UNKNOWN_DATE = np.iinfo(np.int32).min
+EPOCH = date(1970, 1, 1)
+
+
+class Direction(StrEnum):
+    # Follow the opinions cited by an opinion, its authorities.
+    CITES = "cites"
+    # Follow the opinions citing an opinion.
+    CITED_BY = "cited-by"
+
+
+@dataclass
+class CitationGraph:
+    """The citations between opinions as a pair of CSR adjacency arrays.
+
+    Nodes are indexed by opinion ID. The opinions cited by opinion i are
+    cites_indices[cites_indptr[i]:cites_indptr[i + 1]], and the opinions
+    citing it are the same slice of the cited_by arrays.
+    """
+
+    cites_indptr: np.ndarray = field(
+        default_factory=lambda: np.zeros(1, dtype=np.int64)
+    )
+    cites_indices: np.ndarray = field(
+        default_factory=lambda: np.empty(0, dtype=np.int32)
+    )
+    cited_by_indptr: np.ndarray = field(
+        default_factory=lambda: np.zeros(1, dtype=np.int64)
+    )
+    cited_by_indices: np.ndarray = field(
+        default_factory=lambda: np.empty(0, dtype=np.int32)
+    )
+    # The date filed of the cluster of every opinion, as days since the
+    # epoch, or UNKNOWN_DATE.
+    dates: np.ndarray = field(
+        default_factory=lambda: np.empty(0, dtype=np.int32)
+    )
+    # The court of every opinion, as an index into court_ids, or -1.
+    courts: np.ndarray = field(
+        default_factory=lambda: np.empty(0, dtype=np.int16)
+    )
+    court_ids: list[str] = field(default_factory=list)
+    # The highest OpinionsCited ID and opinion ID loaded so far, to fetch only
+    # the newer rows when the graph is refreshed.
+    last_citation_id: int = 0
+    last_opinion_id: int = 0
+    # When the graph was last built from scratch, as a Unix timestamp.
+    built_at: float = 0.0
+
+    @property
+    def size(self) -> int:
+        return self.dates.size
+
+    def neighbors(self, node: int, direction: Direction) -> np.ndarray:
+        indptr, indices = self.adjacency(direction)
+        if node >= indptr.size - 1:
+            return indices[:0]
+        return indices[indptr[node] : indptr[node + 1]]
+
+    def adjacency(self, direction: Direction) -> tuple[np.ndarray, np.ndarray]:
+        if direction == Direction.CITES:
+            return self.cites_indptr, self.cites_indices
+        return self.cited_by_indptr, self.cited_by_indices
+
+
+# The arrays of a graph, each saved to its own .npy file so they can be
+# memory-mapped.
+ARRAY_FIELDS = (
+    "cites_indptr",
+    "cites_indices",
+    "cited_by_indptr",
+    "cited_by_indices",
+    "dates",
+    "courts",
+)
+# The file in the graph directory holding the name of the latest version.
+CURRENT_VERSION_FILE = "CURRENT"
+
+_citation_graph: CitationGraph | None = None
+_citation_graph_path: Path | None = None
+_citation_graph_checked_at = 0.0
+_citation_graph_lock = threading.Lock()
+
+
+def to_day_number(d: date | None) -> int:
+    return UNKNOWN_DATE if d is None else (d - EPOCH).days
+
+
+def make_csr(
+    sources: np.ndarray, targets: np.ndarray, size: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Build the CSR adjacency arrays of a set of edges.
+
+    :param sources: The node each edge starts from.
+    :param targets: The node each edge goes to.
+    :param size: The number of nodes in the graph.
+    :return: A two tuple, the indptr and indices arrays. The neighbors of
+    every node are sorted and deduplicated.
+    """
+    sources, targets = sort_edges(sources, targets)
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=size), out=indptr[1:])
+    return indptr, targets.astype(np.int32, copy=False)
+
+
+def sort_edges(
+    sources: np.ndarray, targets: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Sort edges by source and then by target, and drop repeated ones."""
+    if not sources.size:
+        return sources, targets
+    order = np.lexsort((targets, sources))
+    sources, targets = sources[order], targets[order]
+    keep = np.ones(sources.size, dtype=bool)
+    keep[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+    return sources[keep], targets[keep]
+
+
+def merge_edges(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    sources: np.ndarray,
+    targets: np.ndarray,
+    size: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Merge new edges into CSR adjacency arrays.
+
+    Only the new edges are sorted. Each of them is inserted in the sorted
+    neighbors of its source, so the existing edges are copied once instead
+    of being sorted again.
+
+    :param indptr: The indptr array of the graph.
+    :param indices: The indices array of the graph.
+    :param sources: The node each new edge starts from.
+    :param targets: The node each new edge goes to.
+    :param size: The number of nodes in the graph, at least indptr.size - 1.
+    :return: A two tuple, the new indptr and indices arrays. The given arrays
+    are left untouched.
+    """
+    old_size = indptr.size - 1
+    indptr = np.concatenate(
+        [indptr, np.full(size - old_size, indptr[-1], dtype=np.int64)]
+    )
+    sources, targets = sort_edges(sources, targets)
+    if not sources.size:
+        return indptr, indices
+
+    # Find where each new edge goes among the neighbors of its source, and
+    # skip the ones that are already there.
+    positions = np.empty(sources.size, dtype=np.int64)
+    is_new = np.ones(sources.size, dtype=bool)
+    boundaries = np.flatnonzero(np.diff(sources)) + 1
+    for start, end in zip(
+        np.r_[0, boundaries], np.r_[boundaries, sources.size]
+    ):
+        node = sources[start]
+        row = indices[indptr[node] : indptr[node + 1]]
+        found = np.searchsorted(row, targets[start:end])
+        positions[start:end] = indptr[node] + found
+        if row.size:
+            is_new[start:end] = (found == row.size) | (
+                row[np.minimum(found, row.size - 1)] != targets[start:end]
+            )
+    sources, targets = sources[is_new], targets[is_new]
+    if not sources.size:
+        return indptr, indices
+
+    indices = np.insert(
+        indices, positions[is_new], targets.astype(np.int32, copy=False)
+    )
+    added = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=size), out=added[1:])
+    return indptr + added, indices
+
+
+def fetch_opinion_attributes(
+    graph: CitationGraph, after_id: int = 0
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Get the date filed and court of the opinions with an ID above
+    after_id.
+
+    New courts are added to graph.court_ids.
+
+    :param graph: The graph the attributes will be added to.
+    :param after_id: Only opinions with a greater ID are fetched.
+    :return: A three tuple, the opinion IDs, their day numbers and their court
+    indexes.
+    """
+    from cl.search.models import Opinion
+
+    court_indexes = {court_id: i for i, court_id in enumerate(graph.court_ids)}
+    ids, days, courts = [], [], []
+    rows = (
+        Opinion.objects.filter(pk__gt=after_id)
+        .values_list("pk", "cluster__date_filed", "cluster__docket__court_id")
+        .iterator(chunk_size=settings.CITATION_GRAPH_CHUNK_SIZE)
+    )
+    for batch in batched(rows, settings.CITATION_GRAPH_CHUNK_SIZE):
+        batch_ids, batch_dates, batch_courts = zip(*batch)
+        for court_id in batch_courts:
+            if court_id not in court_indexes:
+                court_indexes[court_id] = len(graph.court_ids)
+                graph.court_ids.append(court_id)
+        ids.append(np.array(batch_ids, dtype=np.int32))
+        days.append(
+            np.array([to_day_number(d) for d in batch_dates], dtype=np.int32)
+        )
+        courts.append(
+            np.array([court_indexes[c] for c in batch_courts], dtype=np.int16)
+        )
+    if not ids:
+        return (
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.int16),
+        )
+    return np.concatenate(ids), np.concatenate(days), np.concatenate(courts)
+
+
+def fetch_new_citations(
+    after_id: int,
+) -> tuple[np.ndarray, np.ndarray, int]:
+    """Stream the citations with an OpinionsCited ID above after_id into
+    compact arrays.
+
+    :param after_id: Only citations with a greater ID are fetched.
+    :return: A three tuple, the citing and cited opinion IDs and the highest
+    OpinionsCited ID fetched, or after_id if there were none.
+    """
+    from cl.search.models import OpinionsCited
+
+    chunk_size = settings.CITATION_GRAPH_CHUNK_SIZE
+    citing: list[np.ndarray] = []
+    cited: list[np.ndarray] = []
+    last_id = after_id
+    rows = (
+        OpinionsCited.objects.filter(pk__gt=after_id)
+        .values_list("pk", "citing_opinion_id", "cited_opinion_id")
+        .iterator(chunk_size=chunk_size)
+    )
+    for batch in batched(rows, chunk_size):
+        pks, batch_citing, batch_cited = zip(*batch)
+        last_id = max(last_id, max(pks))
+        citing.append(np.array(batch_citing, dtype=np.int32))
+        cited.append(np.array(batch_cited, dtype=np.int32))
+
+    if not citing:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty, after_id
+    return np.concatenate(citing), np.concatenate(cited), last_id
+
+
+def update_citation_graph(graph: CitationGraph) -> CitationGraph:
+    """Add the opinions and citations created since the graph was last
+    loaded.
+
+    Only rows with a higher ID than the ones already loaded are fetched, so
+    edits and deletions are picked up by the next full rebuild instead.
+
+    :param graph: The graph to update.
+    :return: A new graph including the new rows. The given graph is left
+    untouched.
+    """
+    new = CitationGraph(
+        court_ids=list(graph.court_ids), built_at=graph.built_at
+    )
+    opinion_ids, days, courts = fetch_opinion_attributes(
+        new, graph.last_opinion_id
+    )
+    citing, cited, new.last_citation_id = fetch_new_citations(
+        graph.last_citation_id
+    )
+    new.last_opinion_id = int(opinion_ids.max(initial=graph.last_opinion_id))
+    size = max(
+        graph.size,
+        new.last_opinion_id + 1,
+        int(citing.max(initial=-1)) + 1,
+        int(cited.max(initial=-1)) + 1,
+    )
+
+    new.dates = np.full(size, UNKNOWN_DATE, dtype=np.int32)
+    new.dates[: graph.size] = graph.dates
+    new.dates[opinion_ids] = days
+    new.courts = np.full(size, -1, dtype=np.int16)
+    new.courts[: graph.size] = graph.courts
+    new.courts[opinion_ids] = courts
+
+    new.cites_indptr, new.cites_indices = merge_edges(
+        graph.cites_indptr, graph.cites_indices, citing, cited, size
+    )
+    new.cited_by_indptr, new.cited_by_indices = merge_edges(
+        graph.cited_by_indptr, graph.cited_by_indices, cited, citing, size
+    )
+    return new
+
+
+def build_citation_graph() -> CitationGraph:
+    """Build the citation graph from scratch."""
+    graph = CitationGraph(built_at=time.time())
+    opinion_ids, days, courts = fetch_opinion_attributes(graph)
+    citing, cited, graph.last_citation_id = fetch_new_citations(0)
+    graph.last_opinion_id = int(opinion_ids.max(initial=0))
+    size = max(
+        graph.last_opinion_id + 1,
+        int(citing.max(initial=-1)) + 1,
+        int(cited.max(initial=-1)) + 1,
+    )
+    graph.dates = np.full(size, UNKNOWN_DATE, dtype=np.int32)
+    graph.dates[opinion_ids] = days
+    graph.courts = np.full(size, -1, dtype=np.int16)
+    graph.courts[opinion_ids] = courts
+    graph.cites_indptr, graph.cites_indices = make_csr(citing, cited, size)
+    graph.cited_by_indptr, graph.cited_by_indices = make_csr(
+        cited, citing, size
+    )
+    return graph
+
+
+def save_citation_graph(
+    graph: CitationGraph, directory: Path | None = None
+) -> Path:
+    """Save a citation graph as a new version in the graph directory, for
+    the web workers to load.
+
+    The arrays are written first and the version is only made current once
+    they're complete. Older versions are removed, except the previous one;
+    workers that still have them memory-mapped keep reading them until they
+    load the new version.
+
+    :param graph: The graph to save.
+    :param directory: Optional, the graph directory. Defaults to
+    CITATION_GRAPH_DIR.
+    :return: The path of the saved version.
+    """
+    directory = Path(directory or settings.CITATION_GRAPH_DIR)
+    previous = get_current_graph_path(directory)
+    path = directory / str(time.time_ns())
+    path.mkdir(parents=True)
+    for name in ARRAY_FIELDS:
+        np.save(path / f"{name}.npy", getattr(graph, name))
+    (path / "meta.json").write_text(
+        json.dumps(
+            {
+                "court_ids": graph.court_ids,
+                "last_citation_id": graph.last_citation_id,
+                "last_opinion_id": graph.last_opinion_id,
+                "built_at": graph.built_at,
+            }
+        )
+    )
+    current_file = directory / CURRENT_VERSION_FILE
+    tmp_file = current_file.with_suffix(".tmp")
+    tmp_file.write_text(path.name)
+    os.replace(tmp_file, current_file)
+
+    for version in directory.iterdir():
+        if version.is_dir() and version not in (path, previous):
+            shutil.rmtree(version, ignore_errors=True)
+    return path
+
+
+def get_current_graph_path(directory: Path) -> Path | None:
+    """Get the path of the latest saved version of the citation graph, or
+    None if it hasn't been saved yet.
+    """
+    try:
+        version = (directory / CURRENT_VERSION_FILE).read_text().strip()
+    except FileNotFoundError:
+        return None
+    return directory / version
+
+
+def read_citation_graph(path: Path) -> CitationGraph:
+    """Load a saved citation graph, memory-mapping its arrays.
+
+    The arrays are read-only and shared through the page cache by every
+    process that maps them, so loading is quick and doesn't copy them.
+
+    :param path: The path of the saved version.
+    :return: The citation graph.
+    """
+    meta = json.loads((path / "meta.json").read_text())
+    return CitationGraph(
+        **{
+            name: np.load(path / f"{name}.npy", mmap_mode="r")
+            for name in ARRAY_FIELDS
+        },
+        **meta,
+    )
+
+
+def load_saved_citation_graph(
+    directory: Path | None = None,
+) -> CitationGraph | None:
+    """Load the latest saved version of the citation graph, or None if it
+    hasn't been saved yet.
+    """
+    directory = Path(directory or settings.CITATION_GRAPH_DIR)
+    path = get_current_graph_path(directory)
+    return read_citation_graph(path) if path else None
+
+
+def get_citation_graph() -> CitationGraph | None:
+    """Get the citation graph of this process.
+
+    The graph is built and refreshed outside the request path by the
+    cl_update_citation_graph command. This only checks for a newer saved
+    version once CITATION_GRAPH_REFRESH_INTERVAL has passed since the last
+    check, and memory-maps it if there is one.
+
+    :return: The citation graph, or None if it hasn't been saved yet.
+    """
+    global _citation_graph, _citation_graph_path, _citation_graph_checked_at
+    now = time.monotonic()
+    if (
+        _citation_graph is not None
+        and now - _citation_graph_checked_at
+        < settings.CITATION_GRAPH_REFRESH_INTERVAL
+    ):
+        return _citation_graph
+
+    with _citation_graph_lock:
+        path = get_current_graph_path(Path(settings.CITATION_GRAPH_DIR))
+        if path is None:
+            logger.warning("The citation graph hasn't been built yet.")
+        elif path != _citation_graph_path:
+            _citation_graph = read_citation_graph(path)
+            _citation_graph_path = path
+        _citation_graph_checked_at = now
+    return _citation_graph
+
+
+def expand_frontier(
+    graph: CitationGraph, frontier: np.ndarray, direction: Direction
+) -> np.ndarray:
+    """Get the neighbors of all the nodes in a frontier at once.
+
+    :param graph: The citation graph.
+    :param frontier: The IDs of the nodes to expand.
+    :param direction: Which citations to follow.
+    :return: The unique IDs of the neighbors.
+    """
+    indptr, indices = graph.adjacency(direction)
+    frontier = frontier[frontier < indptr.size - 1]
+    starts, ends = indptr[frontier], indptr[frontier + 1]
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if not total:
+        return indices[:0]
+    # Compute the position in indices of every neighbor without a Python
+    # loop: each node contributes the range starts[i]:ends[i].
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return np.unique(indices[offsets + np.arange(total)])
+
+
+def traverse_citations(
+    graph: CitationGraph,
+    opinion_id: int,
+    direction: Direction,
+    max_hops: int,
+    court_ids: list[str] | None = None,
+    filed_after: date | None = None,
+    filed_before: date | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Find the opinions within max_hops citations of an opinion.
+
+    The search goes through every opinion, the filters only apply to the
+    results, so an opinion is found even if the path to it goes through
+    other courts or dates.
+
+    :param graph: The citation graph.
+    :param opinion_id: The ID of the opinion to start from.
+    :param direction: Which citations to follow.
+    :param max_hops: The maximum number of citations between the opinions.
+    :param court_ids: Optional, only return opinions from these courts.
+    :param filed_after: Optional, only return opinions filed on or after this
+    date.
+    :param filed_before: Optional, only return opinions filed on or before
+    this date.
+    :return: A two tuple, the IDs of the opinions found, sorted by the number
+    of hops and then by ID, and the number of hops to each of them.
+    """
+    if opinion_id >= graph.size:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty
+    hops = np.full(graph.size, -1, dtype=np.int8)
+    hops[opinion_id] = 0
+    frontier = np.array([opinion_id], dtype=np.int32)
+    for hop in range(1, max_hops + 1):
+        neighbors = expand_frontier(graph, frontier, direction)
+        frontier = neighbors[hops[neighbors] == -1]
+        if not frontier.size:
+            break
+        hops[frontier] = hop
+
+    mask = hops > 0
+    if court_ids is not None:
+        court_indexes = [
+            i
+            for i, court_id in enumerate(graph.court_ids)
+            if court_id in court_ids
+        ]
+        mask &= np.isin(graph.courts, court_indexes)
+    if filed_after is not None:
+        mask &= graph.dates >= to_day_number(filed_after)
+    if filed_before is not None:
+        mask &= (graph.dates <= to_day_number(filed_before)) & (
+            graph.dates != UNKNOWN_DATE
+        )
+    found = np.flatnonzero(mask)
+    found_hops = hops[found]
+    order = np.argsort(found_hops, kind="stable")
+    return found[order], found_hops[order]
+
+
+def shortest_citation_path(
+    graph: CitationGraph, source_id: int, target_id: int, max_hops: int
+) -> list[int] | None:
+    """Find the shortest chain of citations from one opinion to another.
+
+    It's a bidirectional breadth-first search: one side follows the opinions
+    cited by the source and the other the opinions citing the target, and
+    the smaller frontier is expanded each time until they meet.
+
+    :param graph: The citation graph.
+    :param source_id: The ID of the citing opinion the path starts from.
+    :param target_id: The ID of the cited opinion the path ends at.
+    :param max_hops: The maximum number of citations in the path.
+    :return: The opinion IDs on the path, from the source to the target, or
+    None if there isn't a path within max_hops.
+    """
+    if source_id >= graph.size or target_id >= graph.size:
+        return None
+    if source_id == target_id:
+        return [source_id]
+
+    # The node each node was reached from and how many hops away from the
+    # source or the target it is, on each side.
+    forward: dict[int, tuple[int | None, int]] = {source_id: (None, 0)}
+    backward: dict[int, tuple[int | None, int]] = {target_id: (None, 0)}
+    forward_frontier, backward_frontier = [source_id], [target_id]
+    for _ in range(max_hops):
+        expand_forward = len(forward_frontier) <= len(backward_frontier)
+        if expand_forward:
+            frontier, visited, others = forward_frontier, forward, backward
+            direction = Direction.CITES
+        else:
+            frontier, visited, others = backward_frontier, backward, forward
+            direction = Direction.CITED_BY
+
+        # The whole level is expanded before picking where the two sides
+        # meet, since the first meeting found isn't always the shortest.
+        next_frontier = []
+        meeting_nodes = []
+        for node in frontier:
+            hops = visited[node][1] + 1
+            for neighbor in graph.neighbors(node, direction).tolist():
+                if neighbor in visited:
+                    continue
+                visited[neighbor] = (node, hops)
+                next_frontier.append(neighbor)
+                if neighbor in others:
+                    meeting_nodes.append(neighbor)
+
+        if meeting_nodes:
+            meeting_node = min(
+                meeting_nodes, key=lambda n: forward[n][1] + backward[n][1]
+            )
+            path = []
+            node = meeting_node
+            while node is not None:
+                path.append(node)
+                node = forward[node][0]
+            path.reverse()
+            node = backward[meeting_node][0]
+            while node is not None:
+                path.append(node)
+                node = backward[node][0]
+            return path
+
+        if not next_frontier:
+            return None
+        if expand_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+    return None
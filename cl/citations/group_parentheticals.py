@@ -30,32 +30,40 @@ https://github.com/freelawproject/courtlistener/pull/1941
 """
 
 import re
-from copy import deepcopy
+from collections.abc import Iterator, Mapping
 from dataclasses import dataclass
 from math import ceil
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 
+import numpy as np
 from datasketch import MinHash, MinHashLSH
+from datasketch.hashfunc import sha1_hash32
 from Stemmer import Stemmer
 
 from cl.lib.stop_words import STOP_WORDS
 from cl.search.models import Parenthetical
 
-Graph = Dict[str, List[str]]
+Graph = Mapping[str, List[str]]
 
 GERUND_WORD = re.compile(r"(?:\S+ing)", re.IGNORECASE)
 
 SIMILARITY_THRESHOLD = 0.5
+NUM_PERMUTATIONS = 64
 
 # Initializing the LSH/Minhashes is very slow because it has to generate
-# a ton of random numbers. But we can avoid repeating that work
-# every time we compute groups by simply using python's deepcopy
-# method to clone this reference object. It really seems too stupid
-# to work, but it does, perfectly, and gives us a huge speed-up.
+# a ton of random numbers. We do it once and reuse the permutations of the
+# MinHash and the band layout of the LSH index to compute the signatures and
+# buckets of many parentheticals at once with NumPy.
 _EMPTY_SIMILARITY_INDEX = MinHashLSH(
-    threshold=SIMILARITY_THRESHOLD, num_perm=64
+    threshold=SIMILARITY_THRESHOLD, num_perm=NUM_PERMUTATIONS
 )
-_EMPTY_MHASH = MinHash(num_perm=64)
+_EMPTY_MHASH = MinHash(num_perm=NUM_PERMUTATIONS)
+# The same constants datasketch uses to permute the hashes.
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# The number of parentheticals whose tokens are permuted at once, to bound
+# the memory used by the permuted hashes matrix.
+SIGNATURES_CHUNK_SIZE = 1000
 
 # We initialize the stemmer once and reuse it because it internally caches
 # frequently seen tokens, giving us a performance benefit if we reuse it.
@@ -73,6 +81,7 @@ class ComputedParentheticalGroup:
 
 def compute_parenthetical_groups(
     parentheticals: List[Parenthetical],
+    signatures: Optional[np.ndarray] = None,
 ) -> List[ComputedParentheticalGroup]:
     """
     Given a list of parentheticals for a case, cluster them based on textual
@@ -87,68 +96,168 @@ def compute_parenthetical_groups(
     From there, we put those in a list and return the list of groups.
 
     :param parentheticals: A list of parentheticals to organize into groups
+    :param signatures: Optional, the MinHash signatures of the parentheticals
+    as returned by compute_minhash_signatures, if they are already known.
     :return: A list of ComputedParentheticalGroup's containing the given parentheticals
     """
     if len(parentheticals) == 0:
         return []
 
-    similarity_index = deepcopy(_EMPTY_SIMILARITY_INDEX)
-    parenthetical_objects: Dict[str, Parenthetical] = {}
-    parenthetical_minhashes: Dict[str, MinHash] = {}
-
-    for par in parentheticals:
-        mhash = deepcopy(_EMPTY_MHASH)
-        tokens = get_parenthetical_tokens(par.text)
-        mhash.update_batch([gram.encode("utf-8") for gram in tokens])
-
-        par_key = str(par.id)
-        parenthetical_objects[par_key] = par
-        parenthetical_minhashes[par_key] = mhash
-        similarity_index.insert(par_key, mhash)
-
-    similarity_graph = get_similarity_graph(
-        parenthetical_minhashes, similarity_index
+    if signatures is None:
+        signatures = compute_minhash_signatures(
+            [par.text for par in parentheticals]
+        )
+    parenthetical_objects: Dict[str, Parenthetical] = {
+        str(par.id): par for par in parentheticals
+    }
+    similarity_graph = SimilarityGraph(
+        [str(par.id) for par in parentheticals], signatures
     )
 
-    parenthetical_groups: List[ComputedParentheticalGroup] = []
-    visited_nodes: Set[str] = set()
-    for node, neighbors in similarity_graph.items():
-        if component := get_graph_component(
-            node, similarity_graph, visited_nodes
-        ):
-            parenthetical_groups.append(
-                get_group_from_component(
-                    component,
-                    parenthetical_objects,
-                    similarity_graph,
-                )
-            )
+    parenthetical_groups: List[ComputedParentheticalGroup] = [
+        get_group_from_component(
+            component,
+            parenthetical_objects,
+            similarity_graph,
+        )
+        for component in similarity_graph.get_components()
+    ]
     return sorted(
         parenthetical_groups, key=lambda group: group.score, reverse=True
     )
 
 
-def get_similarity_graph(
-    parenthetical_minhashes: Dict[str, MinHash], similarity_index: MinHashLSH
-) -> Graph:
+def compute_minhash_signatures(texts: List[str]) -> np.ndarray:
+    """
+    Compute the MinHash signatures of the tokens of many parenthetical texts
+    at once. The signatures are identical to the hash values of a datasketch
+    MinHash updated with the same tokens.
+
+    :param texts: A list of parenthetical texts
+    :return: A matrix with one row of NUM_PERMUTATIONS hash values per text
     """
-    From the MinHashLSH index, create a dictionary representation of a graph
-    where the nodes represent parentheticals and the edges represent that
-    two nodes are sufficiently similar to each other to be clustered into
+    signatures = np.full(
+        (len(texts), NUM_PERMUTATIONS), _MAX_HASH, dtype=np.uint64
+    )
+    a, b = _EMPTY_MHASH.permutations
+    for chunk_start in range(0, len(texts), SIGNATURES_CHUNK_SIZE):
+        token_lists = [
+            get_parenthetical_tokens(text)
+            for text in texts[
+                chunk_start : chunk_start + SIGNATURES_CHUNK_SIZE
+            ]
+        ]
+        lengths = np.array([len(tokens) for tokens in token_lists])
+        if not lengths.any():
+            continue
+        hashes = np.array(
+            [
+                sha1_hash32(token.encode("utf-8"))
+                for tokens in token_lists
+                for token in tokens
+            ],
+            dtype=np.uint64,
+        )
+        permuted = (hashes[:, np.newaxis] * a + b) % _MERSENNE_PRIME
+        permuted &= _MAX_HASH
+        # Texts without tokens keep the max hash values, like an empty
+        # MinHash. Take the minimum of each other text's rows.
+        non_empty = lengths > 0
+        offsets = (np.cumsum(lengths) - lengths)[non_empty]
+        rows = np.flatnonzero(non_empty) + chunk_start
+        signatures[rows] = np.minimum.reduceat(permuted, offsets, axis=0)
+    return signatures
+
+
+class SimilarityGraph(Mapping):
+    """
+    A graph where the nodes represent parentheticals and the edges represent
+    that two nodes are sufficiently similar to each other to be clustered into
     the same group.
 
-    :param parenthetical_minhashes: A dictionary mapping parenthetical IDs to
-    the MinHash object corresponding to the parenthetical's text's tokens
-    :param similarity_index: The MinHashLSH data structure containing all of
-    the MinHash's that we can query
-    :return: A dictionary representation of a graph/network where the nodes/keys
-    are parenthetical IDs and the neighbors/values are the other parentheticals
-    above the defined similarity threshold.
+    Two parentheticals are similar if their MinHash signatures are equal in
+    any of the bands of the LSH index, just like a MinHashLSH query would
+    find them. Buckets are computed for all the parentheticals at once, and
+    neighbors are only listed when they are requested, so heavily cited cases
+    don't need to materialize every edge.
+
+    It maps parenthetical IDs to their neighbors, including themselves.
     """
-    similarity_graph: Graph = {}
-    for par_key, mhash in parenthetical_minhashes.items():
-        similarity_graph[par_key] = similarity_index.query(mhash)
-    return similarity_graph
+
+    def __init__(self, keys: List[str], signatures: np.ndarray) -> None:
+        self.keys = keys
+        self.key_indexes = {key: i for i, key in enumerate(keys)}
+        # The bucket of every parenthetical in each band, numbered across
+        # all bands.
+        self.bucket_labels = np.empty(
+            (len(keys), _EMPTY_SIMILARITY_INDEX.b), dtype=np.int64
+        )
+        num_buckets = 0
+        for band, (start, end) in enumerate(
+            _EMPTY_SIMILARITY_INDEX.hashranges
+        ):
+            _, labels = np.unique(
+                signatures[:, start:end], axis=0, return_inverse=True
+            )
+            labels = labels.reshape(-1)
+            self.bucket_labels[:, band] = labels + num_buckets
+            num_buckets += int(labels.max()) + 1
+        order = np.argsort(self.bucket_labels, axis=None, kind="stable")
+        bucket_sizes = np.bincount(
+            self.bucket_labels.reshape(-1), minlength=num_buckets
+        )
+        # The parentheticals of each bucket, in their original order.
+        self.buckets: List[np.ndarray] = np.split(
+            order // _EMPTY_SIMILARITY_INDEX.b, np.cumsum(bucket_sizes)[:-1]
+        )
+
+    def __getitem__(self, key: str) -> List[str]:
+        buckets = self.bucket_labels[self.key_indexes[key]]
+        neighbors = np.unique(
+            np.concatenate([self.buckets[label] for label in buckets])
+        )
+        return [self.keys[i] for i in neighbors]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get_components(self) -> List[List[str]]:
+        """
+        Find the connected components of the graph with an iterative
+        union-find over the buckets.
+
+        :return: A list of components, each one a list of parenthetical IDs,
+        ordered by their first parenthetical.
+        """
+        parents = list(range(len(self.keys)))
+
+        def find(node: int) -> int:
+            root = node
+            while parents[root] != root:
+                root = parents[root]
+            while parents[node] != root:
+                parents[node], node = root, parents[node]
+            return root
+
+        for bucket in self.buckets:
+            if len(bucket) < 2:
+                continue
+            bucket_root = find(int(bucket[0]))
+            for node in bucket[1:].tolist():
+                root = find(node)
+                if root != bucket_root:
+                    # Keep the earliest parenthetical as the root.
+                    if root < bucket_root:
+                        root, bucket_root = bucket_root, root
+                    parents[root] = bucket_root
+
+        components: Dict[int, List[str]] = {}
+        for node, key in enumerate(self.keys):
+            components.setdefault(find(node), []).append(key)
+        return list(components.values())
 
 
 def get_graph_component(
@@ -166,14 +275,16 @@ def get_graph_component(
     :return: A list of all nodes in param :node's component
     """
     current_cluster = []
-    # Perform a depth-first search to find all nodes in the component
-    if node not in visited:
-        visited.add(node)
-        current_cluster.append(node)
-        for neighbor in graph[node]:
-            current_cluster.extend(
-                get_graph_component(neighbor, graph, visited)
-            )
+    # Perform an iterative depth-first search to find all nodes in the
+    # component, so large components don't hit the recursion limit.
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current in visited:
+            continue
+        visited.add(current)
+        current_cluster.append(current)
+        stack.extend(reversed(graph[current]))
     return current_cluster
 
 
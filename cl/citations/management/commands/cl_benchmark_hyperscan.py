@@ -0,0 +1,100 @@
+import multiprocessing
+import time
+from statistics import mean
+
+from eyecite import get_citations
+from eyecite.tokenizers import HyperscanTokenizer
+
+from cl.citations.tokenizers import (
+    HYPERSCAN_CACHE_DIR,
+    HYPERSCAN_TOKENIZER,
+    preload_hyperscan_db,
+)
+from cl.lib.command_utils import VerboseCommand
+
+SAMPLE_TEXT = "See Roe v. Wade, 410 U.S. 113, 116 (1973); 22 F.3d 44."
+
+
+def get_private_memory() -> int:
+    """Get the memory that the current process doesn't share with any other,
+    i.e. the memory that another forked worker costs.
+
+    :return: The private memory of the process in bytes.
+    """
+    private = 0
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                private += int(line.split()[1]) * 1024
+    return private
+
+
+def tokenize_in_worker(preloaded: bool) -> tuple[float, int]:
+    """Tokenize the sample text in a forked worker, the way the first task
+    of a worker does.
+
+    :param preloaded: Whether the parent loaded the shared tokenizer before
+    forking. If not, the worker loads its own.
+    :return: The seconds it took and the private memory it added, in bytes.
+    """
+    tokenizer = (
+        HYPERSCAN_TOKENIZER
+        if preloaded
+        else HyperscanTokenizer(cache_dir=HYPERSCAN_CACHE_DIR)
+    )
+    memory = get_private_memory()
+    start = time.perf_counter()
+    get_citations(SAMPLE_TEXT, tokenizer=tokenizer)
+    return time.perf_counter() - start, get_private_memory() - memory
+
+
+def run_workers(workers: int, preloaded: bool) -> list[tuple[float, int]]:
+    """Fork processes that each tokenize the sample text once.
+
+    :param workers: The number of processes to fork.
+    :param preloaded: Whether the database is loaded before forking.
+    :return: The seconds and private memory of each worker.
+    """
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(workers, maxtasksperchild=1) as pool:
+        return pool.map(tokenize_in_worker, [preloaded] * workers)
+
+
+class Command(VerboseCommand):
+    help = """Measure what the Hyperscan database used to find citations
+    costs each forked worker on its first tokenization, with and without
+    loading it before forking."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="The number of worker processes to fork.",
+        )
+
+    def handle(self, *args, **options):
+        super().handle(*args, **options)
+        workers = options["workers"]
+
+        # Compile and cache the database in a throwaway worker first, so the
+        # workers below don't race to compile it and only measure loading it.
+        run_workers(1, preloaded=False)
+
+        rows = [("per worker", run_workers(workers, preloaded=False))]
+        preload_seconds = preload_hyperscan_db()
+        rows.append(("preloaded", run_workers(workers, preloaded=True)))
+
+        self.stdout.write(
+            f"Loading the database before forking took {preload_seconds:.3f}s."
+        )
+        self.stdout.write(
+            f"{'database':<12} {'workers':>8} {'first scan (s)':>15} "
+            f"{'private (MB)':>13}"
+        )
+        for label, results in rows:
+            seconds, memory = zip(*results)
+            self.stdout.write(
+                f"{label:<12} {workers:>8} {mean(seconds):>15.3f} "
+                f"{mean(memory) / 1024 / 1024:>13.1f}"
+            )
@@ -0,0 +1,23 @@
+from django.conf import settings
+
+from cl.citations.tasks import recompute_dirty_parenthetical_groups
+from cl.lib.command_utils import PeriodicCommand, logger
+
+
+class Command(PeriodicCommand):
+    help = """Recompute the parenthetical groups of dirty clusters
+    periodically. Clusters that get new parentheticals while finding
+    citations are marked as dirty and regrouped once they have been waiting
+    for PARENTHETICAL_GROUPS_DEBOUNCE_WINDOW seconds."""
+
+    def get_interval(self) -> int:
+        # Check the queue again in half the window so that clusters don't
+        # wait much longer than the window.
+        return int(settings.PARENTHETICAL_GROUPS_DEBOUNCE_WINDOW) // 2
+
+    def run_once(self, testing_mode: bool) -> None:
+        regrouped = recompute_dirty_parenthetical_groups(
+            ignore_window=testing_mode
+        )
+        if regrouped:
+            logger.info("Regrouped parentheticals of %s clusters.", regrouped)
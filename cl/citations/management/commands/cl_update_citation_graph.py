@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+
+from cl.citations.graph import (
+    build_citation_graph,
+    load_saved_citation_graph,
+    save_citation_graph,
+    update_citation_graph,
+)
+from cl.lib.command_utils import VerboseCommand, logger
+
+
+class Command(VerboseCommand):
+    help = """Build the citation graph served by the citation graph API, or
+    merge the citations added since it was last saved into it, and save it
+    to CITATION_GRAPH_DIR for the web workers to memory-map. Run it
+    periodically; the graph is rebuilt from scratch once it's older than
+    CITATION_GRAPH_REBUILD_INTERVAL."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Rebuild the graph from scratch, whatever its age.",
+        )
+
+    def handle(self, *args, **options):
+        super().handle(*args, **options)
+        start = time.perf_counter()
+        graph = load_saved_citation_graph()
+        if (
+            options["rebuild"]
+            or graph is None
+            or time.time() - graph.built_at
+            >= settings.CITATION_GRAPH_REBUILD_INTERVAL
+        ):
+            graph = build_citation_graph()
+            action = "Built"
+        else:
+            graph = update_citation_graph(graph)
+            action = "Refreshed"
+        path = save_citation_graph(graph)
+        logger.info(
+            "%s the citation graph of %s opinions and %s citations in %.1fs. "
+            "Saved it to %s.",
+            action,
+            graph.size,
+            graph.cites_indices.size,
+            time.perf_counter() - start,
+            path,
+        )
@@ -1,19 +1,68 @@
+import multiprocessing
+import os
 import sys
 import time
+from collections import deque
 from typing import Iterable, List, cast
 
 from django.conf import settings
 from django.core.management import CommandError, call_command
 from django.core.management.base import CommandParser
+from django.db import connections
 
+from cl.citations.annotate_citations import (
+    annotate_cited_text,
+    generate_annotations,
+)
 from cl.citations.tasks import (
+    extract_opinions_citations,
     find_citations_and_parentheticals_for_opinion_by_pks,
+    resolve_opinions_citations,
+    store_opinions_citations,
 )
+from cl.citations.tokenizers import preload_hyperscan_db
 from cl.lib.argparse_types import valid_date_time
 from cl.lib.celery_utils import CeleryThrottle
 from cl.lib.command_utils import VerboseCommand
+from cl.lib.redis_utils import get_redis_interface
 from cl.lib.types import OptionsType
+from cl.search.management.commands.cl_index_parent_and_child_docs import (
+    log_last_document_indexed,
+)
 from cl.search.models import Opinion
+from cl.search.tasks import add_items_to_solr
+
+PIPELINE_LOG_KEY = "find_citations_pipeline:log"
+
+
+def get_last_opinion_id_processed() -> int:
+    """Get the ID of the last opinion stored by the pipeline.
+
+    :return: The last opinion ID, or 0 if there's no checkpoint.
+    """
+    r = get_redis_interface("CACHE")
+    stored_values = r.hgetall(PIPELINE_LOG_KEY)
+    return int(stored_values.get("last_document_id", 0))
+
+
+def forget_db_connections() -> None:
+    """Drop the DB connections a worker process inherited, without closing
+    them, since the parent process keeps using them.
+    """
+    for conn in connections.all(initialized_only=True):
+        conn.connection = None
+
+
+def annotate_opinions(
+    opinion_texts: List[tuple[str, str, bool, List[List]]],
+) -> List[str]:
+    """Make the HTML with citations of many opinions in a worker process.
+
+    :param opinion_texts: A list of the arguments of annotate_cited_text for
+    each opinion.
+    :return: The new HTML of each opinion.
+    """
+    return [annotate_cited_text(*texts) for texts in opinion_texts]
 
 
 class Command(VerboseCommand):
@@ -86,6 +135,42 @@ class Command(VerboseCommand):
             default="batch1",
             help="The celery queue where the tasks should be processed.",
         )
+        parser.add_argument(
+            "--batch",
+            action="store_true",
+            default=False,
+            help="Resolve the citations of every chunk of opinions at once "
+            "and store the results in bulk, instead of processing the "
+            "opinions one by one.",
+        )
+        parser.add_argument(
+            "--pipeline",
+            action="store_true",
+            default=False,
+            help="Process the opinions in this process instead of Celery, "
+            "with a pool of processes that extracts and annotates the "
+            "citations while the chunks before are resolved and stored. "
+            "Meant for reprocessing the whole corpus.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="The number of worker processes used by --pipeline.",
+        )
+        parser.add_argument(
+            "--max-pending",
+            type=int,
+            help="The number of chunks each --pipeline stage can have waiting "
+            "for the next one before reading more opinions. Defaults to "
+            "twice the number of processes.",
+        )
+        parser.add_argument(
+            "--auto-resume",
+            action="store_true",
+            default=False,
+            help="Resume a --pipeline run after the last opinion it stored.",
+        )
 
     def handle(self, *args: List[str], **options: OptionsType) -> None:
         super().handle(*args, **options)
@@ -115,6 +200,7 @@ class Command(VerboseCommand):
             )
 
         self.index = options["index"]
+        self.batch = options["batch"]
 
         # Use query chaining to build the query
         query = Opinion.objects.all().order_by("pk")
@@ -136,11 +222,27 @@ class Command(VerboseCommand):
             query = query.filter(date_modified__gte=options["modified_after"])
         if options.get("all"):
             query = Opinion.objects.all()
+        if options["pipeline"]:
+            # Opinions are stored in order, so a run can resume after the
+            # last one it stored.
+            query = query.order_by("pk")
+            if options["auto_resume"]:
+                last_pk = get_last_opinion_id_processed()
+                sys.stdout.write(f"Resuming after opinion ID: {last_pk}.\n")
+                query = query.filter(pk__gt=last_pk)
         self.count = query.count()
         self.average_per_s = 0.0
         self.timings: List[float] = []
         opinion_pks = query.values_list("pk", flat=True).iterator()
-        self.update_documents(opinion_pks, cast(str, options["queue"]))
+        if options["pipeline"]:
+            processes = cast(int, options["processes"])
+            self.run_pipeline(
+                opinion_pks,
+                processes,
+                cast(int, options["max_pending"] or processes * 2),
+            )
+        else:
+            self.update_documents(opinion_pks, cast(str, options["queue"]))
         self.add_to_solr(cast(str, options["queue"]))
 
     def log_progress(self, processed_count: int, last_pk: int) -> None:
@@ -186,13 +288,127 @@ class Command(VerboseCommand):
             chunk.append(opinion_pk)
             if processed_count % chunk_size == 0 or last_item:
                 find_citations_and_parentheticals_for_opinion_by_pks.apply_async(
-                    args=(chunk, index_during_subtask),
+                    args=(chunk, index_during_subtask, self.batch),
                     queue=queue_name,
                 )
                 chunk = []
 
             self.log_progress(processed_count, opinion_pk)
 
+    def run_pipeline(
+        self, opinion_pks: Iterable, processes: int, max_pending: int
+    ) -> None:
+        """Find the citations of opinions in stages that run at the same time:
+
+          1. A pool of processes cleans the text of each chunk of opinions
+             and extracts their citations.
+          2. This process resolves the citations of each chunk at once.
+          3. The pool makes the HTML with citations of the chunk.
+          4. This process stores the chunk in bulk, updates ES and saves its
+             last opinion ID as a checkpoint for --auto-resume.
+
+        Each stage holds at most max_pending chunks. When one is full, the
+        stage waits for its oldest chunk to move on before accepting more,
+        so opinions are only read as fast as they're stored, and chunks are
+        stored in order.
+
+        :param opinion_pks: The opinion IDs to process, in ascending order.
+        :param processes: The number of worker processes.
+        :param max_pending: The number of chunks each stage can hold.
+        :return: None
+        """
+        sys.stdout.write(f"Processing {self.count:d} opinions.\n")
+        sys.stdout.flush()
+        index = self.index == "concurrently"
+
+        # Load the Hyperscan database before forking so the workers share it.
+        preload_hyperscan_db()
+        pool = multiprocessing.get_context("fork").Pool(
+            processes, initializer=forget_db_connections
+        )
+
+        extracting: deque = deque()
+        annotating: deque = deque()
+
+        def resolve_oldest_chunk() -> None:
+            chunk_pks, result = extracting.popleft()
+            opinions_with_citations = result.get()
+            opinions_resolutions = (
+                resolve_opinions_citations(opinions_with_citations)
+                if opinions_with_citations
+                else []
+            )
+            opinion_texts = [
+                (
+                    opinion.source_text,
+                    opinion.cleaned_text,
+                    opinion.source_is_html,
+                    generate_annotations(citation_resolutions),
+                )
+                for opinion, citation_resolutions in opinions_resolutions
+            ]
+            annotating.append(
+                (
+                    chunk_pks,
+                    opinions_resolutions,
+                    pool.apply_async(annotate_opinions, (opinion_texts,)),
+                )
+            )
+
+        def store_oldest_chunk() -> None:
+            chunk_pks, opinions_resolutions, result = annotating.popleft()
+            for (opinion, _), html in zip(opinions_resolutions, result.get()):
+                opinion.html_with_citations = html
+            if opinions_resolutions:
+                store_opinions_citations(opinions_resolutions, index)
+            if index:
+                add_items_to_solr.delay(chunk_pks, "search.Opinion")
+            log_last_document_indexed(chunk_pks[-1], PIPELINE_LOG_KEY)
+
+        def extract_chunk(chunk_pks: list[int]) -> None:
+            opinions = list(
+                Opinion.objects.filter(pk__in=chunk_pks)
+                .select_related("cluster")
+                .prefetch_related("cluster__citations")
+            )
+            extracting.append(
+                (
+                    chunk_pks,
+                    pool.apply_async(extract_opinions_citations, (opinions,)),
+                )
+            )
+            if len(extracting) >= max_pending:
+                resolve_oldest_chunk()
+            if len(annotating) >= max_pending:
+                store_oldest_chunk()
+
+        chunk = []
+        chunk_size = 100
+        processed_count = 0
+        try:
+            for opinion_pk in opinion_pks:
+                processed_count += 1
+                chunk.append(opinion_pk)
+                if len(chunk) == chunk_size:
+                    extract_chunk(chunk)
+                    chunk = []
+
+                self.log_progress(processed_count, opinion_pk)
+            # The number of opinions may have changed since they were counted,
+            # so don't wait for the count to send the last chunk.
+            if chunk:
+                extract_chunk(chunk)
+
+            while extracting:
+                resolve_oldest_chunk()
+                if len(annotating) >= max_pending:
+                    store_oldest_chunk()
+            while annotating:
+                store_oldest_chunk()
+        finally:
+            pool.terminate()
+            pool.join()
+
     def add_to_solr(self, queue_name: str) -> None:
         if self.index == "all-at-end":
             # fmt: off
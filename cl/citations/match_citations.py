@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
 from datetime import datetime
+from functools import partial
 from typing import Dict, Iterable, List, Optional, no_type_check
 
 import waffle
@@ -21,7 +22,12 @@ from eyecite.utils import strip_punct
 from requests import Session
 from scorched.response import SolrResponse
 
-from cl.citations.match_citations_queries import es_search_db_for_full_citation
+from cl.citations.match_citations_queries import (
+    db_search_db_for_full_citation,
+    db_search_db_for_full_citations,
+    es_search_db_for_full_citation,
+    es_search_db_for_full_citations,
+)
 from cl.citations.types import (
     MatchedResourceType,
     ResolvedFullCites,
@@ -29,7 +35,10 @@ from cl.citations.types import (
 )
 from cl.citations.utils import (
     QUERY_LENGTH,
-    get_years_from_reporter,
+    cache_citation_resolution,
+    get_cached_citation_resolution,
+    get_years_for_citation,
+    make_citation_lookup_key,
     make_name_param,
 )
 from cl.custom_filters.templatetags.text_filters import best_case_name
@@ -130,18 +139,7 @@ def search_db_for_fullcitation(
             # Eliminate self-cites.
             main_params["fq"].append(f"-id:{full_citation.citing_opinion.pk}")
         # Set up filter parameters
-        if full_citation.year:
-            start_year = end_year = full_citation.year
-        else:
-            start_year, end_year = get_years_from_reporter(full_citation)
-            if (
-                full_citation.citing_opinion is not None
-                and full_citation.citing_opinion.cluster.date_filed
-            ):
-                end_year = min(
-                    end_year,
-                    full_citation.citing_opinion.cluster.date_filed.year,
-                )
+        start_year, end_year = get_years_for_citation(full_citation)
         main_params["fq"].append(
             f"dateFiled:{build_date_range(start_year, end_year)}"
         )
@@ -157,7 +155,10 @@ def search_db_for_fullcitation(
         )
         results = si.query().add_extra(**main_params).execute()
         if len(results) == 1:
+            cache_citation_resolution(full_citation, results[0]["id"])
             return results
+        if len(results) == 0:
+            cache_citation_resolution(full_citation, None)
         if len(results) > 1:
             if (
                 full_citation.citing_opinion is not None
@@ -194,11 +195,120 @@ def filter_by_matching_antecedent(
     return candidates[0] if len(candidates) == 1 else None
 
 
+def resolve_fullcase_citations_in_batch(
+    full_citations: List[FullCaseCitation],
+) -> Dict[tuple[str, str, int | None], MatchedResourceType]:
+    """Resolve many full case citations at once, doing each distinct lookup
+    only once.
+
+    Lookups are answered from the cache when possible. If citations are
+    resolved using the DB, the remaining ones are looked up in the Citation
+    table with a few queries. If they're resolved using ES, the ones left are
+    looked up in a single multi-search request. The matched opinions are then
+    fetched with a single query. Citations that match more than one opinion
+    are left out, so they can be refined by resolve_fullcase_citation.
+
+    :param full_citations: A list of FullCaseCitation instances with their
+    citing object already set.
+    :return: A dict mapping citation lookup keys to their resolution.
+    """
+    lookups: Dict[tuple[str, str, int | None], FullCaseCitation] = {}
+    for full_citation in full_citations:
+        if type(full_citation) is FullCaseCitation:
+            lookups.setdefault(
+                make_citation_lookup_key(full_citation), full_citation
+            )
+
+    opinion_ids: Dict[tuple[str, str, int | None], int] = {}
+    pending_lookups = []
+    for key, full_citation in lookups.items():
+        cached_opinion_id = get_cached_citation_resolution(full_citation)
+        if cached_opinion_id is None:
+            pending_lookups.append(key)
+        else:
+            opinion_ids[key] = cached_opinion_id
+
+    if pending_lookups and waffle.switch_is_active("db_resolve_citations"):
+        pending_citations = [lookups[key] for key in pending_lookups]
+        db_results = db_search_db_for_full_citations(pending_citations)
+        ambiguous_lookups = []
+        for key, full_citation, matched_ids in zip(
+            pending_lookups, pending_citations, db_results
+        ):
+            if matched_ids is None or len(matched_ids) > 1:
+                # Fall back to the search engine.
+                ambiguous_lookups.append(key)
+                continue
+            opinion_id = matched_ids[0] if matched_ids else 0
+            opinion_ids[key] = opinion_id
+            cache_citation_resolution(full_citation, opinion_id)
+        pending_lookups = ambiguous_lookups
+
+    if pending_lookups and waffle.switch_is_active("es_resolve_citations"):
+        pending_citations = [lookups[key] for key in pending_lookups]
+        search_results = es_search_db_for_full_citations(pending_citations)
+        for key, full_citation, hits in zip(
+            pending_lookups, pending_citations, search_results
+        ):
+            if len(hits) > 1:
+                # Ambiguous, it has to be refined by case name.
+                continue
+            opinion_id = hits[0]["id"] if hits else 0
+            opinion_ids[key] = opinion_id
+            cache_citation_resolution(full_citation, opinion_id)
+
+    opinions = Opinion.objects.in_bulk(
+        {pk for pk in opinion_ids.values() if pk}
+    )
+    resolutions: Dict[tuple[str, str, int | None], MatchedResourceType] = {}
+    for key, opinion_id in opinion_ids.items():
+        if not opinion_id:
+            resolutions[key] = NO_MATCH_RESOURCE
+        elif opinion_id in opinions:
+            resolutions[key] = opinions[opinion_id]
+    return resolutions
+
+
 def resolve_fullcase_citation(
     full_citation: FullCaseCitation,
+    batch_resolutions: (
+        Dict[tuple[str, str, int | None], MatchedResourceType] | None
+    ) = None,
 ) -> MatchedResourceType:
     # Case 1: FullCaseCitation
     if type(full_citation) is FullCaseCitation:
+        if batch_resolutions:
+            resolution = batch_resolutions.get(
+                make_citation_lookup_key(full_citation)
+            )
+            if resolution is not None:
+                return resolution
+
+        cached_opinion_id = get_cached_citation_resolution(full_citation)
+        if cached_opinion_id == 0:
+            return NO_MATCH_RESOURCE
+        if cached_opinion_id:
+            try:
+                return Opinion.objects.get(pk=cached_opinion_id)
+            except Opinion.DoesNotExist:
+                # The opinion is gone, resolve the citation again.
+                pass
+
+        if waffle.switch_is_active("db_resolve_citations"):
+            # Look up the citation in the Citation table, the search engine
+            # is only used if it's ambiguous.
+            matched_ids = db_search_db_for_full_citation(full_citation)
+            if matched_ids is not None and len(matched_ids) <= 1:
+                cache_citation_resolution(
+                    full_citation, matched_ids[0] if matched_ids else None
+                )
+                if not matched_ids:
+                    return NO_MATCH_RESOURCE
+                try:
+                    return Opinion.objects.get(pk=matched_ids[0])
+                except Opinion.DoesNotExist:
+                    return NO_MATCH_RESOURCE
+
         db_search_results: SolrResponse | list[Hit]
         if waffle.switch_is_active("es_resolve_citations"):
             # Revolve citations using ES; enable once all the opinions are
@@ -271,10 +381,16 @@ def resolve_supra_citation(
 
 
 @no_type_check
-def do_resolve_citations(
+def set_citing_object(
     citations: List[CitationBase], citing_object: Opinion | RECAPDocument
-) -> Dict[MatchedResourceType, List[SupportedCitationType]]:
-    # Set the citing opinion on FullCaseCitation objects for later matching
+) -> None:
+    """Set the citing opinion or document on FullCaseCitation objects for
+    later matching.
+
+    :param citations: A list of eyecite citations.
+    :param citing_object: The Opinion or RECAPDocument that contains them.
+    :return: None
+    """
     for c in citations:
         if type(c) is FullCaseCitation:
             if isinstance(citing_object, Opinion):
@@ -286,10 +402,31 @@ def do_resolve_citations(
             else:
                 raise "Unknown citing type."
 
+
+@no_type_check
+def do_resolve_citations(
+    citations: List[CitationBase],
+    citing_object: Opinion | RECAPDocument,
+    batch_resolutions: (
+        Dict[tuple[str, str, int | None], MatchedResourceType] | None
+    ) = None,
+) -> Dict[MatchedResourceType, List[SupportedCitationType]]:
+    """Resolve the citations found in an opinion or document.
+
+    :param citations: A list of eyecite citations.
+    :param citing_object: The Opinion or RECAPDocument that contains them.
+    :param batch_resolutions: Optional, the full citation resolutions computed
+    for many opinions at once by resolve_fullcase_citations_in_batch.
+    :return: A dict mapping each matched resource to its citations.
+    """
+    set_citing_object(citations, citing_object)
+
     # Call and return eyecite's resolve_citations() function
     return resolve_citations(
         citations=citations,
-        resolve_full_citation=resolve_fullcase_citation,
+        resolve_full_citation=partial(
+            resolve_fullcase_citation, batch_resolutions=batch_resolutions
+        ),
         resolve_shortcase_citation=resolve_shortcase_citation,
         resolve_supra_citation=resolve_supra_citation,
     )
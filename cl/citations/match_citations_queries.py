@@ -1,35 +1,59 @@
 #!/usr/bin/env python
 
+import logging
+import sys
+import time
+from collections import defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q as DjangoQ
 from django_elasticsearch_dsl.search import Search
-from elasticsearch_dsl import Q
+from elasticsearch_dsl import MultiSearch, Q
 from elasticsearch_dsl.query import Query
 from elasticsearch_dsl.response import Hit, Response
 from eyecite import get_citations
 from eyecite.models import FullCaseCitation
-from eyecite.tokenizers import HyperscanTokenizer
 
-from cl.citations.types import SupportedCitationType
+from cl.citations.tokenizers import HYPERSCAN_TOKENIZER
+from cl.citations.types import (
+    CitationLookupCandidate,
+    CitationLookupParams,
+    SupportedCitationType,
+)
 from cl.citations.utils import (
     QUERY_LENGTH,
-    get_years_from_reporter,
+    cache_citation_resolution,
+    get_citation_lookup_table_invalidations,
+    get_years_for_citation,
     make_name_param,
 )
 from cl.lib.types import CleanData
 from cl.search.documents import OpinionDocument
-from cl.search.models import Opinion
+from cl.search.models import PRECEDENTIAL_STATUS, Citation, Opinion
 
-HYPERSCAN_TOKENIZER = HyperscanTokenizer(cache_dir=".hyperscan")
+logger = logging.getLogger(__name__)
 
 
-def fetch_citations(search_query: Search) -> list[Hit]:
-    """Fetches citation matches from Elasticsearch based on the provided
-    search query.
+# The largest volume that fits in the Citation.volume column.
+MAX_CITATION_VOLUME = 32767
+
+# The in-memory citation lookup table of this process, when it was loaded and
+# when its invalidations were last checked, see get_citation_lookup_table.
+_citation_lookup_table: (
+    dict[CitationLookupParams, list[CitationLookupCandidate]] | None
+) = None
+_citation_lookup_table_loaded_at = 0.0
+_citation_lookup_table_checked_at = 0.0
+
+
+def build_citations_search(search_query: Search) -> Search:
+    """Limit a citation lookup search to the fields and number of hits
+    required to resolve a citation.
 
     :param search_query: The Elasticsearch DSL Search object.
-    :return: A list of ES Hits objects.
+    :return: The Search object ready to be executed.
     """
-
-    citation_hits = []
     search_query = search_query.sort("id")
     # Only retrieve fields required for the lookup.
     search_query = search_query.source(
@@ -37,8 +61,19 @@ def fetch_citations(search_query: Search) -> list[Hit]:
     )
     # Citation resolution aims for a single match. Setting up a size of 2 is
     # enough to determine if there is more than one match.
-    search_query = search_query.extra(size=2)
-    response = search_query.execute()
+    return search_query.extra(size=2)
+
+
+def fetch_citations(search_query: Search) -> list[Hit]:
+    """Fetches citation matches from Elasticsearch based on the provided
+    search query.
+
+    :param search_query: The Elasticsearch DSL Search object.
+    :return: A list of ES Hits objects.
+    """
+
+    citation_hits = []
+    response = build_citations_search(search_query).execute()
     citation_hits.extend(response.hits)
     return citation_hits
 
@@ -130,21 +165,19 @@ def es_case_name_query(
     return new_response
 
 
-def es_search_db_for_full_citation(
+def build_full_citation_query(
     full_citation: FullCaseCitation, query_citation: bool = False
-) -> tuple[list[Hit], bool]:
-    """For a citation object, try to match it to an item in the database using
-    a variety of heuristics.
+) -> Query:
+    """Build the query that looks up a full citation using a phrase query on
+    the citation field, filtered by the citation's year range and court.
+
     :param full_citation: A FullCaseCitation instance.
     :param query_citation: Whether this is related to es_get_query_citation
     resolution
-    return: A two tuple, the ElasticSearch Result object with the results, or an empty list if
-     no hits and a boolean indicating whether the citation was found.
+    :return: The ES DSL bool query.
     """
-
     if not hasattr(full_citation, "citing_opinion"):
         full_citation.citing_opinion = None
-    search_query = OpinionDocument.search()
     filters = [
         Q(
             "term", **{"status.raw": "Published"}
@@ -164,18 +197,7 @@ def es_search_db_for_full_citation(
         must_not.append(Q("match", id=full_citation.citing_opinion.pk))
 
     # Set up filter parameters
-    if full_citation.year:
-        start_year = end_year = full_citation.year
-    else:
-        start_year, end_year = get_years_from_reporter(full_citation)
-        if (
-            full_citation.citing_opinion is not None
-            and full_citation.citing_opinion.cluster.date_filed
-        ):
-            end_year = min(
-                end_year,
-                full_citation.citing_opinion.cluster.date_filed.year,
-            )
+    start_year, end_year = get_years_for_citation(full_citation)
 
     filters.append(
         Q(
@@ -198,10 +220,32 @@ def es_search_db_for_full_citation(
             **{"citation.exact": full_citation.corrected_citation()},
         )
     )
-    query = Q("bool", must_not=must_not, filter=filters)
+    return Q("bool", must_not=must_not, filter=filters)
+
+
+def es_search_db_for_full_citation(
+    full_citation: FullCaseCitation, query_citation: bool = False
+) -> tuple[list[Hit], bool]:
+    """For a citation object, try to match it to an item in the database using
+    a variety of heuristics.
+    :param full_citation: A FullCaseCitation instance.
+    :param query_citation: Whether this is related to es_get_query_citation
+    resolution
+    return: A two tuple, the ElasticSearch Result object with the results, or an empty list if
+     no hits and a boolean indicating whether the citation was found.
+    """
+
+    search_query = OpinionDocument.search()
+    query = build_full_citation_query(full_citation, query_citation)
     citations_query = search_query.query(query)
     results = fetch_citations(citations_query)
     citation_found = True if len(results) > 0 else False
+    if not query_citation and len(results) <= 1:
+        # Only cache the lookups done to resolve citations in opinions, the
+        # query citation lookups return clusters instead of opinions.
+        cache_citation_resolution(
+            full_citation, results[0]["id"] if results else None
+        )
     if len(results) == 1:
         return results, citation_found
     if len(results) > 1:
@@ -219,6 +263,34 @@ def es_search_db_for_full_citation(
     return [], citation_found
 
 
+def es_search_db_for_full_citations(
+    full_citations: list[FullCaseCitation],
+) -> list[list[Hit]]:
+    """Look up many full citations at once using a single multi-search
+    request per chunk of citations.
+
+    Only the phrase query lookup is performed. Citations that match more than
+    one opinion must be refined by es_search_db_for_full_citation.
+
+    :param full_citations: A list of FullCaseCitation instances.
+    :return: A list with the hits for each citation, in the same order.
+    """
+    results: list[list[Hit]] = []
+    chunk_size = settings.ELASTICSEARCH_PAGINATION_BATCH_SIZE
+    for i in range(0, len(full_citations), chunk_size):
+        multi_search = MultiSearch()
+        for full_citation in full_citations[i : i + chunk_size]:
+            search_query = OpinionDocument.search().query(
+                build_full_citation_query(full_citation)
+            )
+            multi_search = multi_search.add(
+                build_citations_search(search_query)
+            )
+        responses = multi_search.execute()
+        results.extend(list(response.hits) for response in responses)
+    return results
+
+
 def es_get_query_citation(
     cd: CleanData,
 ) -> tuple[Hit | None, list[FullCaseCitation]]:
@@ -247,3 +319,213 @@ def es_get_query_citation(
         # If more than one match, don't show the tip
         return matches[0], missing_citations
     return matches, missing_citations
+
+
+def get_citation_lookup_params(
+    full_citation: FullCaseCitation,
+) -> CitationLookupParams | None:
+    """Get the (volume, reporter, page) of a full citation in the form they're
+    stored in the Citation table.
+
+    :param full_citation: A FullCaseCitation instance.
+    :return: A three tuple: volume, reporter and page, or None if the citation
+    can't be looked up in the Citation table, e.g., its volume isn't a number.
+    """
+    volume = full_citation.groups.get("volume")
+    page = full_citation.groups.get("page")
+    if not volume or not page or not volume.isdigit():
+        return None
+    if int(volume) > MAX_CITATION_VOLUME:
+        return None
+    return int(volume), full_citation.corrected_reporter(), page
+
+
+def load_citation_lookup_table() -> (
+    dict[CitationLookupParams, list[CitationLookupCandidate]]
+):
+    """Load the opinions that can be cited with each (volume, reporter, page)
+    into memory.
+
+    Only precedential opinions are loaded since non-precedential ones aren't
+    cited. Reporters and courts are interned to keep the table compact.
+
+    :return: A dict mapping (volume, reporter, page) to its candidates.
+    """
+    table: dict[CitationLookupParams, list[CitationLookupCandidate]] = (
+        defaultdict(list)
+    )
+    citations = (
+        Citation.objects.filter(
+            cluster__precedential_status=PRECEDENTIAL_STATUS.PUBLISHED,
+            cluster__sub_opinions__isnull=False,
+        )
+        .values_list(
+            "volume",
+            "reporter",
+            "page",
+            "cluster__sub_opinions__pk",
+            "cluster__date_filed",
+            "cluster__docket__court_id",
+        )
+        .iterator(chunk_size=settings.CITATION_LOOKUP_TABLE_CHUNK_SIZE)
+    )
+    for volume, reporter, page, opinion_id, date_filed, court_id in citations:
+        table[(volume, sys.intern(reporter), page)].append(
+            (opinion_id, date_filed, sys.intern(court_id))
+        )
+    logger.info("Loaded %s citations into the lookup table.", len(table))
+    return dict(table)
+
+
+def get_citation_lookup_table() -> (
+    dict[CitationLookupParams, list[CitationLookupCandidate]] | None
+):
+    """Get the in-memory citation lookup table of this process.
+
+    It's loaded the first time it's requested and reloaded once it's older
+    than CITATION_LOOKUP_TABLE_TTL. In between, the entries of the citations
+    changed since the last call are dropped from it, so they're looked up in
+    the DB instead.
+
+    :return: The lookup table or None if it's disabled.
+    """
+    global _citation_lookup_table, _citation_lookup_table_loaded_at
+    global _citation_lookup_table_checked_at
+    if not settings.CITATION_LOOKUP_TABLE_ENABLED:
+        return None
+    now = time.time()
+    if (
+        _citation_lookup_table is None
+        or now - _citation_lookup_table_loaded_at
+        >= settings.CITATION_LOOKUP_TABLE_TTL
+    ):
+        _citation_lookup_table = load_citation_lookup_table()
+        _citation_lookup_table_loaded_at = now
+    else:
+        for volume, reporter, page in get_citation_lookup_table_invalidations(
+            _citation_lookup_table_checked_at
+        ):
+            _citation_lookup_table.pop((volume, reporter, page), None)
+    _citation_lookup_table_checked_at = now
+    return _citation_lookup_table
+
+
+def fetch_citation_lookup_candidates(
+    lookup_params: set[CitationLookupParams],
+) -> dict[CitationLookupParams, list[CitationLookupCandidate]]:
+    """Get the opinions that can be cited with each (volume, reporter, page).
+
+    Candidates are read from the in-memory lookup table if it's enabled.
+    Citations missing from it are looked up in the DB, in case they were
+    added or changed after it was loaded.
+
+    :param lookup_params: A set of (volume, reporter, page) tuples.
+    :return: A dict mapping each (volume, reporter, page) to its candidates.
+    """
+    candidates: dict[CitationLookupParams, list[CitationLookupCandidate]] = (
+        defaultdict(list)
+    )
+    table = get_citation_lookup_table()
+    pending_params = []
+    for params in lookup_params:
+        if table is not None and params in table:
+            candidates[params] = table[params]
+        else:
+            pending_params.append(params)
+
+    chunk_size = settings.CITATION_LOOKUP_TABLE_CHUNK_SIZE
+    for i in range(0, len(pending_params), chunk_size):
+        query = DjangoQ()
+        for volume, reporter, page in pending_params[i : i + chunk_size]:
+            query |= DjangoQ(volume=volume, reporter=reporter, page=page)
+        citations = Citation.objects.filter(
+            query,
+            cluster__precedential_status=PRECEDENTIAL_STATUS.PUBLISHED,
+            cluster__sub_opinions__isnull=False,
+        ).values_list(
+            "volume",
+            "reporter",
+            "page",
+            "cluster__sub_opinions__pk",
+            "cluster__date_filed",
+            "cluster__docket__court_id",
+        )
+        for (
+            volume,
+            reporter,
+            page,
+            opinion_id,
+            date_filed,
+            court_id,
+        ) in citations:
+            candidates[(volume, reporter, page)].append(
+                (opinion_id, date_filed, court_id)
+            )
+    return candidates
+
+
+def filter_citation_lookup_candidates(
+    full_citation: FullCaseCitation,
+    candidates: list[CitationLookupCandidate],
+) -> list[int]:
+    """Apply the same year, court and self-cite filters used by the search
+    engine lookups to the candidates of a full citation.
+
+    :param full_citation: A FullCaseCitation instance.
+    :param candidates: The candidates for the citation's (volume, reporter,
+    page).
+    :return: The sorted IDs of the matched opinions.
+    """
+    start_year, end_year = get_years_for_citation(full_citation)
+    start_date, end_date = date(start_year, 1, 1), date(end_year, 12, 31)
+    court = full_citation.metadata.court
+    citing_opinion = getattr(full_citation, "citing_opinion", None)
+    return sorted(
+        opinion_id
+        for opinion_id, date_filed, court_id in candidates
+        if start_date <= date_filed <= end_date
+        and (not court or court_id == court)
+        and (citing_opinion is None or opinion_id != citing_opinion.pk)
+    )
+
+
+def db_search_db_for_full_citations(
+    full_citations: list[FullCaseCitation],
+) -> list[list[int] | None]:
+    """Look up many full citations using the structured (volume, reporter,
+    page) of the Citation table, skipping the search engine.
+
+    Only exact lookups are performed. Citations that match more than one
+    opinion must be refined by the search engine.
+
+    :param full_citations: A list of FullCaseCitation instances.
+    :return: A list with the IDs of the opinions matched by each citation, in
+    the same order, or None for citations that can't be looked up in the DB.
+    """
+    lookup_params = [get_citation_lookup_params(c) for c in full_citations]
+    candidates = fetch_citation_lookup_candidates(
+        {params for params in lookup_params if params is not None}
+    )
+    return [
+        (
+            filter_citation_lookup_candidates(
+                full_citation, candidates.get(params, [])
+            )
+            if params is not None
+            else None
+        )
+        for full_citation, params in zip(full_citations, lookup_params)
+    ]
+
+
+def db_search_db_for_full_citation(
+    full_citation: FullCaseCitation,
+) -> list[int] | None:
+    """Look up a full citation using the structured (volume, reporter, page)
+    of the Citation table, skipping the search engine.
+
+    :param full_citation: A FullCaseCitation instance.
+    :return: The IDs of the matched opinions, or None if the citation can't be
+    looked up in the DB.
+    """
+    return db_search_db_for_full_citations([full_citation])[0]
@@ -1,9 +1,24 @@
+import time
+from collections.abc import Iterable
+
+import numpy as np
 from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.db import transaction
 from django.db.models import QuerySet
 
-from cl.citations.group_parentheticals import compute_parenthetical_groups
-from cl.search.models import OpinionCluster, ParentheticalGroup
+from cl.citations.group_parentheticals import (
+    NUM_PERMUTATIONS,
+    compute_minhash_signatures,
+    compute_parenthetical_groups,
+)
+from cl.lib.redis_utils import get_redis_interface
+from cl.search.models import OpinionCluster, Parenthetical, ParentheticalGroup
+from cl.search.tasks import index_parenthetical_groups_in_bulk
+
+# A sorted set of the IDs of the clusters whose parenthetical groups need to
+# be recomputed, scored by the time they were first marked.
+PARENTHETICAL_GROUPS_QUEUE_KEY = "parenthetical_groups:dirty"
 
 
 async def get_or_create_parenthetical_groups(
@@ -27,6 +42,66 @@ def atomic_create_parenthetical_groups(cluster: OpinionCluster) -> None:
     create_parenthetical_groups(cluster)
 
 
+def make_parenthetical_signatures_key(cluster_id: int) -> str:
+    return f"parenthetical.signatures:{cluster_id}"
+
+
+def get_parenthetical_signatures(
+    cluster_id: int, texts: list[str]
+) -> np.ndarray:
+    """
+    Get the MinHash signatures of the parentheticals of a cluster, computing
+    only the ones of texts that weren't seen the last time its groups were
+    computed.
+
+    Signatures are cached per cluster in a Redis hash keyed by text, since
+    parentheticals are recreated with new IDs every time their describing
+    opinion is processed again.
+
+    :param cluster_id: The ID of the described OpinionCluster
+    :param texts: The texts of the cluster's parentheticals
+    :return: A matrix with the signature of every text, in the same order
+    """
+    if not settings.PARENTHETICAL_SIGNATURES_CACHE_TIMEOUT or not texts:
+        return compute_minhash_signatures(texts)
+
+    r = get_redis_interface("CACHE", decode_responses=False)
+    key = make_parenthetical_signatures_key(cluster_id)
+    unique_texts = list(dict.fromkeys(texts))
+    cached = r.hmget(key, unique_texts)
+    signatures_by_text = {
+        text: np.frombuffer(signature, dtype=np.uint32)
+        for text, signature in zip(unique_texts, cached)
+        if signature is not None
+    }
+    missing_texts = [t for t in unique_texts if t not in signatures_by_text]
+    if missing_texts:
+        missing_signatures = compute_minhash_signatures(missing_texts)
+        signatures_by_text.update(zip(missing_texts, missing_signatures))
+
+    pipe = r.pipeline()
+    if r.hlen(key) > 2 * len(unique_texts):
+        # Most of the cached texts are gone, start over.
+        pipe.delete(key)
+        missing_texts = unique_texts
+    if missing_texts:
+        # Hash values fit in 32 bits.
+        pipe.hset(
+            key,
+            mapping={
+                text: signatures_by_text[text].astype(np.uint32).tobytes()
+                for text in missing_texts
+            },
+        )
+    pipe.expire(key, settings.PARENTHETICAL_SIGNATURES_CACHE_TIMEOUT)
+    pipe.execute()
+
+    signatures = np.empty((len(texts), NUM_PERMUTATIONS), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        signatures[i] = signatures_by_text[text]
+    return signatures
+
+
 def create_parenthetical_groups(cluster: OpinionCluster) -> None:
     """
     Given a cluster, (re)computes the parenthetical groups for its parentheticals
@@ -35,15 +110,74 @@ def create_parenthetical_groups(cluster: OpinionCluster) -> None:
     :param cluster: An OpinionCluster object
     """
     parentheticals = list(cluster.parentheticals)
-    computed_groups = compute_parenthetical_groups(parentheticals)
+    signatures = get_parenthetical_signatures(
+        cluster.pk, [par.text for par in parentheticals]
+    )
+    computed_groups = compute_parenthetical_groups(parentheticals, signatures)
     # Delete existing parenthetical groups for this cluster
     cluster.parenthetical_groups.delete()
-    for cg in computed_groups:
-        group_to_create = ParentheticalGroup(
-            opinion=cg.representative.described_opinion,
-            representative=cg.representative,
-            score=cg.score,
-            size=cg.size,
+    groups = ParentheticalGroup.objects.bulk_create(
+        [
+            ParentheticalGroup(
+                opinion=cg.representative.described_opinion,
+                representative=cg.representative,
+                score=cg.score,
+                size=cg.size,
+            )
+            for cg in computed_groups
+        ]
+    )
+    for group, cg in zip(groups, computed_groups):
+        for par in cg.parentheticals:
+            par.group = group
+    Parenthetical.objects.bulk_update(
+        parentheticals, ["group"], batch_size=1000
+    )
+    if groups and not settings.ELASTICSEARCH_DISABLED:
+        # bulk_create doesn't send post_save, so the signal processor only
+        # removes the old groups from ES. Index the new ones explicitly.
+        group_ids = [group.pk for group in groups]
+        transaction.on_commit(
+            lambda: index_parenthetical_groups_in_bulk.delay(group_ids)
+        )
+
+
+def mark_clusters_for_regrouping(cluster_ids: Iterable[int]) -> None:
+    """
+    Add clusters to the queue of clusters whose parenthetical groups need to
+    be recomputed by recompute_dirty_parenthetical_groups.
+
+    :param cluster_ids: The IDs of the OpinionClusters to regroup
+    """
+    cluster_ids = list(cluster_ids)
+    if not cluster_ids:
+        return
+    r = get_redis_interface("CACHE")
+    marked_at = time.time()
+    # Keep the time the cluster was first marked so that clusters that keep
+    # getting new parentheticals are still regrouped once per window.
+    r.zadd(
+        PARENTHETICAL_GROUPS_QUEUE_KEY,
+        {str(cluster_id): marked_at for cluster_id in cluster_ids},
+        nx=True,
+    )
+
+
+def update_parenthetical_groups(cluster_ids: Iterable[int]) -> None:
+    """
+    Update the parenthetical groups of clusters that got new parentheticals.
+
+    If PARENTHETICAL_GROUPS_DEBOUNCE_ENABLED is set, the clusters are only
+    marked as dirty once the current transaction commits and they're
+    regrouped later. Otherwise, they're regrouped right away.
+
+    :param cluster_ids: The IDs of the OpinionClusters to regroup
+    """
+    if settings.PARENTHETICAL_GROUPS_DEBOUNCE_ENABLED:
+        cluster_ids = list(cluster_ids)
+        transaction.on_commit(
+            lambda: mark_clusters_for_regrouping(cluster_ids)
         )
-        group_to_create.save()
-        group_to_create.parentheticals.set(cg.parentheticals)
+        return
+    for cluster in OpinionCluster.objects.filter(pk__in=cluster_ids):
+        create_parenthetical_groups(cluster)
@@ -3,19 +3,17 @@ from typing import Dict, List
 from django.db import transaction
 from eyecite import get_citations
 from eyecite.models import CitationBase
-from eyecite.tokenizers import HyperscanTokenizer
 
 from cl.citations.annotate_citations import get_and_clean_opinion_text
 from cl.citations.match_citations import (
     NO_MATCH_RESOURCE,
     do_resolve_citations,
 )
+from cl.citations.tokenizers import HYPERSCAN_TOKENIZER
 from cl.citations.types import MatchedResourceType, SupportedCitationType
 from cl.search.models import OpinionsCitedByRECAPDocument, RECAPDocument
 from cl.search.tasks import index_related_cites_fields
 
-HYPERSCAN_TOKENIZER = HyperscanTokenizer(cache_dir=".hyperscan")
-
 
 def store_recap_citations(document: RECAPDocument) -> None:
     """
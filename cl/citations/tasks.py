@@ -1,12 +1,14 @@
+import time
+from collections import Counter, defaultdict
 from http.client import ResponseNotReady
 from typing import Dict, List, Set, Tuple
 
+from django.conf import settings
 from django.db import transaction
 from django.db.models import F
 from django.db.models.query import QuerySet
 from eyecite import get_citations
 from eyecite.models import CitationBase
-from eyecite.tokenizers import HyperscanTokenizer
 
 from cl.celery_init import app
 from cl.citations.annotate_citations import (
@@ -20,11 +22,19 @@ from cl.citations.filter_parentheticals import (
 from cl.citations.match_citations import (
     NO_MATCH_RESOURCE,
     do_resolve_citations,
+    resolve_fullcase_citations_in_batch,
+    set_citing_object,
+)
+from cl.citations.parenthetical_utils import (
+    PARENTHETICAL_GROUPS_QUEUE_KEY,
+    create_parenthetical_groups,
+    update_parenthetical_groups,
 )
-from cl.citations.parenthetical_utils import create_parenthetical_groups
 from cl.citations.recap_citations import store_recap_citations
 from cl.citations.score_parentheticals import parenthetical_score
+from cl.citations.tokenizers import HYPERSCAN_TOKENIZER
 from cl.citations.types import MatchedResourceType, SupportedCitationType
+from cl.lib.redis_utils import get_redis_interface
 from cl.search.models import (
     Opinion,
     OpinionCluster,
@@ -38,7 +48,6 @@ from cl.search.tasks import add_items_to_solr, index_related_cites_fields
 # they are considered parallel reporters. For example,
 # "22 U.S. 44, 46 (13 Atl. 33)" would have a distance of 6.
 PARALLEL_DISTANCE = 6
-HYPERSCAN_TOKENIZER = HyperscanTokenizer(cache_dir=".hyperscan")
 
 
 @app.task
@@ -111,22 +120,34 @@ def find_citations_and_parentheticals_for_opinion_by_pks(
     self,
     opinion_pks: List[int],
     index: bool = True,
+    batch: bool = False,
 ) -> None:
     """Find citations and authored parentheticals for search.Opinion objects.
 
     :param opinion_pks: An iterable of search.Opinion PKs
     :param index: Whether to add the items to Solr
+    :param batch: Whether to resolve the citations and store the results for
+    all the opinions at once, instead of one opinion at a time.
     :return: None
     """
-    opinions: QuerySet[Opinion, Opinion] = Opinion.objects.filter(
-        pk__in=opinion_pks
+    opinions: QuerySet[Opinion, Opinion] = (
+        Opinion.objects.filter(pk__in=opinion_pks)
+        .select_related("cluster")
+        .prefetch_related("cluster__citations")
     )
-    for opinion in opinions:
-        try:
-            store_opinion_citations_and_update_parentheticals(opinion, index)
-        except ResponseNotReady as e:
-            # Threading problem in httplib, which is used in the Solr query.
-            raise self.retry(exc=e, countdown=2)
+    try:
+        if batch:
+            store_opinions_citations_and_update_parentheticals_in_batch(
+                list(opinions), index
+            )
+        else:
+            for opinion in opinions:
+                store_opinion_citations_and_update_parentheticals(
+                    opinion, index
+                )
+    except ResponseNotReady as e:
+        # Threading problem in httplib, which is used in the Solr query.
+        raise self.retry(exc=e, countdown=2)
 
     # If a Solr update was requested, do a single one at the end with all the
     # pks of the passed opinions
@@ -134,6 +155,49 @@ def find_citations_and_parentheticals_for_opinion_by_pks(
         add_items_to_solr.delay(opinion_pks, "search.Opinion")
 
 
+def make_parentheticals(
+    opinion: Opinion,
+    citation_resolutions: Dict[
+        MatchedResourceType, List[SupportedCitationType]
+    ],
+) -> Tuple[List[Parenthetical], Set[int]]:
+    """Build the descriptive parentheticals an opinion writes about the
+    opinions it cites.
+
+    :param opinion: The citing search.Opinion object.
+    :param citation_resolutions: The opinion's matched citations.
+    :return: A two tuple, the list of unsaved Parenthetical objects and the
+    set of cluster IDs whose parenthetical groups need to be updated.
+    """
+    clusters_to_update_par_groups_for = set()
+    parentheticals: List[Parenthetical] = []
+
+    for _opinion, _citations in citation_resolutions.items():
+        # Currently, eyecite has a bug where parallel citations are
+        # detected individually. We avoid creating duplicate parentheticals
+        # because of that by keeping track of what we've seen so far.
+        parenthetical_texts = set()
+
+        for c in _citations:
+            if (
+                (par_text := c.metadata.parenthetical)
+                and par_text not in parenthetical_texts
+                and is_parenthetical_descriptive(par_text)
+            ):
+                clusters_to_update_par_groups_for.add(_opinion.cluster_id)
+                parenthetical_texts.add(par_text)
+                clean = clean_parenthetical_text(par_text)
+                parentheticals.append(
+                    Parenthetical(
+                        describing_opinion_id=opinion.pk,
+                        described_opinion_id=_opinion.pk,
+                        text=clean,
+                        score=parenthetical_score(clean, opinion.cluster),
+                    )
+                )
+    return parentheticals, clusters_to_update_par_groups_for
+
+
 def store_opinion_citations_and_update_parentheticals(
     opinion: Opinion, index: bool
 ) -> None:
@@ -186,32 +250,9 @@ def store_opinion_citations_and_update_parentheticals(
         if o.pk not in currently_cited_opinions
     }
 
-    clusters_to_update_par_groups_for = set()
-    parentheticals: List[Parenthetical] = []
-
-    for _opinion, _citations in citation_resolutions.items():
-        # Currently, eyecite has a bug where parallel citations are
-        # detected individually. We avoid creating duplicate parentheticals
-        # because of that by keeping track of what we've seen so far.
-        parenthetical_texts = set()
-
-        for c in _citations:
-            if (
-                (par_text := c.metadata.parenthetical)
-                and par_text not in parenthetical_texts
-                and is_parenthetical_descriptive(par_text)
-            ):
-                clusters_to_update_par_groups_for.add(_opinion.cluster_id)
-                parenthetical_texts.add(par_text)
-                clean = clean_parenthetical_text(par_text)
-                parentheticals.append(
-                    Parenthetical(
-                        describing_opinion_id=opinion.pk,
-                        described_opinion_id=_opinion.pk,
-                        text=clean,
-                        score=parenthetical_score(clean, opinion.cluster),
-                    )
-                )
+    parentheticals, clusters_to_update_par_groups_for = make_parentheticals(
+        opinion, citation_resolutions
+    )
 
     # Finally, commit these changes to the database in a single
     # transcation block. Trigger a single Solr update as well, if
@@ -248,10 +289,7 @@ def store_opinion_citations_and_update_parentheticals(
 
         # Update parenthetical groups for clusters that we have added
         # parentheticals for from this opinion
-        for cluster_id in clusters_to_update_par_groups_for:
-            create_parenthetical_groups(
-                OpinionCluster.objects.get(pk=cluster_id)
-            )
+        update_parenthetical_groups(clusters_to_update_par_groups_for)
 
         # Save all the changes to the citing opinion (send to solr later)
         opinion.save(index=False)
@@ -263,3 +301,223 @@ def store_opinion_citations_and_update_parentheticals(
     index_related_cites_fields.delay(
         OpinionsCited.__name__, opinion.pk, cluster_ids_to_update
     )
+
+
+def store_opinions_citations_and_update_parentheticals_in_batch(
+    opinions: List[Opinion], index: bool
+) -> None:
+    """Batch version of store_opinion_citations_and_update_parentheticals.
+
+    Citations are extracted from all the opinions first, then the distinct
+    full citations are resolved at once and the results for the whole batch
+    are stored using bulk operations in a single transaction.
+
+    :param opinions: A list of search.Opinion objects.
+    :param index: Whether to add the items to Solr
+    :return: None
+    """
+    opinions_with_citations = extract_opinions_citations(opinions)
+    if not opinions_with_citations:
+        return
+
+    opinions_resolutions = resolve_opinions_citations(opinions_with_citations)
+    for opinion, citation_resolutions in opinions_resolutions:
+        opinion.html_with_citations = create_cited_html(
+            opinion, citation_resolutions
+        )
+    store_opinions_citations(opinions_resolutions, index)
+
+
+def extract_opinions_citations(
+    opinions: List[Opinion],
+) -> List[Tuple[Opinion, List[CitationBase]]]:
+    """Clean the text of opinions and extract their citations.
+
+    This doesn't query the DB, so it can run in another process.
+
+    :param opinions: A list of search.Opinion objects.
+    :return: A list of two tuples, each opinion and its citations. Opinions
+    without citations are left out, so they're left untouched.
+    """
+    opinions_with_citations: List[Tuple[Opinion, List[CitationBase]]] = []
+    for opinion in opinions:
+        get_and_clean_opinion_text(opinion)
+        citations: List[CitationBase] = get_citations(
+            opinion.cleaned_text, tokenizer=HYPERSCAN_TOKENIZER
+        )
+        if citations:
+            opinions_with_citations.append((opinion, citations))
+    return opinions_with_citations
+
+
+def resolve_opinions_citations(
+    opinions_with_citations: List[Tuple[Opinion, List[CitationBase]]],
+) -> List[
+    Tuple[Opinion, Dict[MatchedResourceType, List[SupportedCitationType]]]
+]:
+    """Resolve the citations of many opinions, looking up their distinct full
+    citations at once.
+
+    :param opinions_with_citations: A list of two tuples, each opinion and its
+    citations, as returned by extract_opinions_citations.
+    :return: A list of two tuples, each opinion and its citation resolutions,
+    including the unmatched ones.
+    """
+    for opinion, citations in opinions_with_citations:
+        set_citing_object(citations, opinion)
+    batch_resolutions = resolve_fullcase_citations_in_batch(
+        [c for _, citations in opinions_with_citations for c in citations]
+    )
+    return [
+        (opinion, do_resolve_citations(citations, opinion, batch_resolutions))
+        for opinion, citations in opinions_with_citations
+    ]
+
+
+def store_opinions_citations(
+    opinions_resolutions: List[
+        Tuple[Opinion, Dict[MatchedResourceType, List[SupportedCitationType]]]
+    ],
+    index: bool,
+) -> None:
+    """Store the citations and parentheticals of many opinions using bulk
+    operations in a single transaction, then update them in ES.
+
+    The html_with_citations of the opinions must already be set.
+
+    :param opinions_resolutions: A list of two tuples, each opinion and its
+    citation resolutions, as returned by resolve_opinions_citations.
+    :param index: Whether to add the items to Solr
+    :return: None
+    """
+    citing_opinion_ids = [opinion.pk for opinion, _ in opinions_resolutions]
+    currently_cited_opinions: Dict[int, Set[int]] = defaultdict(set)
+    for citing_id, cited_id in OpinionsCited.objects.filter(
+        citing_opinion_id__in=citing_opinion_ids
+    ).values_list("citing_opinion_id", "cited_opinion_id"):
+        currently_cited_opinions[citing_id].add(cited_id)
+
+    # The number of opinions in the batch that cite each cluster for the
+    # first time.
+    citation_count_increments: Counter[int] = Counter()
+    clusters_to_update_by_opinion: Dict[int, Set[int]] = {}
+    clusters_to_update_par_groups_for: Set[int] = set()
+    opinions_cited: List[OpinionsCited] = []
+    parentheticals: List[Parenthetical] = []
+    for opinion, citation_resolutions in opinions_resolutions:
+        citation_resolutions.pop(NO_MATCH_RESOURCE, None)
+
+        cluster_ids_to_update = {
+            o.cluster_id
+            for o in citation_resolutions.keys()
+            if o.pk not in currently_cited_opinions[opinion.pk]
+        }
+        citation_count_increments.update(cluster_ids_to_update)
+        clusters_to_update_by_opinion[opinion.pk] = cluster_ids_to_update
+
+        opinion_parentheticals, cluster_ids = make_parentheticals(
+            opinion, citation_resolutions
+        )
+        parentheticals.extend(opinion_parentheticals)
+        clusters_to_update_par_groups_for.update(cluster_ids)
+        opinions_cited.extend(
+            OpinionsCited(
+                citing_opinion_id=opinion.pk,
+                cited_opinion_id=_opinion.pk,
+                depth=len(_citations),
+            )
+            for _opinion, _citations in citation_resolutions.items()
+        )
+
+    with transaction.atomic():
+        # Group the clusters by the amount to increase their citation count,
+        # so that they are updated with a few queries.
+        clusters_by_increment: Dict[int, List[int]] = defaultdict(list)
+        for cluster_id, increment in citation_count_increments.items():
+            clusters_by_increment[increment].append(cluster_id)
+        for increment, cluster_ids in clusters_by_increment.items():
+            OpinionCluster.objects.filter(pk__in=cluster_ids).update(
+                citation_count=F("citation_count") + increment
+            )
+
+        if index and citation_count_increments:
+            add_items_to_solr.delay(
+                list(citation_count_increments.keys()),
+                "search.OpinionCluster",
+            )
+        # Nuke existing citations and parentheticals
+        OpinionsCited.objects.filter(
+            citing_opinion_id__in=citing_opinion_ids
+        ).delete()
+        Parenthetical.objects.filter(
+            describing_opinion_id__in=citing_opinion_ids
+        ).delete()
+
+        # Create the new ones.
+        OpinionsCited.objects.bulk_create(opinions_cited)
+        Parenthetical.objects.bulk_create(parentheticals)
+
+        # Update parenthetical groups once for every cluster that got new
+        # parentheticals from any opinion in the batch.
+        update_parenthetical_groups(clusters_to_update_par_groups_for)
+
+        # Save all the changes to the citing opinions (send to solr later).
+        # Each opinion is saved individually so that the ES signal processor
+        # picks up the new HTML.
+        for opinion, _ in opinions_resolutions:
+            opinion.save(index=False)
+
+    # Update changes in ES.
+    for opinion_id, cluster_ids in clusters_to_update_by_opinion.items():
+        index_related_cites_fields.delay(
+            OpinionsCited.__name__, opinion_id, list(cluster_ids)
+        )
+
+
+@app.task(ignore_result=True)
+def recompute_dirty_parenthetical_groups(ignore_window: bool = False) -> int:
+    """Recompute the parenthetical groups of the clusters marked as dirty
+    that have been waiting for longer than PARENTHETICAL_GROUPS_DEBOUNCE_WINDOW.
+
+    Each cluster is regrouped once, no matter how many opinions added
+    parentheticals for it during the window.
+
+    :param ignore_window: If True, regroup every dirty cluster regardless of
+    how long it has been waiting.
+    :return: The number of clusters regrouped.
+    """
+    r = get_redis_interface("CACHE")
+    max_score: float | str = "+inf"
+    if not ignore_window:
+        max_score = time.time() - int(
+            settings.PARENTHETICAL_GROUPS_DEBOUNCE_WINDOW
+        )
+
+    regrouped = 0
+    while True:
+        marked = r.zrangebyscore(
+            PARENTHETICAL_GROUPS_QUEUE_KEY,
+            "-inf",
+            max_score,
+            start=0,
+            num=settings.PARENTHETICAL_GROUPS_BATCH_SIZE,
+            withscores=True,
+        )
+        if not marked:
+            break
+        # Remove the clusters before regrouping them, so that clusters that
+        # get new parentheticals meanwhile are marked again.
+        pending = dict(marked)
+        r.zrem(PARENTHETICAL_GROUPS_QUEUE_KEY, *pending)
+        try:
+            for cluster in OpinionCluster.objects.filter(pk__in=list(pending)):
+                with transaction.atomic():
+                    create_parenthetical_groups(cluster)
+                del pending[str(cluster.pk)]
+                regrouped += 1
+        except BaseException:
+            # Mark again the clusters that were not regrouped, keeping the
+            # time they were first marked.
+            r.zadd(PARENTHETICAL_GROUPS_QUEUE_KEY, pending, nx=True)
+            raise
+    return regrouped
@@ -1,5 +1,6 @@
 import itertools
 import json
+import tempfile
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 from http import HTTPStatus
@@ -8,6 +9,7 @@ from unittest.mock import Mock, patch
 
 import time_machine
 from asgiref.sync import async_to_sync, sync_to_async
+from datasketch import MinHash
 from django.contrib.auth.hashers import make_password
 from django.core.cache import cache as default_cache
 from django.core.management import call_command
@@ -22,10 +24,11 @@ from eyecite.test_factories import (
     supra_citation,
     unknown_citation,
 )
-from eyecite.tokenizers import HyperscanTokenizer
 from factory import RelatedFactory
 from lxml import etree
+from waffle.testutils import override_switch
 
+from cl.citations import match_citations_queries
 from cl.citations.annotate_citations import (
     create_cited_html,
     get_and_clean_opinion_text,
@@ -34,7 +37,18 @@ from cl.citations.filter_parentheticals import (
     clean_parenthetical_text,
     is_parenthetical_descriptive,
 )
+from cl.citations.graph import (
+    Direction,
+    build_citation_graph,
+    get_citation_graph,
+    load_saved_citation_graph,
+    shortest_citation_path,
+    traverse_citations,
+    update_citation_graph,
+)
 from cl.citations.group_parentheticals import (
+    NUM_PERMUTATIONS,
+    compute_minhash_signatures,
     compute_parenthetical_groups,
     get_graph_component,
     get_parenthetical_tokens,
@@ -44,16 +58,40 @@ from cl.citations.management.commands.add_parallel_citations import (
     identify_parallel_citations,
     make_edge_list,
 )
+from cl.citations.management.commands.find_citations import (
+    get_last_opinion_id_processed,
+)
 from cl.citations.match_citations import (
     NO_MATCH_RESOURCE,
     do_resolve_citations,
     resolve_fullcase_citation,
+    resolve_fullcase_citations_in_batch,
+)
+from cl.citations.match_citations_queries import (
+    fetch_citation_lookup_candidates,
+)
+from cl.citations.parenthetical_utils import (
+    PARENTHETICAL_GROUPS_QUEUE_KEY,
+    update_parenthetical_groups,
 )
 from cl.citations.score_parentheticals import parenthetical_score
 from cl.citations.tasks import (
     find_citations_and_parentheticals_for_opinion_by_pks,
+    recompute_dirty_parenthetical_groups,
     store_recap_citations,
 )
+from cl.citations.tokenizers import HYPERSCAN_TOKENIZER, preload_hyperscan_db
+from cl.citations.utils import (
+    CITATION_LOOKUP_INVALIDATIONS_KEY,
+    cache_citation_resolution,
+    cites_citing_cluster,
+    get_cached_citation_resolution,
+    invalidate_citation_resolution_cache,
+    make_citation_lookup_key,
+    make_citation_no_match_key,
+    make_citation_resolution_key,
+)
+from cl.lib.redis_utils import get_redis_interface
 from cl.lib.test_helpers import (
     CourtTestCase,
     IndexedSolrTestCase,
@@ -66,10 +104,13 @@ from cl.search.factories import (
     DocketEntryWithParentsFactory,
     DocketFactory,
     OpinionClusterFactoryWithChildrenAndParents,
+    OpinionsCitedWithParentsFactory,
     OpinionWithChildrenFactory,
+    OpinionWithParentsFactory,
     RECAPDocumentFactory,
 )
 from cl.search.models import (
+    PRECEDENTIAL_STATUS,
     SEARCH_TYPES,
     Opinion,
     OpinionCluster,
@@ -82,8 +123,6 @@ from cl.search.models import (
 from cl.tests.cases import ESIndexTestCase, SimpleTestCase, TestCase
 from cl.users.factories import UserProfileWithParentsFactory
 
-HYPERSCAN_TOKENIZER = HyperscanTokenizer(cache_dir=".hyperscan")
-
 
 class CitationTextTest(SimpleTestCase):
     def test_make_html_from_plain_text(self) -> None:
@@ -1090,6 +1129,58 @@ class CitationCommandTest(ESIndexTestCase, TestCase):
         ]
         self.call_command_and_test_it(args)
 
+    def test_index_by_doc_ids_in_batch(self) -> None:
+        args = [
+            "--doc-id",
+            f"{self.opinion_id3}",
+            f"{self.opinion_id2}",
+            "--index",
+            "concurrently",
+            "--batch",
+        ]
+        self.call_command_and_test_it(args)
+        citing = Opinion.objects.get(pk=self.opinion_id2)
+        self.assertEqual(citing.opinions_cited.count(), 1)
+        self.assertIn("<a href=", citing.html_with_citations)
+
+    def test_index_by_doc_ids_in_pipeline(self) -> None:
+        args = [
+            "--doc-id",
+            f"{self.opinion_id3}",
+            f"{self.opinion_id2}",
+            "--index",
+            "concurrently",
+            "--pipeline",
+            "--processes",
+            "2",
+            "--max-pending",
+            "1",
+        ]
+        self.call_command_and_test_it(args)
+        citing = Opinion.objects.get(pk=self.opinion_id2)
+        self.assertEqual(citing.opinions_cited.count(), 1)
+        self.assertIn("<a href=", citing.html_with_citations)
+        self.assertEqual(
+            get_last_opinion_id_processed(),
+            max(self.opinion_id2, self.opinion_id3),
+        )
+
+        # Resuming after the last opinion stored doesn't process it again.
+        OpinionsCited.objects.filter(
+            citing_opinion_id=self.opinion_id2
+        ).delete()
+        call_command(
+            "find_citations",
+            "--doc-id",
+            f"{self.opinion_id3}",
+            f"{self.opinion_id2}",
+            "--index",
+            "False",
+            "--pipeline",
+            "--auto-resume",
+        )
+        self.assertEqual(citing.opinions_cited.count(), 0)
+
 
 class ParallelCitationTest(SimpleTestCase):
     databases = "__all__"
@@ -1156,6 +1247,456 @@ class ParallelCitationTest(SimpleTestCase):
                 self.assertEqual(make_edge_list(q), a)
 
 
+class HyperscanTokenizerTest(SimpleTestCase):
+    def test_preload_hyperscan_db_once(self) -> None:
+        """Is the shared Hyperscan database loaded only once per process?"""
+        preload_hyperscan_db()
+        hyperscan_db = HYPERSCAN_TOKENIZER.hyperscan_db
+
+        self.assertEqual(preload_hyperscan_db(), 0)
+        get_citations("1 U.S. 1", tokenizer=HYPERSCAN_TOKENIZER)
+        self.assertIs(HYPERSCAN_TOKENIZER.hyperscan_db, hyperscan_db)
+
+
+@override_settings(CITATION_RESOLUTION_CACHE_TIMEOUT=60)
+class CitationResolutionCacheTest(SimpleTestCase):
+    """Tests for the cache of full case citation resolutions."""
+
+    def setUp(self) -> None:
+        invalidate_citation_resolution_cache("1 U.S. 1")
+        self.scotus_citation = case_citation(
+            volume="1",
+            reporter="U.S.",
+            page="1",
+            index=1,
+            reporter_found="U.S.",
+            metadata={"court": "scotus"},
+        )
+        self.ca1_citation = case_citation(
+            volume="1",
+            reporter="U.S.",
+            page="1",
+            index=1,
+            reporter_found="U.S.",
+            metadata={"court": "ca1"},
+        )
+
+    def test_cache_and_invalidate_citation_resolutions(self) -> None:
+        """Are resolutions cached by citation and court, and invalidated
+        together?
+        """
+        self.assertIsNone(get_cached_citation_resolution(self.scotus_citation))
+
+        cache_citation_resolution(self.scotus_citation, 10)
+        cache_citation_resolution(self.ca1_citation, None)
+        self.assertEqual(
+            get_cached_citation_resolution(self.scotus_citation), 10
+        )
+        self.assertEqual(get_cached_citation_resolution(self.ca1_citation), 0)
+
+        invalidate_citation_resolution_cache("1 U.S. 1")
+        self.assertIsNone(get_cached_citation_resolution(self.scotus_citation))
+        self.assertIsNone(get_cached_citation_resolution(self.ca1_citation))
+
+    @override_settings(CITATION_RESOLUTION_NO_MATCH_CACHE_TIMEOUT=5)
+    def test_no_match_resolutions_expire_sooner(self) -> None:
+        """Are citations that don't match any opinion cached for a shorter
+        time, in case they're only missing from the search index for now?
+        """
+        cache_citation_resolution(self.scotus_citation, 10)
+        cache_citation_resolution(self.ca1_citation, None)
+        r = get_redis_interface("CACHE")
+        self.assertGreater(r.ttl(make_citation_resolution_key("1 U.S. 1")), 5)
+        self.assertLessEqual(r.ttl(make_citation_no_match_key("1 U.S. 1")), 5)
+        self.assertEqual(get_cached_citation_resolution(self.ca1_citation), 0)
+
+    @patch("cl.citations.match_citations.search_db_for_fullcitation")
+    @patch("cl.citations.match_citations.es_search_db_for_full_citation")
+    def test_resolve_cached_citation_without_searching(
+        self, mock_es_search, mock_solr_search
+    ) -> None:
+        """Is a cached resolution returned without querying the search
+        engine?
+        """
+        cache_citation_resolution(self.scotus_citation, None)
+        self.assertEqual(
+            resolve_fullcase_citation(self.scotus_citation), NO_MATCH_RESOURCE
+        )
+        mock_es_search.assert_not_called()
+        mock_solr_search.assert_not_called()
+
+
+@override_switch("db_resolve_citations", active=True)
+class DBCitationResolutionTest(TestCase):
+    """Tests for resolving full case citations using the Citation table."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        court_scotus = CourtFactory(id="scotus")
+        cls.citation = CitationWithParentsFactory.create(
+            volume="1",
+            reporter="U.S.",
+            page="1",
+            cluster=OpinionClusterFactoryWithChildrenAndParents(
+                docket=DocketFactory(court=court_scotus),
+                case_name="Foo v. Bar",
+                date_filed=date(2000, 1, 1),
+                precedential_status=PRECEDENTIAL_STATUS.PUBLISHED,
+            ),
+        )
+        cls.opinion = Opinion.objects.get(cluster__pk=cls.citation.cluster_id)
+
+    @patch("cl.citations.match_citations.search_db_for_fullcitation")
+    @patch("cl.citations.match_citations.es_search_db_for_full_citation")
+    def test_resolve_citation_without_searching(
+        self, mock_es_search, mock_solr_search
+    ) -> None:
+        """Are unambiguous citations resolved without querying the search
+        engine?
+        """
+        citation = case_citation(
+            volume="1",
+            reporter="U.S.",
+            page="1",
+            index=1,
+            reporter_found="U.S.",
+            year=2000,
+        )
+        self.assertEqual(resolve_fullcase_citation(citation), self.opinion)
+
+        wrong_year = case_citation(
+            volume="1",
+            reporter="U.S.",
+            page="1",
+            index=1,
+            reporter_found="U.S.",
+            year=1999,
+        )
+        self.assertEqual(
+            resolve_fullcase_citation(wrong_year), NO_MATCH_RESOURCE
+        )
+        mock_es_search.assert_not_called()
+        mock_solr_search.assert_not_called()
+
+    @patch("cl.citations.match_citations.es_search_db_for_full_citations")
+    def test_resolve_citations_in_batch(self, mock_es_search) -> None:
+        """Are citations resolved in batch using the Citation table?"""
+        citations = [
+            case_citation(
+                volume="1",
+                reporter="U.S.",
+                page=page,
+                index=1,
+                reporter_found="U.S.",
+                year=2000,
+            )
+            for page in ["1", "2"]
+        ]
+        resolutions = resolve_fullcase_citations_in_batch(citations)
+        self.assertEqual(
+            resolutions[make_citation_lookup_key(citations[0])], self.opinion
+        )
+        self.assertEqual(
+            resolutions[make_citation_lookup_key(citations[1])],
+            NO_MATCH_RESOURCE,
+        )
+        mock_es_search.assert_not_called()
+
+    @override_settings(
+        CITATION_LOOKUP_TABLE_ENABLED=True, CITATION_LOOKUP_TABLE_TTL=3600
+    )
+    @patch.object(match_citations_queries, "_citation_lookup_table", None)
+    def test_cites_citing_cluster(self) -> None:
+        """Are the citing cluster's citations loaded once per opinion, not
+        once per citation?
+        """
+        opinion = Opinion.objects.select_related("cluster").get(
+            pk=self.opinion.pk
+        )
+        citations = [
+            case_citation(
+                volume="1",
+                reporter="U.S.",
+                page=page,
+                index=1,
+                reporter_found="U.S.",
+            )
+            for page in ["1", "2", "1"]
+        ]
+        for citation in citations:
+            citation.citing_opinion = opinion
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                [cites_citing_cluster(citation) for citation in citations],
+                [True, False, True],
+            )
+
+    def test_lookup_table_invalidation(self) -> None:
+        """Are changed citations dropped from the lookup table, so they're
+        looked up in the DB instead of returning stale candidates?
+        """
+        get_redis_interface("CACHE").delete(CITATION_LOOKUP_INVALIDATIONS_KEY)
+        params = (1, "U.S.", "1")
+        candidates = fetch_citation_lookup_candidates({params})
+        self.assertEqual(
+            [opinion_id for opinion_id, _, _ in candidates[params]],
+            [self.opinion.pk],
+        )
+
+        # Another cluster is cited the same way.
+        other_citation = CitationWithParentsFactory.create(
+            volume="1",
+            reporter="U.S.",
+            page="1",
+            cluster=OpinionClusterFactoryWithChildrenAndParents(
+                docket=DocketFactory(court=self.citation.cluster.docket.court),
+                date_filed=date(2000, 1, 1),
+                precedential_status=PRECEDENTIAL_STATUS.PUBLISHED,
+            ),
+        )
+        candidates = fetch_citation_lookup_candidates({params})
+        self.assertEqual(len(candidates[params]), 2)
+        self.assertNotIn(
+            params, match_citations_queries._citation_lookup_table
+        )
+
+        # Deleted citations stop matching too.
+        other_citation.delete()
+        candidates = fetch_citation_lookup_candidates({params})
+        self.assertEqual(len(candidates[params]), 1)
+
+
+@override_settings(PARENTHETICAL_GROUPS_DEBOUNCE_ENABLED=True)
+class ParentheticalGroupsQueueTest(TestCase):
+    """Tests for the debounced recomputation of parenthetical groups."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.cluster = OpinionClusterFactoryWithChildrenAndParents(
+            docket=DocketFactory(court=CourtFactory(id="scotus")),
+        )
+
+    def setUp(self) -> None:
+        get_redis_interface("CACHE").delete(PARENTHETICAL_GROUPS_QUEUE_KEY)
+
+    @patch("cl.citations.tasks.create_parenthetical_groups")
+    def test_regroup_dirty_cluster_once_per_window(
+        self, mock_create_groups
+    ) -> None:
+        """Is a cluster marked dirty many times regrouped only once, after
+        the window elapses?
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            update_parenthetical_groups([self.cluster.pk])
+            update_parenthetical_groups([self.cluster.pk])
+        mock_create_groups.assert_not_called()
+
+        # The window hasn't elapsed yet.
+        self.assertEqual(recompute_dirty_parenthetical_groups(), 0)
+        self.assertEqual(
+            recompute_dirty_parenthetical_groups(ignore_window=True), 1
+        )
+        mock_create_groups.assert_called_once_with(self.cluster)
+        # The queue is empty now.
+        self.assertEqual(
+            recompute_dirty_parenthetical_groups(ignore_window=True), 0
+        )
+
+    @patch("cl.citations.tasks.create_parenthetical_groups")
+    def test_keep_dirty_cluster_if_regrouping_fails(
+        self, mock_create_groups
+    ) -> None:
+        """Is a dirty cluster kept in the queue if regrouping it fails?"""
+        with self.captureOnCommitCallbacks(execute=True):
+            update_parenthetical_groups([self.cluster.pk])
+
+        mock_create_groups.side_effect = ValueError
+        with self.assertRaises(ValueError):
+            recompute_dirty_parenthetical_groups(ignore_window=True)
+
+        mock_create_groups.side_effect = None
+        self.assertEqual(
+            recompute_dirty_parenthetical_groups(ignore_window=True), 1
+        )
+
+
+@override_settings(CITATION_GRAPH_ENABLED=True)
+class CitationGraphTest(TestCase):
+    """Tests for the in-memory citation graph and its API."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        UserProfileWithParentsFactory.create(
+            user__username="graph-user",
+            user__password=make_password("password"),
+        )
+        court_scotus = CourtFactory(id="scotus")
+        court_ca1 = CourtFactory(id="ca1")
+
+        def make_opinion(court, date_filed):
+            return OpinionWithParentsFactory(
+                cluster__docket__court=court, cluster__date_filed=date_filed
+            )
+
+        cls.o_1 = make_opinion(court_scotus, date(1990, 1, 1))
+        cls.o_2 = make_opinion(court_scotus, date(2000, 1, 1))
+        cls.o_3 = make_opinion(court_ca1, date(2010, 1, 1))
+        cls.o_4 = make_opinion(court_scotus, date(2020, 1, 1))
+        # o_4 -> o_3 -> o_2 -> o_1, and o_4 also cites o_2.
+        for citing, cited in [
+            (cls.o_4, cls.o_3),
+            (cls.o_3, cls.o_2),
+            (cls.o_2, cls.o_1),
+            (cls.o_4, cls.o_2),
+        ]:
+            OpinionsCitedWithParentsFactory(
+                citing_opinion=citing, cited_opinion=cited
+            )
+
+    def setUp(self) -> None:
+        self.client.login(username="graph-user", password="password")
+        graph_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(graph_dir.cleanup)
+        settings_override = self.settings(CITATION_GRAPH_DIR=graph_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command("cl_update_citation_graph")
+
+    def test_traverse_citations(self) -> None:
+        """Are the opinions within N hops found, closest first?"""
+        graph = get_citation_graph()
+        ids, hops = traverse_citations(
+            graph, self.o_1.pk, Direction.CITED_BY, 3
+        )
+        self.assertEqual(
+            list(zip(ids.tolist(), hops.tolist())),
+            [(self.o_2.pk, 1), (self.o_3.pk, 2), (self.o_4.pk, 2)],
+        )
+
+        ids, _ = traverse_citations(graph, self.o_1.pk, Direction.CITED_BY, 1)
+        self.assertEqual(ids.tolist(), [self.o_2.pk])
+
+        # Filters apply to the results, not to the paths to them.
+        ids, _ = traverse_citations(
+            graph,
+            self.o_1.pk,
+            Direction.CITED_BY,
+            3,
+            court_ids=["scotus"],
+            filed_after=date(2015, 1, 1),
+        )
+        self.assertEqual(ids.tolist(), [self.o_4.pk])
+
+        ids, _ = traverse_citations(graph, self.o_3.pk, Direction.CITES, 3)
+        self.assertEqual(ids.tolist(), [self.o_2.pk, self.o_1.pk])
+
+    def test_shortest_citation_path(self) -> None:
+        """Is the shortest chain of citations between two opinions found?"""
+        graph = get_citation_graph()
+        self.assertEqual(
+            shortest_citation_path(graph, self.o_4.pk, self.o_1.pk, 4),
+            [self.o_4.pk, self.o_2.pk, self.o_1.pk],
+        )
+        self.assertIsNone(
+            shortest_citation_path(graph, self.o_4.pk, self.o_1.pk, 1)
+        )
+        # Paths only follow citations from the citing to the cited opinion.
+        self.assertIsNone(
+            shortest_citation_path(graph, self.o_1.pk, self.o_4.pk, 4)
+        )
+
+    def test_update_citation_graph(self) -> None:
+        """Are new opinions and citations merged into the saved graph?"""
+        graph = load_saved_citation_graph()
+        o_5 = OpinionWithParentsFactory(cluster__date_filed=date(2021, 1, 1))
+        OpinionsCitedWithParentsFactory(
+            citing_opinion=o_5, cited_opinion=self.o_1
+        )
+        OpinionsCitedWithParentsFactory(
+            citing_opinion=self.o_4, cited_opinion=o_5
+        )
+
+        updated = update_citation_graph(graph)
+        ids, _ = traverse_citations(
+            updated, self.o_1.pk, Direction.CITED_BY, 1
+        )
+        self.assertEqual(ids.tolist(), [self.o_2.pk, o_5.pk])
+        self.assertEqual(
+            updated.last_citation_id, OpinionsCited.objects.latest("pk").pk
+        )
+        # Merging the new citations gives the same graph as a rebuild.
+        rebuilt = build_citation_graph()
+        for name in ["cites", "cited_by"]:
+            for suffix in ["indptr", "indices"]:
+                attr = f"{name}_{suffix}"
+                self.assertEqual(
+                    getattr(updated, attr).tolist(),
+                    getattr(rebuilt, attr).tolist(),
+                    msg=attr,
+                )
+        # The previous graph is left untouched.
+        ids, _ = traverse_citations(graph, self.o_1.pk, Direction.CITED_BY, 1)
+        self.assertEqual(ids.tolist(), [self.o_2.pk])
+
+    def test_workers_load_the_latest_saved_graph(self) -> None:
+        """Do workers pick up the graph saved by the command?"""
+        o_5 = OpinionWithParentsFactory(cluster__date_filed=date(2021, 1, 1))
+        OpinionsCitedWithParentsFactory(
+            citing_opinion=o_5, cited_opinion=self.o_1
+        )
+        ids, _ = traverse_citations(
+            get_citation_graph(), self.o_1.pk, Direction.CITED_BY, 1
+        )
+        self.assertEqual(ids.tolist(), [self.o_2.pk])
+
+        call_command("cl_update_citation_graph")
+        ids, _ = traverse_citations(
+            get_citation_graph(), self.o_1.pk, Direction.CITED_BY, 1
+        )
+        self.assertEqual(ids.tolist(), [self.o_2.pk, o_5.pk])
+
+    def test_citation_graph_api(self) -> None:
+        """Can the graph be queried using the API?"""
+        r = self.client.get(
+            reverse("citation-graph-traverse", kwargs={"version": "v4"}),
+            {"opinion": self.o_1.pk, "hops": 2, "court": "ca1 scotus"},
+        )
+        self.assertEqual(r.status_code, HTTPStatus.OK)
+        self.assertEqual(r.json()["count"], 3)
+        self.assertEqual(
+            r.json()["results"][0], {"id": self.o_2.pk, "hops": 1}
+        )
+
+        r = self.client.get(
+            reverse("citation-graph-traverse", kwargs={"version": "v4"}),
+            {"opinion": self.o_1.pk, "hops": 100},
+        )
+        self.assertEqual(r.status_code, HTTPStatus.BAD_REQUEST)
+
+        r = self.client.get(
+            reverse("citation-graph-path", kwargs={"version": "v4"}),
+            {"source": self.o_3.pk, "target": self.o_1.pk},
+        )
+        self.assertEqual(r.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            r.json(),
+            {"hops": 2, "path": [self.o_3.pk, self.o_2.pk, self.o_1.pk]},
+        )
+
+        r = self.client.get(
+            reverse("citation-graph-path", kwargs={"version": "v4"}),
+            {"source": self.o_1.pk, "target": self.o_3.pk},
+        )
+        self.assertEqual(r.status_code, HTTPStatus.NOT_FOUND)
+
+        with self.settings(CITATION_GRAPH_ENABLED=False):
+            r = self.client.get(
+                reverse("citation-graph-path", kwargs={"version": "v4"}),
+                {"source": self.o_3.pk, "target": self.o_1.pk},
+            )
+        self.assertEqual(r.status_code, HTTPStatus.NOT_FOUND)
+
+
 class FilterParentheticalTest(SimpleTestCase):
     def test_is_not_descriptive(self):
         fixtures = [
@@ -1747,6 +2288,38 @@ class GroupParentheticalsTest(SimpleTestCase):
                     f"Got incorrect result from get_graph_component for inputs (expected {output}): {inputs}",
                 )
 
+    def test_get_graph_component_without_recursion_limit(self):
+        """Can get_graph_component traverse components larger than the
+        recursion limit?
+        """
+        size = 5000
+        graph = {
+            str(i): [str(j) for j in (i - 1, i + 1) if 0 <= j < size]
+            for i in range(size)
+        }
+        component = get_graph_component("0", graph, set())
+        self.assertEqual(len(component), size)
+
+    def test_compute_minhash_signatures(self):
+        """Are the signatures computed in batch identical to the hash values
+        of datasketch MinHashes updated with the same tokens?
+        """
+        texts = [
+            "Holding that a prisoner must show an actual injury",
+            "",
+            "The loss of First Amendment freedoms constitutes injury",
+        ]
+        signatures = compute_minhash_signatures(texts)
+        for text, signature in zip(texts, signatures):
+            mhash = MinHash(num_perm=NUM_PERMUTATIONS)
+            mhash.update_batch(
+                [
+                    token.encode("utf-8")
+                    for token in get_parenthetical_tokens(text)
+                ]
+            )
+            self.assertEqual(list(mhash.hashvalues), list(signature))
+
 
 @patch(
     "cl.api.utils.CitationCountRateThrottle.get_cache_key_for_citations",
@@ -0,0 +1,35 @@
+import threading
+import time
+
+from eyecite.tokenizers import HyperscanTokenizer
+
+# The directory where the compiled Hyperscan database is cached, relative to
+# the working directory.
+HYPERSCAN_CACHE_DIR = ".hyperscan"
+
+# The tokenizer shared by every module of the process. Each tokenizer loads
+# its own copy of the Hyperscan database the first time it's used, so don't
+# create new ones; import this one instead.
+HYPERSCAN_TOKENIZER = HyperscanTokenizer(cache_dir=HYPERSCAN_CACHE_DIR)
+# Hyperscan scratch space can't be used by several threads at once, so hold
+# this lock when the tokenizer is used from threads, e.g. when courts are
+# scraped concurrently.
+HYPERSCAN_LOCK = threading.Lock()
+
+
+def preload_hyperscan_db() -> float:
+    """Load the Hyperscan database of the shared tokenizer, compiling it if
+    it's not cached yet.
+
+    Call this in a parent process before it forks its workers: the database
+    is read-only once loaded, so the workers share its memory pages instead
+    of each loading a copy on its first tokenization.
+
+    :return: The number of seconds it took to load the database, or 0 if it
+    was already loaded.
+    """
+    if hasattr(HYPERSCAN_TOKENIZER, "_db"):
+        return 0.0
+    start = time.perf_counter()
+    HYPERSCAN_TOKENIZER.hyperscan_db
+    return time.perf_counter() - start
@@ -1,3 +1,4 @@
+from datetime import date
 from typing import NotRequired, TypedDict, Union
 
 from django.db.models import QuerySet
@@ -17,6 +18,11 @@ SupportedCitationType = Union[
 MatchedResourceType = Union[Opinion, Resource]
 ResolvedFullCite = tuple[FullCaseCitation, MatchedResourceType]
 ResolvedFullCites = list[ResolvedFullCite]
+# (volume, reporter, page), as stored in the Citation table.
+CitationLookupParams = tuple[int, str, str]
+# (opinion ID, cluster date filed, court ID) of an opinion matched by a
+# (volume, reporter, page) lookup.
+CitationLookupCandidate = tuple[int, date, str]
 
 
 class CitationAPIResponse(TypedDict):
@@ -1,8 +1,11 @@
+import json
+import time
 from datetime import date
 
 from django.apps import (  # Must use apps.get_model() to avoid circular import issue
     apps,
 )
+from django.conf import settings
 from django.db.models import Sum
 from django.template.defaultfilters import slugify
 from django.utils.safestring import SafeString
@@ -10,7 +13,16 @@ from eyecite.models import CitationBase, FullCaseCitation, ShortCaseCitation
 from eyecite.utils import strip_punct
 from reporters_db import EDITIONS, VARIATIONS_ONLY
 
+from cl.lib.redis_utils import get_redis_interface
+
 QUERY_LENGTH = 10
+# A sorted set of the (volume, reporter, page) of the citations changed
+# recently, scored by when they changed, so every process can drop them from
+# its in-memory citation lookup table.
+CITATION_LOOKUP_INVALIDATIONS_KEY = "citation.lookup_table:invalidated"
+# Extra seconds of invalidations read and kept, to tolerate clock skew
+# between servers.
+CITATION_LOOKUP_INVALIDATIONS_MARGIN = 60
 SLUGIFIED_EDITIONS: dict[str, str] = {
     str(slugify(item)): item for item in EDITIONS.keys()
 }
@@ -74,6 +86,227 @@ def get_years_from_reporter(
     return start_year, end_year
 
 
+def get_years_for_citation(full_citation: FullCaseCitation) -> tuple[int, int]:
+    """Get the range of years in which the opinion cited by a full case
+    citation could have been filed.
+
+    :param full_citation: A FullCaseCitation instance.
+    :return: A two tuple, the start and end years.
+    """
+    if full_citation.year:
+        return full_citation.year, full_citation.year
+
+    start_year, end_year = get_years_from_reporter(full_citation)
+    citing_opinion = getattr(full_citation, "citing_opinion", None)
+    if citing_opinion is not None and citing_opinion.cluster.date_filed:
+        end_year = min(end_year, citing_opinion.cluster.date_filed.year)
+    return start_year, end_year
+
+
+def make_citation_resolution_key(corrected_citation: str) -> str:
+    return f"citation.resolution:{corrected_citation}"
+
+
+def make_citation_no_match_key(corrected_citation: str) -> str:
+    return f"citation.resolution.no_match:{corrected_citation}"
+
+
+def make_citation_resolution_field(full_citation: FullCaseCitation) -> str:
+    """Compose the field that identifies the year and court constraints of a
+    citation within its resolution cache key.
+
+    :param full_citation: A FullCaseCitation instance.
+    :return: The field name.
+    """
+    start_year, end_year = get_years_for_citation(full_citation)
+    court = full_citation.metadata.court or ""
+    return f"{start_year}:{end_year}:{court}"
+
+
+def cites_citing_cluster(full_citation: FullCaseCitation) -> bool:
+    """Check whether a full citation refers to the cluster of the opinion that
+    contains it.
+
+    :param full_citation: A FullCaseCitation instance.
+    :return: True if the citation is one of the citing cluster's citations.
+    """
+    citing_opinion = getattr(full_citation, "citing_opinion", None)
+    if citing_opinion is None:
+        return False
+    # Get the cluster's citations once per opinion, not once per citation,
+    # in case they weren't prefetched.
+    cluster_citations = getattr(citing_opinion, "cluster_citations", None)
+    if cluster_citations is None:
+        cluster_citations = {
+            str(citation)
+            for citation in citing_opinion.cluster.citations.all()
+        }
+        citing_opinion.cluster_citations = cluster_citations
+    return full_citation.corrected_citation() in cluster_citations
+
+
+def make_citation_lookup_key(
+    full_citation: FullCaseCitation,
+) -> tuple[str, str, int | None]:
+    """Compose a key that groups full citations that are resolved by the same
+    lookup, so each distinct lookup is done only once in a batch.
+
+    :param full_citation: A FullCaseCitation instance.
+    :return: A three tuple: the corrected citation, its year and court
+    constraints and the citing opinion ID if the lookup depends on it due to
+    the self-cite exclusion, otherwise None.
+    """
+    citing_opinion_id = None
+    if cites_citing_cluster(full_citation):
+        citing_opinion_id = full_citation.citing_opinion.pk
+    return (
+        full_citation.corrected_citation(),
+        make_citation_resolution_field(full_citation),
+        citing_opinion_id,
+    )
+
+
+def can_cache_citation_resolution(full_citation: FullCaseCitation) -> bool:
+    """Check whether the resolution of a citation can be read from or stored
+    in the cache.
+
+    Citation lookups exclude the citing opinion to avoid self-cites, so the
+    resolution of a citation to the citing opinion's own cluster depends on
+    who is citing, and it's not cached.
+
+    :param full_citation: A FullCaseCitation instance.
+    :return: True if the resolution can be cached, otherwise False.
+    """
+    if not settings.CITATION_RESOLUTION_CACHE_TIMEOUT:
+        return False
+    return not cites_citing_cluster(full_citation)
+
+
+def get_cached_citation_resolution(
+    full_citation: FullCaseCitation,
+) -> int | None:
+    """Get the cached resolution of a full case citation.
+
+    :param full_citation: A FullCaseCitation instance.
+    :return: The ID of the matched Opinion, 0 if the citation is known not to
+    match any opinion, or None if the resolution is not cached.
+    """
+    if not can_cache_citation_resolution(full_citation):
+        return None
+    r = get_redis_interface("CACHE")
+    citation = full_citation.corrected_citation()
+    field = make_citation_resolution_field(full_citation)
+    pipe = r.pipeline()
+    pipe.hget(make_citation_resolution_key(citation), field)
+    pipe.hget(make_citation_no_match_key(citation), field)
+    opinion_id, no_match = pipe.execute()
+    if opinion_id is not None:
+        return int(opinion_id)
+    return 0 if no_match is not None else None
+
+
+def cache_citation_resolution(
+    full_citation: FullCaseCitation, opinion_id: int | None
+) -> None:
+    """Store the resolution of a full case citation in the cache.
+
+    All the resolutions for the same citation are stored in a single hash so
+    they can be invalidated at once when a Citation changes. Citations that
+    don't match any opinion are stored in a separate hash that expires after
+    CITATION_RESOLUTION_NO_MATCH_CACHE_TIMEOUT. The search indexes are
+    updated after the Citation signals invalidate the cache, so a lookup in
+    between can cache a stale "no match" that would otherwise hide the new
+    citation for the whole cache timeout.
+
+    :param full_citation: A FullCaseCitation instance.
+    :param opinion_id: The ID of the matched Opinion or None if the citation
+    doesn't match any opinion.
+    :return: None
+    """
+    if not can_cache_citation_resolution(full_citation):
+        return
+    r = get_redis_interface("CACHE")
+    citation = full_citation.corrected_citation()
+    if opinion_id:
+        key = make_citation_resolution_key(citation)
+        timeout = settings.CITATION_RESOLUTION_CACHE_TIMEOUT
+    else:
+        key = make_citation_no_match_key(citation)
+        timeout = min(
+            settings.CITATION_RESOLUTION_NO_MATCH_CACHE_TIMEOUT,
+            settings.CITATION_RESOLUTION_CACHE_TIMEOUT,
+        )
+    pipe = r.pipeline()
+    pipe.hset(
+        key, make_citation_resolution_field(full_citation), opinion_id or 0
+    )
+    pipe.expire(key, timeout)
+    pipe.execute()
+
+
+def invalidate_citation_resolution_cache(citation: str) -> None:
+    """Remove all the cached resolutions for a citation.
+
+    :param citation: The citation string, e.g. "410 U.S. 113".
+    :return: None
+    """
+    r = get_redis_interface("CACHE")
+    r.delete(
+        make_citation_resolution_key(citation),
+        make_citation_no_match_key(citation),
+    )
+
+
+def invalidate_citation_lookup_table(
+    volume: int | str, reporter: str, page: str
+) -> None:
+    """Record that the lookup table entry of a (volume, reporter, page) is
+    stale, so every process drops it from its in-memory table the next time
+    the table is used.
+
+    Invalidations are kept for CITATION_LOOKUP_TABLE_TTL, after which every
+    table loaded before them has been reloaded.
+
+    :param volume: The citation volume.
+    :param reporter: The citation reporter.
+    :param page: The citation page.
+    :return: None
+    """
+    r = get_redis_interface("CACHE")
+    now = time.time()
+    pipe = r.pipeline()
+    pipe.zadd(
+        CITATION_LOOKUP_INVALIDATIONS_KEY,
+        {json.dumps([int(volume), reporter, page]): now},
+    )
+    pipe.zremrangebyscore(
+        CITATION_LOOKUP_INVALIDATIONS_KEY,
+        "-inf",
+        now
+        - settings.CITATION_LOOKUP_TABLE_TTL
+        - CITATION_LOOKUP_INVALIDATIONS_MARGIN,
+    )
+    pipe.execute()
+
+
+def get_citation_lookup_table_invalidations(
+    since: float,
+) -> list[tuple[int, str, str]]:
+    """Get the (volume, reporter, page) whose lookup table entries were
+    invalidated since a time.
+
+    :param since: A Unix timestamp.
+    :return: A list of (volume, reporter, page) tuples.
+    """
+    r = get_redis_interface("CACHE")
+    members = r.zrangebyscore(
+        CITATION_LOOKUP_INVALIDATIONS_KEY,
+        since - CITATION_LOOKUP_INVALIDATIONS_MARGIN,
+        "+inf",
+    )
+    return [tuple(json.loads(member)) for member in members]
+
+
 def make_name_param(
     defendant: str,
     plaintiff: str | None = None,
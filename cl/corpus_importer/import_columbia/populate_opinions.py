@@ -7,9 +7,9 @@ from datetime import date
 from asgiref.sync import async_to_sync
 from django.conf import settings
 from eyecite.find import get_citations
-from eyecite.tokenizers import HyperscanTokenizer
 from eyecite.utils import clean_text
 
+from cl.citations.tokenizers import HYPERSCAN_TOKENIZER
 from cl.lib.scorched_utils import ExtraSolrInterface
 from cl.lib.solr_core_admin import get_term_frequency
 from cl.search.models import SOURCES, Docket, Opinion, OpinionCluster
@@ -20,8 +20,6 @@ from ...people_db.lookup_utils import (
 )
 from .convert_columbia_html import convert_columbia_html
 
-HYPERSCAN_TOKENIZER = HyperscanTokenizer(cache_dir=".hyperscan")
-
 # only make a solr connection once
 SOLR_CONN = ExtraSolrInterface(settings.SOLR_OPINION_URL, mode="r")
 
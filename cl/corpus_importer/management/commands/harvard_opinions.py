@@ -16,10 +16,10 @@ from django.db import transaction
 from django.db.utils import OperationalError
 from eyecite.find import get_citations
 from eyecite.models import FullCaseCitation
-from eyecite.tokenizers import HyperscanTokenizer
 from juriscraper.lib.diff_tools import normalize_phrase
 from juriscraper.lib.string_utils import CaseNameTweaker, harmonize, titlecase
 
+from cl.citations.tokenizers import HYPERSCAN_TOKENIZER
 from cl.corpus_importer.utils import (
     add_citations_to_cluster,
     clean_body_content,
@@ -34,8 +34,6 @@ from cl.scrapers.utils import update_or_create_docket
 from cl.search.models import SOURCES, Court, Docket, Opinion, OpinionCluster
 from cl.search.tasks import add_items_to_solr
 
-HYPERSCAN_TOKENIZER = HyperscanTokenizer(cache_dir=".hyperscan")
-
 cnt = CaseNameTweaker()
 
 
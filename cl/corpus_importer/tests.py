@@ -17,10 +17,10 @@ from django.core.management import call_command
 from django.db.models.signals import post_save
 from django.test import override_settings
 from django.utils.timezone import make_aware, now
-from eyecite.tokenizers import HyperscanTokenizer
 from factory import RelatedFactory
 from juriscraper.lib.string_utils import harmonize, titlecase
 
+from cl.citations.tokenizers import HYPERSCAN_TOKENIZER
 from cl.corpus_importer.court_regexes import match_court_string
 from cl.corpus_importer.factories import (
     CaseBodyFactory,
@@ -122,8 +122,6 @@ from cl.settings import MEDIA_ROOT
 from cl.tests.cases import SimpleTestCase, TestCase
 from cl.tests.fakes import FakeCaseQueryReport, FakeFreeOpinionReport
 
-HYPERSCAN_TOKENIZER = HyperscanTokenizer(cache_dir=".hyperscan")
-
 
 class JudgeExtractionTest(SimpleTestCase):
     def test_get_judge_from_string_columbia(self) -> None:
@@ -15,9 +15,9 @@ from django.db.utils import IntegrityError
 from django.utils.timezone import now
 from eyecite import get_citations
 from eyecite.models import FullCaseCitation
-from eyecite.tokenizers import HyperscanTokenizer
 from juriscraper.lib.string_utils import harmonize, titlecase
 
+from cl.citations.tokenizers import HYPERSCAN_TOKENIZER
 from cl.citations.utils import map_reporter_db_cite_type
 from cl.lib.command_utils import logger
 from cl.lib.string_diff import get_cosine_similarity
@@ -28,8 +28,6 @@ from cl.people_db.lookup_utils import (
 from cl.people_db.models import Person
 from cl.search.models import Citation, Docket, Opinion, OpinionCluster
 
-HYPERSCAN_TOKENIZER = HyperscanTokenizer(cache_dir=".hyperscan")
-
 
 class OpinionMatchingException(Exception):
     """An exception for wrong matching opinions"""
@@ -1,5 +1,7 @@
 import logging
 import os
+import time
+from abc import ABC, abstractmethod
 
 from django.core.management import BaseCommand, CommandError
 
@@ -22,6 +24,40 @@ class VerboseCommand(BaseCommand):
             juriscraper_logger.setLevel(logging.DEBUG)
 
 
+class PeriodicCommand(VerboseCommand, ABC):
+    """A command that does some work over and over, sleeping in between.
+
+    Subclasses implement run_once and get_interval. In testing mode, the work
+    is done only once.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--testing-mode",
+            action="store_true",
+            help="Use this flag for testing purposes.",
+        )
+
+    @abstractmethod
+    def get_interval(self) -> int:
+        """The number of seconds to sleep between runs."""
+
+    @abstractmethod
+    def run_once(self, testing_mode: bool) -> None:
+        """Do the work once."""
+
+    def handle(self, *args, **options):
+        super().handle(*args, **options)
+        testing_mode = options.get("testing_mode", False)
+        while True:
+            self.run_once(testing_mode)
+            if testing_mode:
+                # Perform only 1 iteration for testing purposes.
+                break
+
+            time.sleep(max(self.get_interval(), 1))
+
+
 class CommandUtils:
     """A mixin to give some useful methods to sub classes."""
 
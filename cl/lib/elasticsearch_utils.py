@@ -37,6 +37,7 @@ from cl.lib.types import (
     CleanData,
     EsMainQueries,
     ESRangeQueryParams,
+    EsSweepAlertSearches,
 )
 from cl.lib.utils import (
     check_for_proximity_tokens,
@@ -3181,27 +3182,28 @@ def do_es_alert_estimation_query(
     return estimation_query.count()
 
 
-def do_es_sweep_alert_query(
+def build_es_sweep_alert_searches(
     search_query: Search,
     child_search_query: Search,
     cd: CleanData,
-) -> tuple[list[Hit] | None, Response | None, Response | None]:
-    """Build an ES query for its use in the daily RECAP sweep index.
+) -> EsSweepAlertSearches | None:
+    """Build the ES searches of an alert for its use in the daily RECAP
+    sweep index.
 
     :param search_query: Elasticsearch DSL Search object.
     :param child_search_query: The Elasticsearch DSL search query to perform
     the child-only query.
     :param cd: The query CleanedData
-    :return: A two-tuple, the Elasticsearch search query object and an ES
-    Query for child documents, or None if there is no need to query
-    child documents.
+    :return: An EsSweepAlertSearches object with the main search, the
+    docket-only search and the RECAPDocument-only search if required, or None
+    if the query is not valid.
     """
 
     search_form = SearchForm(cd, is_es_form=True)
     if search_form.is_valid():
         cd = search_form.cleaned_data
     else:
-        return None, None, None
+        return None
     es_queries = build_es_base_query(search_query, cd, True, alerts=True)
     s = es_queries.search_query
     parent_query = es_queries.parent_query
@@ -3211,16 +3213,16 @@ def do_es_sweep_alert_query(
     main_query = main_query.extra(
         from_=0, size=settings.SCHEDULED_ALERT_HITS_LIMIT
     )
+    alert_searches = EsSweepAlertSearches(cd=cd, main_search=main_query)
 
-    multi_search = MultiSearch()
-    multi_search = multi_search.add(main_query)
     if parent_query:
         parent_search = search_query.query(parent_query)
         parent_search = parent_search.extra(
             from_=0, size=settings.SCHEDULED_ALERT_HITS_LIMIT
         )
-        parent_search = parent_search.source(includes=["docket_id"])
-        multi_search = multi_search.add(parent_search)
+        alert_searches.parent_search = parent_search.source(
+            includes=["docket_id"]
+        )
 
     if child_query:
         child_search = child_search_query.query(child_query)
@@ -3229,18 +3231,35 @@ def do_es_sweep_alert_query(
             size=settings.SCHEDULED_ALERT_HITS_LIMIT
             * settings.RECAP_CHILD_HITS_PER_RESULT,
         )
-        child_search = child_search.source(includes=["id"])
-        multi_search = multi_search.add(child_search)
+        alert_searches.child_search = child_search.source(includes=["id"])
+    return alert_searches
 
-    responses = multi_search.execute()
-    main_results = responses[0]
-    rd_results = None
-    docket_results = None
-    if parent_query:
-        docket_results = responses[1]
-    if child_query:
-        rd_results = responses[2]
 
+def process_es_sweep_alert_responses(
+    alert_searches: EsSweepAlertSearches, responses: list[Response]
+) -> tuple[list[Hit], Response | None, Response | None]:
+    """Prepare the responses of the searches of a sweep alert.
+
+    :param alert_searches: The searches of the alert.
+    :param responses: The responses of alert_searches.searches, in order.
+    :return: A three-tuple, the main results, the docket-only results and the
+    RECAPDocument-only results.
+    """
+
+    responses_iter = iter(responses)
+    main_results = next(responses_iter)
+    docket_results = (
+        next(responses_iter)
+        if alert_searches.parent_search is not None
+        else None
+    )
+    rd_results = (
+        next(responses_iter)
+        if alert_searches.child_search is not None
+        else None
+    )
+
+    cd = alert_searches.cd
     limit_inner_hits({}, main_results, cd["type"])
     set_results_highlights(main_results, cd["type"])
 
@@ -3254,6 +3273,68 @@ def do_es_sweep_alert_query(
     return main_results, docket_results, rd_results
 
 
+def do_es_sweep_alert_query(
+    search_query: Search,
+    child_search_query: Search,
+    cd: CleanData,
+) -> tuple[list[Hit] | None, Response | None, Response | None]:
+    """Build an ES query for its use in the daily RECAP sweep index.
+
+    :param search_query: Elasticsearch DSL Search object.
+    :param child_search_query: The Elasticsearch DSL search query to perform
+    the child-only query.
+    :param cd: The query CleanedData
+    :return: A two-tuple, the Elasticsearch search query object and an ES
+    Query for child documents, or None if there is no need to query
+    child documents.
+    """
+
+    alert_searches = build_es_sweep_alert_searches(
+        search_query, child_search_query, cd
+    )
+    if alert_searches is None:
+        return None, None, None
+
+    multi_search = MultiSearch()
+    for search in alert_searches.searches:
+        multi_search = multi_search.add(search)
+    responses = multi_search.execute()
+    return process_es_sweep_alert_responses(alert_searches, responses)
+
+
+def do_es_sweep_alert_queries(
+    alerts_searches: list[EsSweepAlertSearches],
+) -> list[tuple[list[Hit], Response | None, Response | None] | None]:
+    """Run the searches of many sweep alerts in a single multi search
+    request.
+
+    :param alerts_searches: The searches of each alert.
+    :return: The results of each alert, in the same order, as returned by
+    do_es_sweep_alert_query. None for alerts whose searches failed.
+    """
+
+    multi_search = MultiSearch()
+    for alert_searches in alerts_searches:
+        for search in alert_searches.searches:
+            multi_search = multi_search.add(search)
+    # A failed search only fails its own alert.
+    responses = multi_search.execute(raise_on_error=False)
+
+    alerts_results = []
+    offset = 0
+    for alert_searches in alerts_searches:
+        searches_count = len(alert_searches.searches)
+        alert_responses = responses[offset : offset + searches_count]
+        offset += searches_count
+        if any(response is None for response in alert_responses):
+            alerts_results.append(None)
+            continue
+        alerts_results.append(
+            process_es_sweep_alert_responses(alert_searches, alert_responses)
+        )
+    return alerts_results
+
+
 def compute_lowest_possible_estimate(precision_threshold: int) -> int:
     """Estimates can be below reality by as much as 6%. Round numbers below that threshold.
     :return: The lowest possible estimate.
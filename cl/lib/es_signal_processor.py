@@ -1,6 +1,9 @@
+import threading
+from collections.abc import Callable
 from functools import partial
 
 from celery.canvas import chain
+from django.conf import settings
 from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
 from django.db import transaction
 from django.db.models.signals import m2m_changed, post_delete, post_save
@@ -40,13 +43,56 @@ from cl.search.models import (
     RECAPDocument,
 )
 from cl.search.tasks import (
+    add_es_updates_to_buffer,
+    dispatch_es_updates,
     es_save_document,
     get_es_doc_id_and_parent_id,
+    get_update_es_document_args,
+    is_percolated_es_update,
+    make_es_children_update_key,
+    make_es_document_update_key,
     remove_document_from_es_index,
-    update_children_docs_by_query,
     update_es_document,
 )
-from cl.search.types import ESDocumentClassType, ESModelType
+from cl.search.types import (
+    ESDocumentClassType,
+    ESDocumentNameType,
+    ESModelType,
+)
+
+# ES updates waiting for the current transaction to be committed.
+_pending_es_updates = threading.local()
+
+
+class PendingESUpdates:
+    """The ES updates buffered by a transaction, mapping each update key to
+    the fields to update.
+
+    The buffer is tied to its transaction through the position of its first
+    on_commit callback in the connection's list of callbacks. Once the
+    transaction is committed or rolled back, that callback is gone and the
+    next update starts a new buffer. Updates from a rolled back transaction
+    are then discarded along with their callbacks.
+    """
+
+    def __init__(self) -> None:
+        self.updates: dict[str, list[str]] = {}
+        self.first_callback: Callable[[], None] | None = None
+        self.first_callback_index = -1
+
+    def is_current(self, run_on_commit: list) -> bool:
+        """Check whether the buffer belongs to the current transaction.
+
+        :param run_on_commit: The on_commit callbacks of the connection.
+        :return: True if the buffer's first callback is still pending.
+        """
+        if self.first_callback is None:
+            return True
+        index = self.first_callback_index
+        return (
+            index < len(run_on_commit)
+            and run_on_commit[index][1] is self.first_callback
+        )
 
 
 def compose_app_label(instance: ESModelType) -> str:
@@ -158,6 +204,154 @@ def get_fields_to_update(
     return fields_to_update
 
 
+def get_pending_es_updates() -> PendingESUpdates:
+    """Get the ES updates buffered by the current transaction of this thread
+    that are waiting for it to be committed.
+
+    :return: The PendingESUpdates of the current transaction.
+    """
+    run_on_commit = transaction.get_connection().run_on_commit
+    pending = getattr(_pending_es_updates, "pending", None)
+    if pending is None or not pending.is_current(run_on_commit):
+        pending = PendingESUpdates()
+        _pending_es_updates.pending = pending
+    return pending
+
+
+def buffer_es_update(update_key: str, fields_to_update: list[str]) -> None:
+    """Buffer an ES update until the current transaction is committed.
+
+    Updates that share the same key, like the same document being updated from
+    the same related instance many times within a transaction, are merged
+    into a single update by combining their fields.
+
+    :param update_key: The key that identifies the update in the buffer.
+    :param fields_to_update: The fields to update.
+    :return: None
+    """
+    pending = get_pending_es_updates()
+    pending_fields = pending.updates.setdefault(update_key, [])
+    for field in fields_to_update:
+        if field not in pending_fields:
+            pending_fields.append(field)
+    # A flush is scheduled on every call, so an update whose first callback
+    # was discarded by a rolled back savepoint is still sent. Only the first
+    # callback for a key does the work, which keeps the update in the place
+    # of its first occurrence in the on_commit order.
+    callback = partial(flush_pending_es_updates, pending, update_key)
+    connection = transaction.get_connection()
+    if pending.first_callback is None and connection.in_atomic_block:
+        pending.first_callback = callback
+        pending.first_callback_index = len(connection.run_on_commit)
+    transaction.on_commit(callback)
+
+
+def flush_pending_es_updates(
+    pending: PendingESUpdates, update_key: str
+) -> None:
+    """Send a buffered ES update once its transaction has been committed.
+
+    Percolated updates are always scheduled right away. If the Redis ES update
+    buffer is enabled, every other pending update is moved to it at once to be
+    merged with updates from other transactions and sent in bulk. Otherwise,
+    the update is scheduled as its own task.
+
+    :param pending: The PendingESUpdates of the committed transaction.
+    :param update_key: The key that identifies the update in the buffer.
+    :return: None
+    """
+    pending_updates = pending.updates
+    if update_key not in pending_updates:
+        # The update was already sent by a previous callback.
+        return
+
+    if is_percolated_es_update(update_key):
+        chain(
+            update_es_document.si(
+                *get_update_es_document_args(
+                    update_key, pending_updates.pop(update_key)
+                )
+            ),
+            send_or_schedule_search_alerts.s(),
+            percolator_response_processing.s(),
+        ).apply_async()
+        return
+
+    if settings.ELASTICSEARCH_UPDATE_BUFFER_ENABLED:
+        # Move all the pending updates that don't need percolation to Redis.
+        add_es_updates_to_buffer(
+            {
+                key: pending_updates.pop(key)
+                for key in list(pending_updates.keys())
+                if not is_percolated_es_update(key)
+            }
+        )
+        return
+
+    dispatch_es_updates({update_key: pending_updates.pop(update_key)})
+
+
+def buffer_es_document_update(
+    es_document_name: ESDocumentNameType,
+    fields_to_update: list[str],
+    main_instance_data: tuple[str, int],
+    related_instance_data: tuple[str, int] | None = None,
+    fields_map: dict | None = None,
+    percolate: bool = False,
+) -> None:
+    """Buffer an update_es_document call until the current transaction is
+    committed.
+
+    :param es_document_name: The Elasticsearch document type name.
+    :param fields_to_update: A list containing the fields to update.
+    :param main_instance_data: A two tuple, the main instance app label and the
+    main instance ID to update.
+    :param related_instance_data: A two-tuple: the related instance's app label
+    and the related instance ID from which to extract field values. None if the
+    update doesn't involve a related instance.
+    :param fields_map: A dict containing fields that can be updated or None if
+    mapping is not required for the update.
+    :param percolate: Whether to percolate the document after the update to
+    send search alerts.
+    :return: None
+    """
+    buffer_es_update(
+        make_es_document_update_key(
+            es_document_name,
+            main_instance_data,
+            related_instance_data,
+            fields_map,
+            percolate,
+        ),
+        fields_to_update,
+    )
+
+
+def buffer_es_children_update(
+    es_document_name: ESDocumentNameType,
+    parent_instance_id: int,
+    fields_to_update: list[str],
+    fields_map: dict | None = None,
+) -> None:
+    """Buffer an update_children_docs_by_query call until the current
+    transaction is committed.
+
+    :param es_document_name: The Elasticsearch Document type name to update.
+    :param parent_instance_id: The parent instance ID containing the fields to
+    update.
+    :param fields_to_update: List of field names to be updated.
+    :param fields_map: A mapping from model fields to Elasticsearch document
+    fields.
+    :return: None
+    """
+    buffer_es_update(
+        make_es_children_update_key(
+            es_document_name, parent_instance_id, fields_map
+        ),
+        fields_to_update,
+    )
+
+
 def update_es_documents(
     main_model: ESModelType,
     es_document: ESDocumentClassType,
@@ -190,47 +384,31 @@ def update_es_documents(
             case RECAPDocument() | Docket() | ParentheticalGroup() | Audio() | Person() | Position() | OpinionCluster() | Opinion() if mapping_fields.get("self", None):  # type: ignore
                 # Update main document in ES, including fields to be
                 # extracted from a related instance.
-                transaction.on_commit(
-                    partial(
-                        chain(
-                            update_es_document.si(
-                                es_document.__name__,
-                                fields_to_update,
-                                (
-                                    compose_app_label(instance),
-                                    instance.pk,
-                                ),
-                                (compose_app_label(instance), instance.pk),
-                                fields_map,
-                            ),
-                            send_or_schedule_search_alerts.s(),
-                            percolator_response_processing.s(),
-                        ).apply_async
-                    )
+                buffer_es_document_update(
+                    es_document.__name__,
+                    fields_to_update,
+                    (compose_app_label(instance), instance.pk),
+                    (compose_app_label(instance), instance.pk),
+                    fields_map,
+                    percolate=True,
                 )
             case OpinionCluster() if es_document is OpinionDocument:  # type: ignore
-                transaction.on_commit(
-                    partial(
-                        update_children_docs_by_query.delay,
-                        es_document.__name__,
-                        instance.pk,
-                        fields_to_update,
-                        fields_map,
-                    )
+                buffer_es_children_update(
+                    es_document.__name__,
+                    instance.pk,
+                    fields_to_update,
+                    fields_map,
                 )
             case Docket() if es_document is OpinionDocument:  # type: ignore
                 related_record = OpinionCluster.objects.filter(
                     **{query: instance}
                 )
                 for cluster in related_record:
-                    transaction.on_commit(
-                        partial(
-                            update_children_docs_by_query.delay,
-                            es_document.__name__,
-                            cluster.pk,
-                            fields_to_update,
-                            fields_map,
-                        )
+                    buffer_es_children_update(
+                        es_document.__name__,
+                        cluster.pk,
+                        fields_to_update,
+                        fields_map,
                     )
             case Person() if es_document is PositionDocument and query == "person":  # type: ignore
                 """
@@ -241,14 +419,11 @@ def update_es_documents(
                 # doesn't have any positions or is not a Judge.
                 if not instance.positions.exists() or not instance.is_judge:
                     continue
-                transaction.on_commit(
-                    partial(
-                        update_children_docs_by_query.delay,
-                        es_document.__name__,
-                        instance.pk,
-                        fields_to_update,
-                        fields_map,
-                    )
+                buffer_es_children_update(
+                    es_document.__name__,
+                    instance.pk,
+                    fields_to_update,
+                    fields_map,
                 )
             case School() if es_document is PositionDocument:  # type: ignore
                 """
@@ -264,28 +439,22 @@ def update_es_documents(
                     # doesn't have any positions or is not a Judge.
                     if not person.positions.exists() or not person.is_judge:
                         continue
-                    transaction.on_commit(
-                        partial(
-                            update_children_docs_by_query.delay,
-                            es_document.__name__,
-                            person.pk,
-                            fields_to_update,
-                            fields_map,
-                        )
+                    buffer_es_children_update(
+                        es_document.__name__,
+                        person.pk,
+                        fields_to_update,
+                        fields_map,
                     )
             case Docket() if es_document is ESRECAPDocument:  # type: ignore
                 # Avoid calling update_children_docs_by_query if the Docket
                 # doesn't have any docket entries.
                 if not instance.docket_entries.exists():
                     continue
-                transaction.on_commit(
-                    partial(
-                        update_children_docs_by_query.delay,
-                        es_document.__name__,
-                        instance.pk,
-                        fields_to_update,
-                        fields_map,
-                    )
+                buffer_es_children_update(
+                    es_document.__name__,
+                    instance.pk,
+                    fields_to_update,
+                    fields_map,
                 )
             case Person() if es_document is ESRECAPDocument:  # type: ignore
                 related_dockets = Docket.objects.filter(**{query: instance})
@@ -294,14 +463,11 @@ def update_es_documents(
                     # doesn't have any docket entries.
                     if not rel_docket.docket_entries.exists():
                         continue
-                    transaction.on_commit(
-                        partial(
-                            update_children_docs_by_query.delay,
-                            es_document.__name__,
-                            rel_docket.pk,
-                            fields_to_update,
-                            fields_map,
-                        )
+                    buffer_es_children_update(
+                        es_document.__name__,
+                        rel_docket.pk,
+                        fields_to_update,
+                        fields_map,
                     )
             case _:
                 main_objects = main_model.objects.filter(**{query: instance})
@@ -309,18 +475,15 @@ def update_es_documents(
                     if fields_to_update:
                         # Update main document in ES, including fields to be
                         # extracted from a related instance.
-                        transaction.on_commit(
-                            partial(
-                                update_es_document.delay,
-                                es_document.__name__,
-                                fields_to_update,
-                                (
-                                    compose_app_label(main_object),
-                                    main_object.pk,
-                                ),
-                                (compose_app_label(instance), instance.pk),
-                                fields_map,
-                            )
+                        buffer_es_document_update(
+                            es_document.__name__,
+                            fields_to_update,
+                            (
+                                compose_app_label(main_object),
+                                main_object.pk,
+                            ),
+                            (compose_app_label(instance), instance.pk),
+                            fields_map,
                         )
 
 
@@ -367,31 +530,25 @@ def update_m2m_field_in_es_document(
     relationships with the instance.
     :return: None
     """
-    transaction.on_commit(
-        partial(
-            update_es_document.delay,
-            es_document.__name__,
-            [
-                affected_field,
-            ],
-            (compose_app_label(instance), instance.pk),
-            None,
-            None,
-        )
+    buffer_es_document_update(
+        es_document.__name__,
+        [
+            affected_field,
+        ],
+        (compose_app_label(instance), instance.pk),
+        None,
+        None,
     )
 
     if es_document is OpinionClusterDocument and isinstance(
         instance, OpinionCluster
     ):
-        transaction.on_commit(
-            partial(
-                update_children_docs_by_query.delay,
-                es_document.__name__,
-                instance.pk,
-                [
-                    affected_field,
-                ],
-            )
+        buffer_es_children_update(
+            es_document.__name__,
+            instance.pk,
+            [
+                affected_field,
+            ],
         )
 
 
@@ -431,20 +588,13 @@ def update_reverse_related_documents(
         # Avoid calling update_es_document if the Person is not a Judge.
         if isinstance(main_object, Person) and not main_object.is_judge:
             continue
-        transaction.on_commit(
-            partial(
-                chain(
-                    update_es_document.si(
-                        es_document.__name__,
-                        affected_fields,
-                        (compose_app_label(main_object), main_object.pk),
-                        related_instance,
-                        fields_map_to_pass,
-                    ),
-                    send_or_schedule_search_alerts.s(),
-                    percolator_response_processing.s(),
-                ).apply_async
-            )
+        buffer_es_document_update(
+            es_document.__name__,
+            affected_fields,
+            (compose_app_label(main_object), main_object.pk),
+            related_instance,
+            fields_map_to_pass,
+            percolate=True,
         )
 
     match instance:
@@ -457,23 +607,17 @@ def update_reverse_related_documents(
                 if not person.positions.exists() or not person.is_judge:
                     continue
 
-                transaction.on_commit(
-                    partial(
-                        update_children_docs_by_query.delay,
-                        PositionDocument.__name__,
-                        person.pk,
-                        affected_fields,
-                    )
-                )
-        case Citation() | Opinion() if es_document is OpinionClusterDocument:  # type: ignore
-            transaction.on_commit(
-                partial(
-                    update_children_docs_by_query.delay,
-                    OpinionDocument.__name__,
-                    instance.cluster.pk,
+                buffer_es_children_update(
+                    PositionDocument.__name__,
+                    person.pk,
                     affected_fields,
-                    fields_map_to_pass,
                 )
+        case Citation() | Opinion() if es_document is OpinionClusterDocument:  # type: ignore
+            buffer_es_children_update(
+                OpinionDocument.__name__,
+                instance.cluster.pk,
+                affected_fields,
+                fields_map_to_pass,
             )
         case BankruptcyInformation() if es_document is DocketDocument:  # type: ignore
             # bulk update RECAP documents when a reverse related record is created/updated.
@@ -481,13 +625,10 @@ def update_reverse_related_documents(
             # doesn't have any entries.
             if not instance.docket.docket_entries.exists():
                 return
-            transaction.on_commit(
-                partial(
-                    update_children_docs_by_query.delay,
-                    ESRECAPDocument.__name__,
-                    instance.docket.pk,
-                    affected_fields,
-                )
+            buffer_es_children_update(
+                ESRECAPDocument.__name__,
+                instance.docket.pk,
+                affected_fields,
             )
 
 
@@ -514,76 +655,58 @@ def delete_reverse_related_documents(
         case Person() if es_document is PersonDocument:  # type: ignore
             # Update the Person document after the reverse instanced is deleted
             # Update parent document in ES.
-            transaction.on_commit(
-                partial(
-                    update_es_document.delay,
-                    es_document.__name__,
-                    affected_fields,
-                    (compose_app_label(instance), instance.pk),
-                    None,
-                    None,
-                )
+            buffer_es_document_update(
+                es_document.__name__,
+                affected_fields,
+                (compose_app_label(instance), instance.pk),
+                None,
+                None,
             )
             # Avoid calling update_children_docs_by_query if the Person
             # doesn't have any positions or is not a Judge.
             if not instance.positions.exists() or not instance.is_judge:
                 return
             # Then update all their child documents (Positions)
-            transaction.on_commit(
-                partial(
-                    update_children_docs_by_query.delay,
-                    PositionDocument.__name__,
-                    instance.pk,
-                    affected_fields,
-                )
+            buffer_es_children_update(
+                PositionDocument.__name__,
+                instance.pk,
+                affected_fields,
             )
         case Docket() if es_document is DocketDocument:  # type: ignore
             # Update the Docket document after the reverse instanced is deleted
 
             # Update parent document in ES.
-            transaction.on_commit(
-                partial(
-                    update_es_document.delay,
-                    es_document.__name__,
-                    affected_fields,
-                    (compose_app_label(instance), instance.pk),
-                    None,
-                    None,
-                )
+            buffer_es_document_update(
+                es_document.__name__,
+                affected_fields,
+                (compose_app_label(instance), instance.pk),
+                None,
+                None,
             )
             # Avoid calling update_children_docs_by_query if the Docket
             # doesn't have any entries.
             if not instance.docket_entries.exists():
                 return
             # Then update all their child documents (RECAPDocuments)
-            transaction.on_commit(
-                partial(
-                    update_children_docs_by_query.delay,
-                    ESRECAPDocument.__name__,
-                    instance.pk,
-                    affected_fields,
-                )
+            buffer_es_children_update(
+                ESRECAPDocument.__name__,
+                instance.pk,
+                affected_fields,
             )
         case OpinionCluster() if es_document is OpinionClusterDocument:  # type: ignore
             # Update parent document in ES.
-            transaction.on_commit(
-                partial(
-                    update_es_document.delay,
-                    es_document.__name__,
-                    affected_fields,
-                    (compose_app_label(instance), instance.pk),
-                    None,
-                    None,
-                )
+            buffer_es_document_update(
+                es_document.__name__,
+                affected_fields,
+                (compose_app_label(instance), instance.pk),
+                None,
+                None,
             )
             # Then update all their child documents (Positions)
-            transaction.on_commit(
-                partial(
-                    update_children_docs_by_query.delay,
-                    OpinionDocument.__name__,
-                    instance.pk,
-                    affected_fields,
-                )
+            buffer_es_children_update(
+                OpinionDocument.__name__,
+                instance.pk,
+                affected_fields,
             )
         case _:
             main_objects = main_model.objects.filter(
@@ -591,15 +714,12 @@ def delete_reverse_related_documents(
             )
             for main_object in main_objects:
                 # Update main document in ES.
-                transaction.on_commit(
-                    partial(
-                        update_es_document.delay,
-                        es_document.__name__,
-                        affected_fields,
-                        (compose_app_label(main_object), main_object.pk),
-                        None,
-                        None,
-                    )
+                buffer_es_document_update(
+                    es_document.__name__,
+                    affected_fields,
+                    (compose_app_label(main_object), main_object.pk),
+                    None,
+                    None,
                 )
 
 
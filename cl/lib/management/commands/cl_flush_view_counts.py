@@ -0,0 +1,18 @@
+from django.conf import settings
+
+from cl.lib.command_utils import PeriodicCommand, logger
+from cl.lib.view_utils import flush_view_counts
+
+
+class Command(PeriodicCommand):
+    help = """Write the page view counts buffered in Redis to the DB
+    periodically. Views are counted in Redis when VIEW_COUNT_BUFFER_ENABLED is
+    set and written in bulk every VIEW_COUNT_FLUSH_INTERVAL seconds."""
+
+    def get_interval(self) -> int:
+        return int(settings.VIEW_COUNT_FLUSH_INTERVAL)
+
+    def run_once(self, testing_mode: bool) -> None:
+        updated = flush_view_counts(int(settings.VIEW_COUNT_FLUSH_BATCH_SIZE))
+        if updated:
+            logger.info("Updated the view count of %s objects.", updated)
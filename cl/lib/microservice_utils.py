@@ -1,13 +1,139 @@
+import asyncio
+import os
+import threading
+from collections.abc import AsyncIterator, Iterable
 from io import BufferedReader
+from urllib.parse import urlsplit
 
 from django.conf import settings
-from httpx import AsyncClient, Response
+from httpx import AsyncByteStream, AsyncClient, Limits, Response
 
 from cl.audio.models import Audio
 from cl.lib.search_utils import clean_up_recap_document_file
+from cl.lib.storage import get_presigned_url, open_for_streaming
 from cl.search.models import Opinion, RECAPDocument
 
 
+class ThreadedByteStream(AsyncByteStream):
+    """A request body read from a synchronous stream in worker threads.
+
+    httpx reads the files of multipart requests synchronously, which would
+    block the event loop shared by every microservice call while the files
+    are read from disk or S3. Each chunk is read in a thread instead.
+    """
+
+    def __init__(self, stream: Iterable[bytes]) -> None:
+        self.stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        chunks = iter(self.stream)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+
+
+class MicroserviceClient:
+    """A process-wide pool of HTTP/2 connections to our microservices.
+
+    Requests are sent from an event loop that runs in a background thread
+    for the life of the process, using one long-lived AsyncClient per
+    microservice host. That way connections are kept alive and reused across
+    calls, even when each call runs in its own short-lived event loop, as
+    happens with async_to_sync in Celery tasks. The loop is restarted after
+    a fork, since threads and sockets can't be shared between processes.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.thread: threading.Thread | None = None
+        self.pid: int | None = None
+        # These are only used from the background loop.
+        self.clients: dict[str, AsyncClient] = {}
+        self.semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background loop, or restart it if the process forked."""
+        with self.lock:
+            if self.loop is not None and self.pid == os.getpid():
+                return self.loop
+            self.pid = os.getpid()
+            self.clients = {}
+            self.semaphores = {}
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(
+                target=self.loop.run_forever,
+                name="microservice-client",
+                daemon=True,
+            )
+            self.thread.start()
+            return self.loop
+
+    def _get_client(self, url: str) -> AsyncClient:
+        """Get the client of the host of a microservice URL, so that every
+        host gets its own connection limits.
+        """
+        host = urlsplit(url).netloc
+        client = self.clients.get(host)
+        if client is None:
+            client = AsyncClient(
+                follow_redirects=True,
+                http2=True,
+                limits=Limits(
+                    max_connections=settings.MICROSERVICE_MAX_CONNECTIONS,
+                    max_keepalive_connections=(
+                        settings.MICROSERVICE_MAX_KEEPALIVE_CONNECTIONS
+                    ),
+                    keepalive_expiry=settings.MICROSERVICE_KEEPALIVE_EXPIRY,
+                ),
+            )
+            self.clients[host] = client
+        return client
+
+    def _get_semaphore(self, service: str) -> asyncio.Semaphore | None:
+        """Get the semaphore that bounds the concurrent requests to a
+        service, or None if they're not bounded.
+        """
+        if not settings.MICROSERVICE_MAX_CONCURRENCY:
+            return None
+        semaphore = self.semaphores.get(service)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(
+                settings.MICROSERVICE_MAX_CONCURRENCY
+            )
+            self.semaphores[service] = semaphore
+        return semaphore
+
+    async def _send(self, service: str, **request_kwargs) -> Response:
+        client = self._get_client(request_kwargs["url"])
+        req = client.build_request(**request_kwargs)
+        if request_kwargs.get("files"):
+            req.stream = ThreadedByteStream(req.stream)
+        semaphore = self._get_semaphore(service)
+        if semaphore is None:
+            return await client.send(req)
+        async with semaphore:
+            return await client.send(req)
+
+    async def send(self, service: str, **request_kwargs) -> Response:
+        """Send a request to a microservice using the pooled connections.
+
+        :param service: The service to call, used to bound its concurrency.
+        :param request_kwargs: The arguments for AsyncClient.build_request.
+        :return: The response from the microservice.
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(
+            self._send(service, **request_kwargs), loop
+        )
+        return await asyncio.wrap_future(future)
+
+
+microservice_client = MicroserviceClient()
+
+
 async def microservice(
     service: str,
     method: str = "POST",
@@ -46,41 +172,41 @@ async def microservice(
 
     # Handle our documents based on the type of model object
     # Sadly these are not uniform
+    field_file = None
     if item:
         if type(item) == RECAPDocument:
-            try:
-                files = {
-                    "file": (
-                        item.filepath_local.name,
-                        item.filepath_local.open(mode="rb"),
-                    )
-                }
-            except FileNotFoundError:
-                # The file is no longer available, clean it up in DB
-                await clean_up_recap_document_file(item)
+            field_file = item.filepath_local
         elif type(item) == Opinion:
-            files = {
-                "file": (
-                    item.local_path.name,
-                    item.local_path.open(mode="rb"),
-                )
-            }
+            field_file = item.local_path
         elif type(item) == Audio:
             match service:
                 case "downsize-audio":
-                    files = {
-                        "file": (
-                            item.local_path_mp3.name,
-                            item.local_path_mp3.open(mode="rb"),
-                        )
-                    }
+                    field_file = item.local_path_mp3
                 case _:
-                    files = {
-                        "file": (
-                            item.local_path_original_file.name,
-                            item.local_path_original_file.open(mode="rb"),
-                        )
-                    }
+                    field_file = item.local_path_original_file
+
+    presigned_url = None
+    if (
+        field_file is not None
+        and service in settings.MICROSERVICE_PRESIGNED_URL_SERVICES
+    ):
+        # Let the service download the file from storage by itself.
+        presigned_url = get_presigned_url(
+            field_file, settings.MICROSERVICE_PRESIGNED_URL_EXPIRY
+        )
+    if presigned_url:
+        data = {**(data or {}), "file_url": presigned_url}
+    elif field_file is not None:
+        try:
+            # Opening an S3 object is a blocking request, so keep it off the
+            # event loop.
+            stream = await asyncio.to_thread(open_for_streaming, field_file)
+            files = {"file": (field_file.name, stream)}
+        except FileNotFoundError:
+            if type(item) != RECAPDocument:
+                raise
+            # The file is no longer available, clean it up in DB
+            await clean_up_recap_document_file(item)
     # Sometimes we will want to pass in a filename and the file bytes
     # to avoid writing them to disk. Filename can often be generic
     # and is used to identify the file extension for our microservices
@@ -89,8 +215,9 @@ async def microservice(
     elif file:
         files = {"file": ("filename", file)}
 
-    async with AsyncClient(follow_redirects=True, http2=True) as client:
-        req = client.build_request(
+    try:
+        return await microservice_client.send(
+            service,
             method=method,
             url=services[service]["url"],  # type: ignore
             data=data,
@@ -98,5 +225,8 @@ async def microservice(
             params=params,
             timeout=services[service]["timeout"],
         )
-
-        return await client.send(req)
+    finally:
+        if files and files["file"][1] is not file:
+            # Close the files opened here, which releases the connection of
+            # streamed S3 objects. Files passed in are left to the caller.
+            files["file"][1].close()
@@ -1,4 +1,11 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections.abc import Sequence
+from math import ceil
+from typing import Any
+
 from django.core.paginator import Paginator
+from django.db.models import Q, QuerySet
 from django.utils.functional import cached_property
 
 
@@ -32,3 +39,242 @@ class ESPaginator(Paginator):
     def page(self, number):
         number = self.validate_number(number)
         return self._get_page(self.object_list, number, self)
+
+
+class InvalidCursor(Exception):
+    """The cursor of a KeysetPaginator page can't be decoded."""
+
+
+class KeysetPage(Sequence):
+    """A page of a KeysetPaginator.
+
+    It works like a Django Page in templates, but the pages around it are
+    linked with cursors. The page number is only used for display, and is
+    None when the position of the page is unknown.
+    """
+
+    def __init__(
+        self,
+        object_list: list[Any],
+        paginator: "KeysetPaginator",
+        number: int | None,
+        has_previous: bool,
+        has_next: bool,
+    ):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.number = number
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __repr__(self) -> str:
+        return f"<Page {self.number} of {self.paginator.num_pages}>"
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self.has_previous() or self.has_next()
+
+    def next_page_number(self) -> int | None:
+        return self.number + 1 if self.number else None
+
+    def previous_page_number(self) -> int | None:
+        return self.number - 1 if self.number and self.number > 1 else None
+
+    @property
+    def next_cursor(self) -> str | None:
+        """The cursor of the page after this one."""
+        if not self.has_next() or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self) -> str | None:
+        """The cursor of the page before this one."""
+        if not self.has_previous() or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0])
+
+
+class KeysetPaginator:
+    """Paginate a queryset by the values of its ordering keys instead of with
+    an OFFSET, so deep pages are as fast as the first one and no COUNT is
+    needed to render them.
+
+    The keys must be non-null and unique together; annotate a Coalesce for
+    nullable fields. Cursors hold the keys of the first or last object of a
+    page, so they must be JSON serializable. The number of pages is
+    estimated from the count provided, which can be stale.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        per_page: int,
+        keys: Sequence[str],
+        descending: bool = False,
+        count: int | None = None,
+    ):
+        self.per_page = per_page
+        self.keys = list(keys)
+        self.descending = descending
+        self.count = count
+        ascending_order = self.keys
+        descending_order = [f"-{key}" for key in self.keys]
+        self.queryset = queryset.order_by(
+            *(descending_order if descending else ascending_order)
+        )
+        self.reversed_queryset = queryset.order_by(
+            *(ascending_order if descending else descending_order)
+        )
+
+    @cached_property
+    def num_pages(self) -> int:
+        """The estimated number of pages."""
+        if not self.count:
+            return 1
+        return ceil(self.count / self.per_page)
+
+    def encode_cursor(self, obj: Any) -> str:
+        values = [getattr(obj, key) for key in self.keys]
+        return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor: str) -> list[Any]:
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor(cursor) from e
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            raise InvalidCursor(cursor)
+        return values
+
+    def _keyset_filter(
+        self, values: list[Any], after: bool, inclusive: bool = False
+    ) -> Q:
+        """Build the filter for the objects after or before a set of keys
+        in the order of the paginator.
+
+        :param values: The values of the keys.
+        :param after: Whether to match the objects after the keys or the
+        ones before them.
+        :param inclusive: Whether to match the object with the keys too.
+        :return: A Q object comparing the keys lexicographically.
+        """
+        lookup = "gt" if after != self.descending else "lt"
+        keyset_filter = Q()
+        for i, key in enumerate(self.keys):
+            key_lookup = lookup
+            if inclusive and i == len(self.keys) - 1:
+                key_lookup = f"{lookup}e"
+            keyset_filter |= Q(
+                **dict(zip(self.keys[:i], values[:i])),
+                **{f"{key}__{key_lookup}": values[i]},
+            )
+        return keyset_filter
+
+    def _page_forward(
+        self, queryset: QuerySet, number: int | None, has_previous: bool
+    ) -> KeysetPage:
+        objects = list(queryset[: self.per_page + 1])
+        return KeysetPage(
+            objects[: self.per_page],
+            self,
+            number,
+            has_previous=has_previous,
+            has_next=len(objects) > self.per_page,
+        )
+
+    def _page_backward(
+        self, queryset: QuerySet, number: int | None, has_next: bool
+    ) -> KeysetPage:
+        objects = list(queryset[: self.per_page + 1])
+        return KeysetPage(
+            objects[: self.per_page][::-1],
+            self,
+            number,
+            has_previous=len(objects) > self.per_page,
+            has_next=has_next,
+        )
+
+    def first_page(self) -> KeysetPage:
+        return self._page_forward(self.queryset, 1, has_previous=False)
+
+    def last_page(self) -> KeysetPage:
+        return self._page_backward(
+            self.reversed_queryset, self.num_pages, has_next=False
+        )
+
+    def page_after(self, cursor: str, number: int | None = None) -> KeysetPage:
+        """Get the page after a cursor, or the last page if there's
+        nothing after it.
+        """
+        values = self.decode_cursor(cursor)
+        page = self._page_forward(
+            self.queryset.filter(self._keyset_filter(values, after=True)),
+            number,
+            has_previous=True,
+        )
+        return page if page else self.last_page()
+
+    def page_before(
+        self, cursor: str, number: int | None = None
+    ) -> KeysetPage:
+        """Get the page before a cursor, or the first page if there's
+        nothing before it.
+        """
+        values = self.decode_cursor(cursor)
+        page = self._page_backward(
+            self.reversed_queryset.filter(
+                self._keyset_filter(values, after=False)
+            ),
+            number,
+            has_next=True,
+        )
+        return page if page else self.first_page()
+
+    def page_from(self, obj: Any) -> KeysetPage:
+        """Get the page that starts with an object, e.g. to jump to it."""
+        values = [getattr(obj, key) for key in self.keys]
+        has_previous = self.reversed_queryset.filter(
+            self._keyset_filter(values, after=False)
+        ).exists()
+        return self._page_forward(
+            self.queryset.filter(
+                self._keyset_filter(values, after=True, inclusive=True)
+            ),
+            None,
+            has_previous=has_previous,
+        )
+
+    def page(self, number: int | str) -> KeysetPage:
+        """Get a page by its number, like Django's Paginator does.
+
+        This uses an OFFSET, so it's only meant for links made before
+        cursors were used. Invalid numbers get the first page and numbers out
+        of range get the last one, which can also be requested with "last".
+        """
+        if number == "last":
+            return self.last_page()
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return self.first_page()
+        if number == 1:
+            return self.first_page()
+        if number < 1:
+            return self.last_page()
+        bottom = (number - 1) * self.per_page
+        page = self._page_forward(
+            self.queryset[bottom:], number, has_previous=True
+        )
+        return page if page else self.last_page()
@@ -1,12 +1,15 @@
 import itertools
 import os
 import uuid
-from typing import Dict, Optional
+from typing import IO, Dict, Optional
 
+from botocore.exceptions import ClientError
 from django.conf import settings
 from django.core.files.storage import Storage
+from django.db.models.fields.files import FieldFile
 from storages.backends.s3 import S3ManifestStaticStorage, S3Storage
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name, safe_join
 
 
 def clobbering_get_name(
@@ -55,6 +58,64 @@ def get_name_by_incrementing(
     return name
 
 
+def get_s3_key(storage: S3Storage, name: str) -> str:
+    """Get the S3 key of a file name in a storage."""
+    return safe_join(storage.location, clean_name(name))
+
+
+def check_has_file(field_file: FieldFile) -> None:
+    """Raise the same ValueError as FieldFile.open if there's no file
+    associated with a FieldFile.
+    """
+    if not field_file:
+        raise ValueError(
+            f"The '{field_file.field.name}' attribute has no file associated "
+            "with it."
+        )
+
+
+def open_for_streaming(field_file: FieldFile) -> IO[bytes]:
+    """Open a stored file to be read sequentially in chunks.
+
+    Opening a file from S3 storage downloads the whole object to memory
+    before it can be read. Instead, this returns the body of the S3 object,
+    which is read from the network as it's consumed, so uploading it
+    somewhere else keeps memory usage flat regardless of the file size.
+    Files in other storages are opened as usual. Close the returned object
+    once done with it, so its connection is released.
+
+    :param field_file: The file to open.
+    :return: A binary file-like object.
+    """
+    check_has_file(field_file)
+    storage = field_file.storage
+    if not isinstance(storage, S3Storage):
+        return field_file.open(mode="rb")
+
+    s3_object = storage.bucket.Object(get_s3_key(storage, field_file.name))
+    try:
+        return s3_object.get()["Body"]
+    except ClientError as e:
+        if e.response["ResponseMetadata"]["HTTPStatusCode"] == 404:
+            raise FileNotFoundError(field_file.name) from e
+        raise
+
+
+def get_presigned_url(field_file: FieldFile, expires_in: int) -> str | None:
+    """Get a URL to download a stored file from. It's presigned unless the
+    storage serves its files publicly.
+
+    :param field_file: The file to get the URL of.
+    :param expires_in: The number of seconds a presigned URL is valid for.
+    :return: The URL, or None if the file is not in S3 storage.
+    """
+    check_has_file(field_file)
+    storage = field_file.storage
+    if not isinstance(storage, S3Storage):
+        return None
+    return storage.url(field_file.name, expire=expires_in)
+
+
 class AWSMediaStorage(S3Storage):
     """Implements AWS file system storage with a few overrides"""
 
@@ -1,17 +1,29 @@
+import asyncio
 import datetime
 import pickle
+import threading
+from io import BytesIO
 from typing import Tuple, TypedDict, cast
-from unittest.mock import patch
+from unittest.mock import MagicMock, PropertyMock, patch
+from urllib.parse import urlsplit
 
 from asgiref.sync import async_to_sync
+from botocore.exceptions import ClientError
 from django.conf import settings
 from django.core.files.base import ContentFile
+from django.db import transaction
 from django.test import override_settings
+from httpx import AsyncClient, Response
 from requests.cookies import RequestsCookieJar
 
 from cl.lib.date_time import midnight_pt
 from cl.lib.elasticsearch_utils import append_query_conjunctions
+from cl.lib.es_signal_processor import (
+    buffer_es_children_update,
+    buffer_es_document_update,
+)
 from cl.lib.filesizes import convert_size_to_bytes
+from cl.lib.microservice_utils import microservice, microservice_client
 from cl.lib.mime_types import lookup_mime_type
 from cl.lib.model_helpers import (
     clean_docket_number,
@@ -41,6 +53,7 @@ from cl.lib.redis_utils import (
     release_redis_lock,
 )
 from cl.lib.search_utils import make_fq
+from cl.lib.storage import AWSMediaStorage, open_for_streaming
 from cl.lib.string_utils import normalize_dashes, trunc
 from cl.lib.utils import (
     check_for_proximity_tokens,
@@ -57,6 +70,13 @@ from cl.search.factories import (
     OpinionClusterFactoryMultipleOpinions,
 )
 from cl.search.models import Court, Docket, Opinion, OpinionCluster
+from cl.search.tasks import (
+    ES_UPDATE_BUFFER_KEY,
+    add_es_updates_to_buffer,
+    flush_es_update_buffer,
+    make_es_children_update_key,
+    make_es_document_update_key,
+)
 from cl.tests.cases import SimpleTestCase, TestCase
 
 
@@ -1226,6 +1246,307 @@ class TestRedisUtils(SimpleTestCase):
         self.assertEqual(result, 1)
 
 
+class TestMicroserviceClient(SimpleTestCase):
+    """Test the pooled microservice client."""
+
+    def test_client_is_shared_across_calls(self) -> None:
+        """Are connections to a microservice host reused by calls made from
+        different event loops?
+        """
+
+        clients = set()
+
+        async def send(client, request, *args, **kwargs):
+            clients.add(id(client))
+            return Response(200, text="1", request=request)
+
+        with patch.object(AsyncClient, "send", new=send):
+            for service in ["page-count", "page-count", "mime-type"]:
+                # Each async_to_sync call runs in its own event loop.
+                response = async_to_sync(microservice)(
+                    service=service, file=b"%PDF-1.4", file_type="pdf"
+                )
+                self.assertEqual(response.text, "1")
+
+        # Both services are hosted by doctor, so they share its client.
+        self.assertEqual(len(clients), 1)
+        self.assertIn(
+            urlsplit(settings.DOCTOR_HOST).netloc,
+            microservice_client.clients,
+        )
+
+    @override_settings(MICROSERVICE_MAX_CONCURRENCY=2)
+    def test_bounded_concurrency(self) -> None:
+        """Are concurrent requests to a service bounded?"""
+
+        in_flight = 0
+        max_in_flight = 0
+
+        async def send(client, request, *args, **kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return Response(200, request=request)
+
+        async def call_many():
+            await asyncio.gather(
+                *[
+                    microservice(service="buffer-extension", file=b"data")
+                    for _ in range(6)
+                ]
+            )
+
+        with patch.object(AsyncClient, "send", new=send):
+            async_to_sync(call_many)()
+        self.assertEqual(max_in_flight, 2)
+
+    def test_files_are_read_off_the_event_loop(self) -> None:
+        """Are uploaded files read in worker threads, instead of blocking the
+        event loop shared by every microservice call?
+        """
+
+        read_threads = set()
+
+        class RecordingFile(BytesIO):
+            def read(self, *args, **kwargs):
+                read_threads.add(threading.current_thread().name)
+                return super().read(*args, **kwargs)
+
+        bodies = []
+
+        async def send(client, request, *args, **kwargs):
+            bodies.append(await request.aread())
+            return Response(200, request=request)
+
+        with patch.object(AsyncClient, "send", new=send):
+            async_to_sync(microservice)(
+                service="page-count",
+                file=RecordingFile(b"%PDF-1.4"),
+                file_type="pdf",
+            )
+        self.assertIn(b"%PDF-1.4", bodies[0])
+        self.assertTrue(read_threads)
+        self.assertNotIn(microservice_client.thread.name, read_threads)
+
+
+class TestMicroserviceFileUploads(SimpleTestCase):
+    """Test how stored files are sent to microservices."""
+
+    def setUp(self) -> None:
+        self.bucket = MagicMock()
+        self.bucket.name = "test-bucket"
+        self.bucket.Object.return_value.get.return_value = {
+            "Body": BytesIO(b"%PDF-1.4")
+        }
+        bucket_patcher = patch.object(
+            AWSMediaStorage,
+            "bucket",
+            new_callable=PropertyMock,
+            return_value=self.bucket,
+        )
+        bucket_patcher.start()
+        self.addCleanup(bucket_patcher.stop)
+        self.opinion = Opinion(local_path="pdf/opinion.pdf")
+
+    def send_opinion(self, service: str) -> bytes:
+        """Call a microservice with the opinion and return the body of the
+        request sent.
+        """
+        bodies = []
+
+        async def send(client, request, *args, **kwargs):
+            bodies.append(await request.aread())
+            return Response(200, request=request)
+
+        with patch.object(AsyncClient, "send", new=send):
+            async_to_sync(microservice)(service=service, item=self.opinion)
+        return bodies[0]
+
+    def test_stream_file_from_s3(self) -> None:
+        """Are files in S3 streamed from the object body instead of being
+        opened as a whole?
+        """
+        body = self.send_opinion("page-count")
+
+        self.bucket.Object.assert_called_once_with("pdf/opinion.pdf")
+        self.assertIn(b'filename="pdf/opinion.pdf"', body)
+        self.assertIn(b"%PDF-1.4", body)
+
+    @override_settings(MICROSERVICE_PRESIGNED_URL_SERVICES=["page-count"])
+    def test_send_presigned_url(self) -> None:
+        """Do services that can download files by themselves get a presigned
+        URL instead of the file?
+        """
+        body = self.send_opinion("page-count")
+
+        self.bucket.Object.assert_not_called()
+        self.assertIn(b"file_url=https%3A%2F%2F", body)
+        self.assertIn(b"pdf%2Fopinion.pdf", body)
+        self.assertNotIn(b"%PDF-1.4", body)
+
+    def test_close_streamed_file(self) -> None:
+        """Is the body of the S3 object closed once it's sent, so its
+        connection is released?
+        """
+        s3_body = self.bucket.Object.return_value.get.return_value["Body"]
+        self.send_opinion("page-count")
+        self.assertTrue(s3_body.closed)
+
+    def test_empty_file(self) -> None:
+        """Does sending an item without a file fail instead of sending the
+        request without it?
+        """
+        with self.assertRaises(ValueError):
+            async_to_sync(microservice)(
+                service="page-count", item=Opinion(local_path="")
+            )
+        self.bucket.Object.assert_not_called()
+
+    def test_missing_file_in_s3(self) -> None:
+        """Is a missing S3 object reported as a missing file?"""
+        self.bucket.Object.return_value.get.side_effect = ClientError(
+            {
+                "Error": {"Code": "NoSuchKey"},
+                "ResponseMetadata": {"HTTPStatusCode": 404},
+            },
+            "GetObject",
+        )
+        with self.assertRaises(FileNotFoundError):
+            open_for_streaming(self.opinion.local_path)
+
+
+class TestESUpdateBuffer(TestCase):
+    """Test the buffering of ES updates triggered by signals."""
+
+    def setUp(self) -> None:
+        r = get_redis_interface("CACHE")
+        keys = r.keys(f"{ES_UPDATE_BUFFER_KEY}*")
+        if keys:
+            r.delete(*keys)
+
+    @patch("cl.lib.es_signal_processor.dispatch_es_updates")
+    def test_merge_updates_within_a_transaction(self, mock_dispatch) -> None:
+        """Are updates to the same document within a transaction merged?"""
+        with self.captureOnCommitCallbacks(execute=True):
+            buffer_es_document_update(
+                "DocketDocument", ["case_name"], ("search.Docket", 1)
+            )
+            buffer_es_document_update(
+                "DocketDocument",
+                ["docket_number", "case_name"],
+                ("search.Docket", 1),
+            )
+            buffer_es_document_update(
+                "DocketDocument", ["case_name"], ("search.Docket", 2)
+            )
+            buffer_es_children_update(
+                "ESRECAPDocument", 1, ["case_name"], {"case_name": ["a"]}
+            )
+            buffer_es_children_update(
+                "ESRECAPDocument", 1, ["cause"], {"case_name": ["a"]}
+            )
+
+        self.assertEqual(mock_dispatch.call_count, 3)
+        dispatched = [
+            list(call.args[0].values())[0]
+            for call in mock_dispatch.call_args_list
+        ]
+        self.assertEqual(
+            dispatched,
+            [
+                ["case_name", "docket_number"],
+                ["case_name"],
+                ["case_name", "cause"],
+            ],
+        )
+
+    @patch("cl.lib.es_signal_processor.dispatch_es_updates")
+    def test_discard_updates_of_rolled_back_transactions(
+        self, mock_dispatch
+    ) -> None:
+        """Are updates buffered by a rolled back transaction discarded
+        instead of being sent along with the next transaction?
+        """
+
+        class Rollback(Exception):
+            pass
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    buffer_es_document_update(
+                        "DocketDocument", ["cause"], ("search.Docket", 1)
+                    )
+                    raise Rollback
+            except Rollback:
+                pass
+            buffer_es_document_update(
+                "DocketDocument", ["case_name"], ("search.Docket", 1)
+            )
+
+        mock_dispatch.assert_called_once()
+        self.assertEqual(
+            list(mock_dispatch.call_args.args[0].values()), [["case_name"]]
+        )
+
+    @patch("cl.search.tasks.ES_UPDATE_BUFFER_MAX_FLUSH_PASSES", 1)
+    @patch("cl.search.tasks.bulk_update_es_documents.delay")
+    def test_flush_is_capped(self, mock_bulk_update) -> None:
+        """Does a flush stop after a fixed number of batches, leaving the
+        rest of the buffer for the next one?
+        """
+        add_es_updates_to_buffer(
+            {
+                make_es_document_update_key(
+                    "DocketDocument", ("search.Docket", pk)
+                ): ["case_name"]
+                for pk in [1, 2]
+            }
+        )
+        with self.settings(ELASTICSEARCH_UPDATE_BUFFER_MAX_SIZE=1):
+            self.assertEqual(flush_es_update_buffer(ignore_window=True), 1)
+            self.assertEqual(flush_es_update_buffer(ignore_window=True), 1)
+            self.assertEqual(flush_es_update_buffer(ignore_window=True), 0)
+
+    @patch("cl.search.tasks.bulk_update_es_documents.delay")
+    @patch("cl.search.tasks.update_children_docs_by_query.delay")
+    def test_redis_buffer_merges_and_flushes_in_bulk(
+        self, mock_children_update, mock_bulk_update
+    ) -> None:
+        """Are updates merged in the Redis buffer and flushed in bulk?"""
+        document_key = make_es_document_update_key(
+            "DocketDocument", ("search.Docket", 1)
+        )
+        children_key = make_es_children_update_key("ESRECAPDocument", 1)
+        add_es_updates_to_buffer({document_key: ["case_name"]})
+        add_es_updates_to_buffer(
+            {document_key: ["cause"], children_key: ["case_name"]}
+        )
+
+        # Nothing is flushed until the window has passed.
+        self.assertEqual(flush_es_update_buffer(), 0)
+        self.assertEqual(flush_es_update_buffer(ignore_window=True), 2)
+
+        mock_children_update.assert_called_once_with(
+            "ESRECAPDocument", 1, ["case_name"], None, None
+        )
+        mock_bulk_update.assert_called_once_with(
+            [
+                (
+                    "DocketDocument",
+                    ["case_name", "cause"],
+                    ("search.Docket", 1),
+                    None,
+                    None,
+                )
+            ]
+        )
+        # The buffer is empty after the flush.
+        self.assertEqual(flush_es_update_buffer(ignore_window=True), 0)
+
+
 class TestLinkifyOrigDocketNumber(SimpleTestCase):
     def test_linkify_orig_docket_number(self):
         test_pairs = [
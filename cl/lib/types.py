@@ -199,6 +199,22 @@ class EsMainQueries:
     child_query: QueryString | None = None
 
 
+@dataclass
+class EsSweepAlertSearches:
+    cd: CleanData
+    main_search: Search
+    parent_search: Search | None = None
+    child_search: Search | None = None
+
+    @property
+    def searches(self) -> list[Search]:
+        return [
+            s
+            for s in (self.main_search, self.parent_search, self.child_search)
+            if s is not None
+        ]
+
+
 @dataclass
 class ApiPositionMapping(BasePositionMapping):
     position_type_dict: defaultdict[int, list[str]] = field(
@@ -1,7 +1,29 @@
-from django.db.models import F
+from itertools import batched
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Model, Value, When
 
 from cl.lib.bot_detector import is_bot
 from cl.lib.model_helpers import suppress_autotime
+from cl.lib.redis_utils import get_redis_interface
+
+VIEW_COUNTS_PREFIX = "view_counts"
+VIEW_COUNTS_FLUSHING_PREFIX = "view_counts_flushing"
+
+
+def make_view_counts_key(label: str, flushing: bool = False) -> str:
+    """Make the key of the Redis hash that holds the pending view counts of
+    the objects of a model.
+
+    :param label: The lowercase label of the model, e.g. "search.docket".
+    :param flushing: Whether to make the key of the hash that is being
+    written to the DB.
+    :return: The Redis key.
+    """
+    prefix = VIEW_COUNTS_FLUSHING_PREFIX if flushing else VIEW_COUNTS_PREFIX
+    return f"{prefix}:{label}"
 
 
 async def increment_view_count(obj, request):
@@ -14,10 +36,20 @@ async def increment_view_count(obj, request):
       3. Do this using an atomic DB query for performance and don't reload from
          the database after the increment (which would take another query).
 
+    If VIEW_COUNT_BUFFER_ENABLED is set, the view is counted in Redis instead
+    and written to the DB later by cl_flush_view_counts. The object then gets
+    its DB value plus the views still pending.
+
     :param obj: A django object containing a view_count parameter
     :param request: A django request so we can detect if it's a bot
     :return: Nothing. The obj is passed by reference
     """
+    if settings.VIEW_COUNT_BUFFER_ENABLED:
+        obj.view_count += await sync_to_async(get_pending_view_count)(
+            obj, increment=not is_bot(request)
+        )
+        return
+
     if not is_bot(request):
         cached_value = obj.view_count
 
@@ -28,3 +60,63 @@ async def increment_view_count(obj, request):
         # To get the new value, you either need to get the item from the DB a
         # second time, or just manipulate it manually....
         obj.view_count = cached_value + 1
+
+
+def get_pending_view_count(obj: Model, increment: bool = False) -> int:
+    """Get the views of an object that are buffered in Redis and not yet
+    written to the DB.
+
+    :param obj: A django object containing a view_count parameter
+    :param increment: Whether to count a new view first.
+    :return: The number of pending views.
+    """
+    r = get_redis_interface("STATS")
+    label = obj._meta.label_lower
+    pipe = r.pipeline()
+    if increment:
+        pipe.hincrby(make_view_counts_key(label), obj.pk, 1)
+    else:
+        pipe.hget(make_view_counts_key(label), obj.pk)
+    # Views that are being written to the DB right now are still pending.
+    pipe.hget(make_view_counts_key(label, flushing=True), obj.pk)
+    return sum(int(count or 0) for count in pipe.execute())
+
+
+def flush_view_counts(batch_size: int) -> int:
+    """Write the view counts buffered in Redis to the DB.
+
+    The pending views of each model are moved to a separate hash, so views
+    keep being counted while they're flushed, and are written with one bulk
+    UPDATE per batch of objects. A hash left over by an interrupted flush is
+    finished before new views are moved.
+
+    :param batch_size: The number of objects to update per query.
+    :return: The number of objects whose view count was updated.
+    """
+    r = get_redis_interface("STATS")
+    for key in r.scan_iter(match=f"{VIEW_COUNTS_PREFIX}:*"):
+        label = key.split(":", 1)[1]
+        r.renamenx(key, make_view_counts_key(label, flushing=True))
+
+    updated = 0
+    for key in r.scan_iter(match=f"{VIEW_COUNTS_FLUSHING_PREFIX}:*"):
+        model = apps.get_model(key.split(":", 1)[1])
+        # The flushing hash only changes here, so it can be read at once.
+        pending = r.hgetall(key)
+        for batch in batched(pending.items(), batch_size):
+            view_counts = {int(pk): int(count) for pk, count in batch}
+            # Use update() so date_modified isn't touched. Unlike single
+            # increments, which use save(), this skips the model's signals.
+            updated += model.objects.filter(pk__in=view_counts).update(
+                view_count=F("view_count")
+                + Case(
+                    *[
+                        When(pk=pk, then=Value(count))
+                        for pk, count in view_counts.items()
+                    ],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+            r.hdel(key, *view_counts)
+    return updated
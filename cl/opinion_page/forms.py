@@ -79,6 +79,8 @@ class DocketEntryFilterForm(forms.Form):
             attrs={"class": "form-control", "autocomplete": "off"}
         ),
     )
+    # Jump to the page that starts with this entry number.
+    entry = forms.IntegerField(required=False, min_value=0)
     filed_after = FloorDateField(
         required=False,
         label="Filed After",
@@ -33,6 +33,7 @@ from cl.lib.test_helpers import (
     SimpleUserDataMixin,
     SitemapTest,
 )
+from cl.lib.view_utils import get_pending_view_count
 from cl.opinion_page.forms import (
     MeCourtUploadForm,
     MissCourtUploadForm,
@@ -824,6 +825,110 @@ class ViewRecapDocketTest(TestCase):
         await self.docket_appellate.arefresh_from_db(fields=["view_count"])
         self.assertEqual(old_view_count + 1, self.docket_appellate.view_count)
 
+    @override_settings(VIEW_COUNT_BUFFER_ENABLED=True)
+    async def test_buffered_docket_view_counts(self) -> None:
+        """Are docket views counted in Redis and written to the DB in bulk
+        by cl_flush_view_counts?
+        """
+        r = get_redis_interface("STATS")
+        keys = r.keys("view_counts*")
+        if keys:
+            r.delete(*keys)
+
+        old_view_count = self.docket.view_count
+        url = reverse("view_docket", args=[self.docket.pk, self.docket.slug])
+        for _ in range(3):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        # The views are pending in Redis, not in the DB yet.
+        await self.docket.arefresh_from_db(fields=["view_count"])
+        self.assertEqual(old_view_count, self.docket.view_count)
+        self.assertEqual(get_pending_view_count(self.docket), 3)
+
+        await sync_to_async(call_command)(
+            "cl_flush_view_counts", testing_mode=True
+        )
+        await self.docket.arefresh_from_db(fields=["view_count"])
+        self.assertEqual(old_view_count + 3, self.docket.view_count)
+        self.assertEqual(get_pending_view_count(self.docket), 0)
+        self.assertEqual(r.keys("view_counts*"), [])
+
+    @override_settings(DOCKET_ENTRIES_PAGE_SIZE=10)
+    async def test_docket_entries_keyset_pagination(self) -> None:
+        """Can we page through the docket entries with cursors in both
+        orders, and jump to an entry?
+        """
+        docket = await sync_to_async(DocketFactory)(
+            court=self.court, source=Docket.RECAP
+        )
+        for i in range(25):
+            await DocketEntry.objects.acreate(
+                docket=docket,
+                # Some entries are unnumbered.
+                entry_number=i + 1 if i % 5 else None,
+                recap_sequence_number=f"2020-01-{i // 2 + 1:02}.001",
+            )
+        url = reverse("view_docket", args=[docket.pk, docket.slug])
+
+        for order_by, ordering in [
+            ("asc", ["recap_sequence_number", "entry_number"]),
+            ("desc", ["-recap_sequence_number", "-entry_number"]),
+        ]:
+            expected = [
+                pk
+                async for pk in DocketEntry.objects.filter(docket=docket)
+                .order_by(*ordering)
+                .values_list("pk", flat=True)
+            ]
+
+            # Forward from the first page.
+            params = {"order_by": order_by}
+            seen = []
+            while True:
+                r = await self.async_client.get(url, params)
+                self.assertEqual(r.status_code, HTTPStatus.OK)
+                page = r.context["docket_entries"]
+                seen.extend(de.pk for de in page)
+                if not page.has_next():
+                    break
+                params = {
+                    "order_by": order_by,
+                    "after": page.next_cursor,
+                    "page": page.next_page_number(),
+                }
+            self.assertEqual(seen, expected)
+            self.assertEqual(page.number, 3)
+            self.assertEqual(page.paginator.num_pages, 3)
+
+            # Backward from the last page.
+            params = {"order_by": order_by, "page": "last"}
+            seen = []
+            while True:
+                r = await self.async_client.get(url, params)
+                page = r.context["docket_entries"]
+                seen = [de.pk for de in page] + seen
+                if not page.has_previous():
+                    break
+                params = {
+                    "order_by": order_by,
+                    "before": page.previous_cursor,
+                    "page": page.previous_page_number(),
+                }
+            self.assertEqual(seen, expected)
+            self.assertEqual(page.number, 1)
+
+        # Jump to an entry.
+        r = await self.async_client.get(url, {"entry": 14})
+        page = r.context["docket_entries"]
+        self.assertEqual(page[0].entry_number, 14)
+        self.assertTrue(page.has_previous())
+        self.assertIsNone(page.number)
+
+        # A bad cursor gets the first page.
+        r = await self.async_client.get(url, {"after": "bad-cursor"})
+        self.assertEqual(r.context["docket_entries"].number, 1)
+
     async def test_pagination_returns_last_page_if_page_out_of_range(self):
         """
         Verify that the Docket view handles out-of-range page requests by returning
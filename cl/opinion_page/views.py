@@ -7,11 +7,19 @@ from urllib.parse import urlencode
 import eyecite
 import waffle
 from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
 from django.contrib import messages
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import IntegerField, Prefetch
-from django.db.models.functions import Cast
+from django.db.models import (
+    BigIntegerField,
+    IntegerField,
+    Prefetch,
+    QuerySet,
+    Value,
+)
+from django.db.models.functions import Cast, Coalesce
 from django.http import HttpRequest, HttpResponseRedirect
 from django.http.response import (
     Http404,
@@ -26,7 +34,6 @@ from django.urls import reverse
 from django.utils.timezone import now
 from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
-from eyecite.tokenizers import HyperscanTokenizer
 from reporters_db import (
     EDITIONS,
     NAMES_TO_EDITIONS,
@@ -36,6 +43,7 @@ from reporters_db import (
 from seal_rookery.search import ImageSizes, seal
 
 from cl.citations.parenthetical_utils import get_or_create_parenthetical_groups
+from cl.citations.tokenizers import HYPERSCAN_TOKENIZER
 from cl.citations.utils import (
     SLUGIFIED_EDITIONS,
     filter_out_non_case_law_citations,
@@ -55,6 +63,7 @@ from cl.lib.decorators import cache_page_ignore_params
 from cl.lib.http import is_ajax
 from cl.lib.model_helpers import choices_to_csv
 from cl.lib.models import THUMBNAIL_STATUSES
+from cl.lib.paginators import InvalidCursor, KeysetPage, KeysetPaginator
 from cl.lib.ratelimiter import ratelimiter_all_10_per_h
 from cl.lib.search_utils import (
     get_citing_clusters_with_cache,
@@ -98,8 +107,6 @@ from cl.search.models import (
 from cl.search.selectors import get_clusters_from_citation_str
 from cl.search.views import do_es_search, do_search
 
-HYPERSCAN_TOKENIZER = HyperscanTokenizer(cache_dir=".hyperscan")
-
 
 async def court_homepage(request: HttpRequest, pk: str) -> HttpResponse:
     """Individual Court Home Pages"""
@@ -355,6 +362,34 @@ async def fetch_docket_entries(docket):
     return de_list
 
 
+# The largest value of a BigIntegerField.
+MAX_BIGINT = 2**63 - 1
+
+
+async def get_docket_entries_count(
+    docket: Docket, de_list: QuerySet, filtered: bool
+) -> int:
+    """Get the number of entries of a docket to estimate its number of
+    pages. The count of all the entries is cached, so mega dockets aren't
+    counted on every page load.
+
+    :param docket: The docket.
+    :param de_list: The docket entries to show.
+    :param filtered: Whether de_list is filtered.
+    :return: The number of entries.
+    """
+    if filtered:
+        return await de_list.acount()
+    cache_key = f"docket_entries_count:{docket.pk}"
+    count = await cache.aget(cache_key)
+    if count is None:
+        count = await de_list.acount()
+        await cache.aset(
+            cache_key, count, settings.DOCKET_ENTRIES_COUNT_CACHE_TIMEOUT
+        )
+    return count
+
+
 async def view_docket(
     request: HttpRequest, pk: int, slug: str
 ) -> HttpResponse:
@@ -364,8 +399,16 @@ async def view_docket(
     docket, context = await core_docket_data(request, pk)
     await increment_view_count(docket, request)
 
-    de_list = await fetch_docket_entries(docket)
+    # Entries without a number sort last in ascending order and first in
+    # descending order, as NULLs do in Postgres.
+    de_list = (await fetch_docket_entries(docket)).annotate(
+        entry_number_key=Coalesce(
+            "entry_number", Value(MAX_BIGINT), output_field=BigIntegerField()
+        )
+    )
 
+    filtered = False
+    jump_to_entry = None
     if await sync_to_async(form.is_valid)():
         cd = form.cleaned_data
 
@@ -379,34 +422,68 @@ async def view_docket(
             de_list = de_list.filter(date_filed__lte=cd["filed_before"])
         if cd.get("order_by") == DocketEntryFilterForm.DESCENDING:
             sort_order_asc = False
-            de_list = de_list.order_by(
-                "-recap_sequence_number", "-entry_number"
-            )
-
-    page = request.GET.get("page", 1)
+        filtered = any(
+            cd.get(field)
+            for field in [
+                "entry_gte",
+                "entry_lte",
+                "filed_after",
+                "filed_before",
+            ]
+        )
+        jump_to_entry = cd.get("entry")
+
+    paginator = KeysetPaginator(
+        de_list,
+        settings.DOCKET_ENTRIES_PAGE_SIZE,
+        ["recap_sequence_number", "entry_number_key", "pk"],
+        descending=not sort_order_asc,
+        count=await get_docket_entries_count(docket, de_list, filtered),
+    )
 
     @sync_to_async
-    def paginate_docket_entries(docket_entries, docket_page):
-        paginator = Paginator(docket_entries, 200, orphans=10)
+    def paginate_docket_entries() -> KeysetPage:
+        page = request.GET.get("page", 1)
         try:
-            return paginator.page(docket_page)
-        except PageNotAnInteger:
-            return paginator.page(1)
-        except EmptyPage:
-            return paginator.page(paginator.num_pages)
+            number = int(page)
+        except ValueError:
+            number = None
+        try:
+            if request.GET.get("after"):
+                return paginator.page_after(request.GET["after"], number)
+            if request.GET.get("before"):
+                return paginator.page_before(request.GET["before"], number)
+        except InvalidCursor:
+            return paginator.first_page()
+        if jump_to_entry is not None:
+            # Start the page at the entry, or the closest one after it.
+            if sort_order_asc:
+                entries = de_list.filter(
+                    entry_number__gte=jump_to_entry
+                ).order_by("entry_number", *paginator.keys)
+            else:
+                entries = de_list.filter(
+                    entry_number__lte=jump_to_entry
+                ).order_by("-entry_number", *paginator.keys)
+            entry = entries.first()
+            return (
+                paginator.page_from(entry) if entry else paginator.last_page()
+            )
+        return paginator.page(page)
 
-    paginated_entries = await paginate_docket_entries(de_list, page)
+    paginated_entries = await paginate_docket_entries()
 
     prayer_is_eligible = False
     flag_for_prayers = await sync_to_async(waffle.flag_is_active)(
         request, "pray-and-pay"
     )
     if flag_for_prayers:
-        # Extract recap documents from the current page.
+        # Extract recap documents from the current page. They were
+        # prefetched with the page, so this doesn't query the DB.
         recap_documents = [
             rd
-            for entry in await sync_to_async(list)(paginated_entries)
-            async for rd in entry.recap_documents.all()
+            for entry in paginated_entries
+            for rd in entry.recap_documents.all()
         ]
         # Get prayer counts in bulk.
         prayer_counts = await get_prayer_counts_in_bulk(recap_documents)
@@ -1,6 +1,7 @@
 # Code for merging PACER content into the DB
 import logging
 import re
+from collections import defaultdict
 from copy import deepcopy
 from datetime import date, timedelta
 from typing import Any, Dict, List, Optional, Tuple, Union
@@ -232,6 +233,76 @@ async def find_docket_object(
     return d
 
 
+def fetch_dockets_by_pacer_case_id(
+    court_id: str, pacer_case_ids: set[str]
+) -> defaultdict[str, list[Docket]]:
+    """Fetch the dockets of a court with any of the given PACER case IDs in a
+    single query, so many of them can be looked up with
+    find_docket_object_in_candidates.
+
+    :param court_id: The CourtListener court_id to lookup
+    :param pacer_case_ids: The PACER case IDs to lookup.
+    :return: A dict mapping each PACER case ID to its dockets.
+    """
+    dockets: defaultdict[str, list[Docket]] = defaultdict(list)
+    for d in Docket.objects.filter(
+        court_id=court_id, pacer_case_id__in=pacer_case_ids
+    ).order_by("date_created"):
+        dockets[d.pacer_case_id].append(d)
+    return dockets
+
+
+def find_docket_object_in_candidates(
+    candidates: list[Docket],
+    court_id: str,
+    pacer_case_id: str,
+    docket_number: str,
+    federal_defendant_number: str | None,
+    federal_dn_judge_initials_assigned: str | None,
+    federal_dn_judge_initials_referred: str | None,
+) -> Docket:
+    """Do the lookups of find_docket_object for a PACER case ID among the
+    dockets of the court with that ID, fetched beforehand.
+
+    Ambiguous matches are rare, so they're still resolved with
+    find_docket_object.
+
+    :param candidates: The dockets of the court with the PACER case ID,
+    ordered by date_created.
+    :param court_id: The CourtListener court_id to lookup
+    :param pacer_case_id: The PACER case ID for the docket
+    :param docket_number: The docket number to lookup.
+    :param federal_defendant_number: The federal defendant number to validate
+    the match.
+    :param federal_dn_judge_initials_assigned: The judge's initials assigned to
+    validate the match.
+    :param federal_dn_judge_initials_referred: The judge's initials referred to
+    validate the match.
+    :return The docket found or a new one.
+    """
+    docket_number_core = make_docket_number_core(docket_number)
+    core_matches = [
+        d for d in candidates if d.docket_number_core == docket_number_core
+    ]
+    for matches in [core_matches, candidates]:
+        if len(matches) == 1:
+            return matches[0]
+        if len(matches) > 1:
+            return async_to_sync(find_docket_object)(
+                court_id,
+                pacer_case_id,
+                docket_number,
+                federal_defendant_number,
+                federal_dn_judge_initials_assigned,
+                federal_dn_judge_initials_referred,
+            )
+    return Docket(
+        source=Docket.RECAP,
+        pacer_case_id=pacer_case_id,
+        court_id=court_id,
+    )
+
+
 def add_attorney(atty, p, d):
     """Add/update an attorney.
 
@@ -114,6 +114,7 @@ from cl.recap.tasks import (
     process_recap_pdf,
     process_recap_zip,
 )
+from cl.recap_rss.models import RssItemCache
 from cl.recap_rss.tasks import merge_rss_feed_contents
 from cl.scrapers.factories import PACERFreeDocumentRowFactory
 from cl.search.factories import (
@@ -2058,6 +2059,55 @@ class RecapMinuteEntriesTest(TestCase):
         async_to_sync(add_docket_entries)(d, docket["docket_entries"])
         self.assertEqual(d.docket_entries.count(), expected_count)
 
+    @mock.patch("cl.recap_rss.tasks.enqueue_docket_alert")
+    def test_merge_rss_feed_contents_in_bulk(self, mock_enqueue_de) -> None:
+        """Are RSS items deduplicated and their dockets looked up in bulk,
+        including the dockets created by earlier items of the same feed?
+        """
+        court_id = "scotus"
+        rss_feed = PacerRssFeed(court_id)
+        rss_feed.is_bankruptcy = True  # Needed because we say SCOTUS above.
+        with open(self.make_path("rss_sample_unnumbered_mdb.xml"), "rb") as f:
+            text = f.read().decode()
+        rss_feed._parse_text(text)
+        existing_case_item = rss_feed.data[0]
+        existing_docket = Docket.objects.create(
+            source=Docket.RECAP,
+            court_id=court_id,
+            pacer_case_id=existing_case_item["pacer_case_id"],
+            docket_number=existing_case_item["docket_number"],
+        )
+        new_case_item = deepcopy(existing_case_item)
+        new_case_item["pacer_case_id"] = "999999"
+        new_case_item_2 = deepcopy(new_case_item)
+        new_case_item_2["docket_entries"][0]["description"] = "Another entry"
+        feed_data = [
+            existing_case_item,
+            new_case_item,
+            new_case_item_2,
+            # A repeated item is only merged once.
+            deepcopy(existing_case_item),
+        ]
+
+        with mock.patch(
+            "cl.recap_rss.tasks.find_docket_object"
+        ) as mock_find_docket:
+            merge_rss_feed_contents(feed_data, court_id)
+            # Items with a PACER case ID are looked up in bulk.
+            mock_find_docket.assert_not_called()
+
+        self.assertEqual(RssItemCache.objects.count(), 3)
+        self.assertEqual(existing_docket.docket_entries.count(), 1)
+        new_dockets = Docket.objects.filter(
+            court_id=court_id, pacer_case_id="999999"
+        )
+        self.assertEqual(new_dockets.count(), 1)
+
+        # Items merged before are skipped.
+        response = merge_rss_feed_contents(feed_data, court_id)
+        self.assertEqual(response["rds_for_solr"], [])
+        self.assertEqual(RssItemCache.objects.count(), 3)
+
     def test_dhr_merges_separate_docket_entries(self) -> None:
         """Does the docket history report merge separate minute entries if
         one entry has a short description, and the other has a long
@@ -13,7 +13,7 @@ from celery import Task
 from dateparser import parse
 from django.core.files.base import ContentFile
 from django.core.mail import send_mail
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, connection, transaction
 from django.utils.timezone import now
 from juriscraper.pacer import PacerRssFeed
 from pytz import timezone
@@ -28,7 +28,9 @@ from cl.recap.constants import COURT_TIMEZONES
 from cl.recap.mergers import (
     add_bankruptcy_data_to_docket,
     add_docket_entries,
+    fetch_dockets_by_pacer_case_id,
     find_docket_object,
+    find_docket_object_in_candidates,
     update_docket_metadata,
 )
 from cl.recap_rss.models import RssFeedData, RssFeedStatus, RssItemCache
@@ -310,6 +312,26 @@ async def cache_hash(item_hash):
         return True
 
 
+def claim_hash(item_hash: str) -> bool:
+    """Add a new hash to the RSS Item Cache without breaking the transaction
+
+    Unlike cache_hash, a conflict doesn't raise an IntegrityError, so this can
+    be called inside the transaction that merges the item. The claim is then
+    rolled back along with the item.
+
+    :param item_hash: The SHA256 hash you wish to cache.
+    :returns True if the hash was added, False if it's already processed or
+    getting processed in another thread/process.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {RssItemCache._meta.db_table} (hash, date_created) "
+            "VALUES (%s, %s) ON CONFLICT (hash) DO NOTHING RETURNING hash",
+            [item_hash, now()],
+        )
+        return cursor.fetchone() is not None
+
+
 @app.task(bind=True, max_retries=1)
 def merge_rss_feed_contents(self, feed_data, court_pk, metadata_only=False):
     """Merge the rss feed contents into CourtListener
@@ -325,29 +347,59 @@ def merge_rss_feed_contents(self, feed_data, court_pk, metadata_only=False):
     """
     start_time = now()
 
-    # RSS feeds are a list of normal Juriscraper docket objects.
-    all_rds_created = []
-    d_pks_to_alert = []
+    # RSS feeds are a list of normal Juriscraper docket objects. Most of them
+    # were merged by previous polls, so check all their hashes at once.
+    items = {}
     for docket in feed_data:
-        item_hash = hash_item(docket)
-        if async_to_sync(is_cached)(item_hash):
-            continue
+        items.setdefault(hash_item(docket), docket)
+    cached_hashes = set(
+        RssItemCache.objects.filter(hash__in=list(items)).values_list(
+            "hash", flat=True
+        )
+    )
+    new_items = [
+        (item_hash, docket)
+        for item_hash, docket in items.items()
+        if item_hash not in cached_hashes
+    ]
+    # Look up the dockets of all the items with a PACER case ID at once.
+    dockets_by_case_id = fetch_dockets_by_pacer_case_id(
+        court_pk,
+        {docket["pacer_case_id"] for _, docket in new_items} - {None, ""},
+    )
 
+    all_rds_created = []
+    d_pks_to_alert = []
+    for item_hash, docket in new_items:
         with transaction.atomic():
-            cached_ok = async_to_sync(cache_hash)(item_hash)
-            if not cached_ok:
-                # The item is already in the cache, ergo it's getting processed
-                # in another thread/process and we had a race condition.
+            # Claim the item along with its changes, so it's uncached if they
+            # roll back. Items already claimed are getting processed in
+            # another thread/process and we had a race condition.
+            if not claim_hash(item_hash):
                 continue
-            d = async_to_sync(find_docket_object)(
-                court_pk,
-                docket["pacer_case_id"],
-                docket["docket_number"],
-                docket.get("federal_defendant_number"),
-                docket.get("federal_dn_judge_initials_assigned"),
-                docket.get("federal_dn_judge_initials_referred"),
-            )
-
+            if docket["pacer_case_id"]:
+                candidates = dockets_by_case_id[docket["pacer_case_id"]]
+                d = find_docket_object_in_candidates(
+                    candidates,
+                    court_pk,
+                    docket["pacer_case_id"],
+                    docket["docket_number"],
+                    docket.get("federal_defendant_number"),
+                    docket.get("federal_dn_judge_initials_assigned"),
+                    docket.get("federal_dn_judge_initials_referred"),
+                )
+            else:
+                candidates = None
+                d = async_to_sync(find_docket_object)(
+                    court_pk,
+                    docket["pacer_case_id"],
+                    docket["docket_number"],
+                    docket.get("federal_defendant_number"),
+                    docket.get("federal_dn_judge_initials_assigned"),
+                    docket.get("federal_dn_judge_initials_referred"),
+                )
+
+            is_new_docket = d.pk is None
             d.add_recap_source()
             async_to_sync(update_docket_metadata)(d, docket)
             if not d.pacer_case_id:
@@ -356,15 +408,18 @@ def merge_rss_feed_contents(self, feed_data, court_pk, metadata_only=False):
                 d.save()
                 add_bankruptcy_data_to_docket(d, docket)
             except IntegrityError as exc:
-                # The docket was created while we looked it up. Retry and it
-                # should associate with the new one instead.
+                # The docket was created while we looked it up. Retry and
+                # it should associate with the new one instead.
                 raise self.retry(exc=exc)
-            if metadata_only:
-                continue
-
-            items_returned, rds_created, content_updated = async_to_sync(
-                add_docket_entries
-            )(d, docket["docket_entries"])
+            if is_new_docket and candidates is not None:
+                # Later items of the same case should find it.
+                candidates.append(d)
+            if not metadata_only:
+                items_returned, rds_created, content_updated = async_to_sync(
+                    add_docket_entries
+                )(d, docket["docket_entries"])
+        if metadata_only:
+            continue
 
         if content_updated:
             newly_enqueued = enqueue_docket_alert(d.pk)
@@ -1,11 +1,86 @@
+import hashlib
+import math
+from collections.abc import Callable
+from datetime import date
+
+from django.db.models import Model
 from juriscraper.AbstractSite import logger
 
+from cl.audio.models import Audio
 from cl.scrapers.exceptions import (
     ConsecutiveDuplicatesError,
     SingleDuplicateError,
 )
 from cl.scrapers.models import UrlHash
-from cl.search.models import Court
+from cl.search.models import Court, Opinion
+
+LOOKUP_FIELDS = ("sha1", "download_url")
+
+# The fields used to find the objects of a court filed in a date range, by
+# object type.
+COURT_DATE_FIELDS = {
+    Opinion: ("cluster__docket__court_id", "cluster__date_filed"),
+    Audio: ("docket__court_id", "docket__date_argued"),
+}
+
+
+class BloomFilter:
+    """A compact set of strings that can have false positives, but no false
+    negatives.
+
+    :param capacity: The number of items expected to be added.
+    :param error_rate: The expected false positive rate at that capacity.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.size = max(
+            int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8
+        )
+        self.num_hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _indexes(self, value: str) -> list[int]:
+        # Derive all the indexes from two hashes, see Kirsch and
+        # Mitzenmacher, "Less Hashing, Same Performance".
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.num_hashes)]
+
+    def add(self, value: str) -> None:
+        for index in self._indexes(value):
+            self.bits[index >> 3] |= 1 << (index & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self.bits[index >> 3] & (1 << (index & 7))
+            for index in self._indexes(value)
+        )
+
+
+def make_bloom_filter(
+    object_type: type[Model],
+    lookup_by: str = "sha1",
+    chunk_size: int = 10_000,
+) -> BloomFilter:
+    """Make a Bloom filter with the lookup values of every object of a type.
+
+    :param object_type: The model of the objects, e.g. Opinion.
+    :param lookup_by: The field with the lookup values.
+    :param chunk_size: The number of rows to fetch from the DB at a time.
+    :return: The Bloom filter.
+    """
+    if lookup_by not in LOOKUP_FIELDS:
+        raise NotImplementedError("Unknown lookup_by parameter.")
+    queryset = object_type.objects.exclude(**{lookup_by: ""})
+    # Leave room for the items added while it's in use.
+    bloom_filter = BloomFilter(int(queryset.count() * 1.1) + 1000)
+    for value in queryset.values_list(lookup_by, flat=True).iterator(
+        chunk_size=chunk_size
+    ):
+        bloom_filter.add(value)
+    return bloom_filter
 
 
 class DupChecker(dict):
@@ -14,6 +89,7 @@ class DupChecker(dict):
         court: Court,
         full_crawl: bool = False,
         dup_threshold: int = 5,
+        bloom_filter: BloomFilter | None = None,
         *args,
         **kwargs,
     ):
@@ -23,8 +99,73 @@ class DupChecker(dict):
         self.url_hash = None
         self.dup_count = 0
         self.last_found_date = None
+        # Lookup values known to exist in the DB, by object type and lookup
+        # field.
+        self.known_values: dict[tuple[type[Model], str], set[str]] = {}
+        # A Bloom filter of all the sha1 values of an object type, to tell
+        # that an item is new without querying the DB.
+        self.bloom_filter = bloom_filter
+        # Values the Bloom filter said were new. They may be saved
+        # afterwards, so later lookups of them must go to the DB.
+        self.unfiltered_values: set[str] = set()
+        # Called when an item is found not to be a duplicate, i.e., when it
+        # can't end the crawl.
+        self.on_new_item: Callable[[], None] | None = None
         super().__init__(*args, **kwargs)
 
+    def prefetch_court_values(
+        self,
+        object_type: type[Model],
+        start_date: date,
+        end_date: date,
+        lookup_by: str = "sha1",
+    ) -> None:
+        """Load the lookup values of the objects of the court filed in a
+        date range, so duplicates in that range are found without a query.
+
+        :param object_type: The model of the objects, e.g. Opinion.
+        :param start_date: The first date of the range.
+        :param end_date: The last date of the range.
+        :param lookup_by: The field with the lookup values.
+        :return: None
+        """
+        court_field, date_field = COURT_DATE_FIELDS[object_type]
+        values = object_type.objects.filter(
+            **{
+                court_field: self.court.pk,
+                f"{date_field}__range": (start_date, end_date),
+            }
+        ).values_list(lookup_by, flat=True)
+        self.known_values.setdefault((object_type, lookup_by), set()).update(
+            value for value in values if value
+        )
+
+    def _exists(
+        self, object_type: type[Model], lookup_value: str, lookup_by: str
+    ) -> bool:
+        """Check if there is an object with the lookup value, using the
+        prefetched values when possible.
+
+        Prefetched values only hold objects known to exist, and the Bloom
+        filter can only tell for sure that an object doesn't exist, so other
+        answers are confirmed in the DB.
+        """
+        if lookup_by not in LOOKUP_FIELDS:
+            raise NotImplementedError("Unknown lookup_by parameter.")
+
+        if lookup_value in self.known_values.get((object_type, lookup_by), ()):
+            return True
+        if (
+            self.bloom_filter is not None
+            and lookup_by == "sha1"
+            and lookup_value not in self.bloom_filter
+            and lookup_value not in self.unfiltered_values
+        ):
+            self.unfiltered_values.add(lookup_value)
+            return False
+
+        return object_type.objects.filter(**{lookup_by: lookup_value}).exists()
+
     def _increment(self, current_date):
         """Increments the dup_count and sets the correct date for the latest
         dup.
@@ -110,16 +251,10 @@ class DupChecker(dict):
                 - continue
         """
         # check for a duplicate in the db.
-        if lookup_by == "sha1":
-            exists = object_type.objects.filter(sha1=lookup_value).exists()
-        elif lookup_by == "download_url":
-            exists = object_type.objects.filter(
-                download_url=lookup_value
-            ).exists()
-        else:
-            raise NotImplementedError("Unknown lookup_by parameter.")
-
+        exists = self._exists(object_type, lookup_value, lookup_by)
         if not exists:
+            if self.on_new_item is not None:
+                self.on_new_item()
             return
 
         logger.info(
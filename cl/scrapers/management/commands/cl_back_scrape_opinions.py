@@ -48,6 +48,7 @@ class Command(cl_scrape_opinions.Command):
         self,
         mod: AbstractSite,
         options: dict,
+        site=None,
     ) -> None:
         """Parse the site and scrape it using the backscraper
 
@@ -62,6 +63,7 @@ class Command(cl_scrape_opinions.Command):
                 Site.back_scrape_iterable
             - backscrape_wait: Seconds to wait after consuming each element
                 of the backscrape iterable
+        :param site: Ignored, the backscraper makes its own Site objects
 
         :return: None
         """
@@ -14,7 +14,7 @@ class Command(cl_scrape_oral_arguments.Command):
         super().add_arguments(parser)
         add_backscraper_arguments(parser)
 
-    def parse_and_scrape_site(self, mod, options: dict):
+    def parse_and_scrape_site(self, mod, options: dict, site=None):
         court_str = mod.__name__.split(".")[-1].split("_")[0]
         logger.info(f'Using court_str: "{court_str}"')
 
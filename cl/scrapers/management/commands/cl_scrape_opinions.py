@@ -1,28 +1,32 @@
 import signal
 import sys
+import threading
 import time
 import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import date
+from functools import partial
 from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
 
 from asgiref.sync import async_to_sync
 from django.core.files.base import ContentFile
 from django.core.management.base import CommandError
-from django.db import transaction
+from django.db import connections, transaction
 from django.utils.encoding import force_bytes
 from eyecite.find import get_citations
-from eyecite.tokenizers import HyperscanTokenizer
 from juriscraper.lib.importer import build_module_list
 from juriscraper.lib.string_utils import CaseNameTweaker
 from sentry_sdk import capture_exception
 
 from cl.alerts.models import RealTimeQueue
+from cl.citations.tokenizers import HYPERSCAN_LOCK, HYPERSCAN_TOKENIZER
 from cl.citations.utils import map_reporter_db_cite_type
 from cl.lib.command_utils import VerboseCommand, logger
 from cl.lib.crypto import sha1
 from cl.lib.string_utils import trunc
 from cl.people_db.lookup_utils import lookup_judges_by_messy_str
-from cl.scrapers.DupChecker import DupChecker
+from cl.scrapers.DupChecker import BloomFilter, DupChecker, make_bloom_filter
 from cl.scrapers.exceptions import (
     BadContentError,
     ConsecutiveDuplicatesError,
@@ -46,8 +50,6 @@ from cl.search.models import (
     OpinionCluster,
 )
 
-HYPERSCAN_TOKENIZER = HyperscanTokenizer(cache_dir=".hyperscan")
-
 # for use in catching the SIGINT (Ctrl+4)
 die_now = False
 cnt = CaseNameTweaker()
@@ -57,7 +59,8 @@ def make_citation(
     cite_str: str, cluster: OpinionCluster, court_id: str
 ) -> Optional[Citation]:
     """Create and return a citation object for the input values."""
-    citation_objs = get_citations(cite_str, tokenizer=HYPERSCAN_TOKENIZER)
+    with HYPERSCAN_LOCK:
+        citation_objs = get_citations(cite_str, tokenizer=HYPERSCAN_TOKENIZER)
     if not citation_objs:
         logger.error(
             "Could not parse citation from court '%s'",
@@ -220,9 +223,15 @@ def save_everything(
 class Command(VerboseCommand):
     help = "Runs the Juriscraper toolkit against one or many jurisdictions."
     scrape_target_descr = "opinions"  # for logging purposes
+    # The model of the scraped items, used to check for duplicates.
+    scrape_target_model = Opinion
+    use_bloom_filter = False
+    bloom_filter: BloomFilter | None = None
 
     def __init__(self, stdout=None, stderr=None, no_color=False):
         super().__init__(stdout=None, stderr=None, no_color=False)
+        # Courts scraped concurrently share the Bloom filter.
+        self.bloom_filter_lock = threading.Lock()
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -267,6 +276,35 @@ class Command(VerboseCommand):
             default=False,
             help="Disable duplicate aborting.",
         )
+        parser.add_argument(
+            "--bloom-filter",
+            action="store_true",
+            default=False,
+            help=(
+                "On full crawls, load the hashes of all the items in the DB "
+                "into a Bloom filter first, so new items are found without "
+                "querying the DB. Useful for large backscrapes."
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "The number of courts to scrape concurrently. Default is 1, "
+                "which scrapes courts one at a time."
+            ),
+        )
+        parser.add_argument(
+            "--max-per-host",
+            type=int,
+            default=1,
+            help=(
+                "When scraping courts concurrently, the maximum number of "
+                "courts hosted on the same website that are scraped at the "
+                "same time. Default is 1."
+            ),
+        )
 
     def scrape_court(
         self,
@@ -280,32 +318,68 @@ class Command(VerboseCommand):
         court_str = site.court_id.split(".")[-1].split("_")[0]
         court = Court.objects.get(pk=court_str)
 
-        dup_checker = DupChecker(court, full_crawl=full_crawl)
+        dup_checker = DupChecker(
+            court,
+            full_crawl=full_crawl,
+            bloom_filter=self.get_bloom_filter() if full_crawl else None,
+        )
         if dup_checker.abort_by_url_hash(site.url, site.hash):
             logger.debug("Aborting by url hash.")
             return
 
+        # Most items of a site are usually already in the DB, load them at
+        # once instead of querying for each one.
+        case_dates = [item["case_dates"] for item in site]
+        if case_dates:
+            dup_checker.prefetch_court_values(
+                self.scrape_target_model, min(case_dates), max(case_dates)
+            )
+
         if site.cookies:
             logger.info("Using cookies: %s", site.cookies)
 
         logger.debug("#%s %s found.", len(site), self.scrape_target_descr)
 
         added = 0
-        for i, item in enumerate(site):
-            try:
-                next_date = site[i + 1]["case_dates"]
-            except IndexError:
-                next_date = None
+        downloads: dict[int, Future | None] = {}
 
-            try:
-                self.ingest_a_case(
-                    item, next_date, ocr_available, site, dup_checker, court
+        def prefetch(index: int) -> Future | None:
+            if index not in downloads:
+                downloads[index] = self.prefetch_content(
+                    downloader, site, index
                 )
-                added += 1
-            except ConsecutiveDuplicatesError:
-                break
-            except (SingleDuplicateError, BadContentError):
-                pass
+            return downloads[index]
+
+        # Download the content of the next item while the current one is
+        # being ingested. The download starts once the current item is known
+        # to be new, so items that end the crawl don't trigger one.
+        with ThreadPoolExecutor(max_workers=1) as downloader:
+            for i, item in enumerate(site):
+                download = prefetch(i)
+                dup_checker.on_new_item = partial(prefetch, i + 1)
+                try:
+                    next_date = site[i + 1]["case_dates"]
+                except IndexError:
+                    next_date = None
+
+                try:
+                    if download is not None:
+                        item["content"] = download.result()
+                    self.ingest_a_case(
+                        item,
+                        next_date,
+                        ocr_available,
+                        site,
+                        dup_checker,
+                        court,
+                    )
+                    added += 1
+                except ConsecutiveDuplicatesError:
+                    break
+                except (SingleDuplicateError, BadContentError):
+                    pass
+                finally:
+                    downloads.pop(i, None)
 
         # Update the hash if everything finishes properly.
         logger.debug(
@@ -319,6 +393,38 @@ class Command(VerboseCommand):
             # Only update the hash if no errors occurred.
             dup_checker.update_site_hash(site.hash)
 
+    def get_bloom_filter(self) -> BloomFilter | None:
+        """Get the Bloom filter of the hashes of the scraped items in the DB,
+        making it on first use if it's enabled.
+        """
+        if not self.use_bloom_filter:
+            return None
+        with self.bloom_filter_lock:
+            if self.bloom_filter is None:
+                logger.info(
+                    "Loading the hashes of %s.", self.scrape_target_descr
+                )
+                self.bloom_filter = make_bloom_filter(self.scrape_target_model)
+        return self.bloom_filter
+
+    @staticmethod
+    def prefetch_content(
+        downloader: ThreadPoolExecutor, site, index: int
+    ) -> Future | None:
+        """Start downloading the content of a site item in the background.
+
+        :param downloader: The executor to download the content with.
+        :param site: The parsed juriscraper site.
+        :param index: The index of the item to download.
+        :return: The future of the content, or None if there is no item at
+        that index or its content was already scraped.
+        """
+        if index >= len(site) or site[index].get("content"):
+            return None
+        return downloader.submit(
+            get_binary_content, site[index]["download_urls"], site
+        )
+
     def ingest_a_case(
         self,
         item,
@@ -396,10 +502,92 @@ class Command(VerboseCommand):
             item["case_names"].encode(),
         )
 
-    def parse_and_scrape_site(self, mod, options: dict):
-        site = mod.Site().parse()
+    def parse_and_scrape_site(self, mod, options: dict, site=None):
+        site = (site if site is not None else mod.Site()).parse()
         self.scrape_court(site, options["full_crawl"])
 
+    def scrape_court_module(self, mod, options: dict, site) -> None:
+        """Scrape a court module if its scraper is enabled, reporting any
+        error to Sentry instead of raising it.
+
+        :param mod: The court module to scrape.
+        :param options: The command options.
+        :param site: An unparsed Site of the module, to avoid making another.
+        """
+        module_string = site.court_id
+        court_id = module_string.split(".")[-1].split("_")[0]
+        if not Court.objects.get(id=court_id).has_opinion_scraper:
+            logger.info(f"{court_id} is currently disabled.")
+            return
+        try:
+            self.parse_and_scrape_site(mod, options, site=site)
+        except Exception as e:
+            capture_exception(e, fingerprint=[module_string, "{{ default }}"])
+            logger.debug(traceback.format_exc())
+
+    def scrape_concurrently(self, mods: list, options: dict) -> None:
+        """Scrape many court modules at once using a pool of threads.
+
+        Courts hosted on the same website are limited to max_per_host at a
+        time, so a pass over many courts doesn't flood a single server.
+
+        :param mods: The court modules to scrape.
+        :param options: The command options.
+        :return: None
+        """
+        host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+        jobs = []
+        for mod in mods:
+            site = mod.Site()
+            host = urlsplit(site.url or "").netloc
+            if host not in host_semaphores:
+                host_semaphores[host] = threading.BoundedSemaphore(
+                    options["max_per_host"]
+                )
+            jobs.append((mod, site, host_semaphores[host]))
+
+        def scrape(mod, site, semaphore: threading.BoundedSemaphore) -> None:
+            if die_now:
+                return
+            try:
+                with semaphore:
+                    self.scrape_court_module(mod, options, site)
+            finally:
+                # Each thread gets its own DB connection.
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            for future in [executor.submit(scrape, *job) for job in jobs]:
+                future.result()
+
+    def handle_concurrently(self, module_strings: list[str], options: dict):
+        mods = []
+        for module_string in module_strings:
+            package, module = module_string.rsplit(".", 1)
+            mods.append(
+                __import__(
+                    f"{package}.{module}", globals(), locals(), [module]
+                )
+            )
+
+        while True:
+            start = time.monotonic()
+            self.scrape_concurrently(mods, options)
+            # this catches SIGTERM, so the code can be killed safely.
+            if die_now:
+                logger.info("The scraper has stopped.")
+                sys.exit(1)
+            if not options["daemon"]:
+                break
+            logger.info(
+                "All jurisdictions done. Looping back to "
+                "the beginning because daemon mode is enabled."
+            )
+            # Don't start the next pass sooner than the requested rate.
+            time.sleep(
+                max(options["rate"] * 60 - (time.monotonic() - start), 0)
+            )
+
     def handle(self, *args, **options):
         super().handle(*args, **options)
         global die_now
@@ -408,11 +596,17 @@ class Command(VerboseCommand):
         # safely
         signal.signal(signal.SIGTERM, signal_handler)
 
+        self.use_bloom_filter = options.get("bloom_filter", False)
         module_strings = build_module_list(options["court_id"])
         if not len(module_strings):
             raise CommandError("Unable to import module or package. Aborting.")
 
         logger.info("Starting up the scraper.")
+        if options.get("workers", 1) > 1:
+            self.handle_concurrently(module_strings, options)
+            logger.info("The scraper has stopped.")
+            return
+
         num_courts = len(module_strings)
         wait = (options["rate"] * 60) / num_courts
         i = 0
@@ -107,6 +107,7 @@ def make_objects(
 
 class Command(cl_scrape_opinions.Command):
     scrape_target_descr = "oral arguments"
+    scrape_target_model = Audio
 
     def ingest_a_case(
         self,
@@ -118,7 +119,10 @@ class Command(cl_scrape_opinions.Command):
         court: Court,
         backscrape: bool = False,
     ):
-        content = get_binary_content(item["download_urls"], site)
+        if item.get("content"):
+            content = item.pop("content")
+        else:
+            content = get_binary_content(item["download_urls"], site)
         # request.content is sometimes a str, sometimes unicode, so
         # force it all to be bytes, pleasing hashlib.
         sha1_hash = sha1(force_bytes(content))
@@ -1,8 +1,13 @@
 import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from http import HTTPStatus
 from pathlib import Path
 from unittest import TestCase, mock
+from urllib.parse import urlsplit
 
 from asgiref.sync import async_to_sync
 from django.conf import settings
@@ -21,7 +26,7 @@ from cl.donate.factories import DonationFactory
 from cl.donate.models import Donation
 from cl.lib.microservice_utils import microservice
 from cl.lib.test_helpers import generate_docket_target_sources
-from cl.scrapers.DupChecker import DupChecker
+from cl.scrapers.DupChecker import BloomFilter, DupChecker, make_bloom_filter
 from cl.scrapers.exceptions import (
     ConsecutiveDuplicatesError,
     SingleDuplicateError,
@@ -492,8 +497,8 @@ class DupcheckerPressOnTest(TestCase):
         self.press_on_args = [Opinion, now(), now(), self.dup_hash]
 
         docket = DocketFactory()
-        cluster = OpinionClusterFactory(docket=docket)
-        opinion = OpinionFactory(sha1=self.dup_hash, cluster=cluster)
+        self.cluster = OpinionClusterFactory(docket=docket)
+        opinion = OpinionFactory(sha1=self.dup_hash, cluster=self.cluster)
 
     def test_press_on_no_dup(self) -> None:
         """Does the DupChecker raises no error when seeing a new hash?"""
@@ -569,6 +574,58 @@ class DupcheckerPressOnTest(TestCase):
         except ConsecutiveDuplicatesError:
             pass
 
+    def test_press_on_with_prefetched_values(self) -> None:
+        """Are duplicates found among the prefetched values of the court
+        without querying the DB, and are other values still checked in it?
+        """
+        dup_checker = DupChecker(self.cluster.docket.court, False, 2)
+        dup_checker.prefetch_court_values(
+            Opinion, self.cluster.date_filed, self.cluster.date_filed
+        )
+
+        with self.assertNumQueries(0):
+            with self.assertRaises(SingleDuplicateError):
+                dup_checker.press_on(*self.press_on_args)
+        with self.assertNumQueries(1):
+            dup_checker.press_on(*self.press_on_args[:-1], "not a dup")
+
+        # Consecutive duplicates are still counted.
+        with self.assertRaises(ConsecutiveDuplicatesError):
+            dup_checker.press_on(*self.press_on_args)
+
+    def test_press_on_with_bloom_filter(self) -> None:
+        """Are new items found by the Bloom filter without querying the DB,
+        and are duplicates confirmed in it?
+        """
+        bloom_filter = make_bloom_filter(Opinion)
+        self.assertIn(self.dup_hash, bloom_filter)
+        dup_checker = DupChecker(self.court, True, 2, bloom_filter)
+
+        with self.assertNumQueries(0):
+            dup_checker.press_on(*self.press_on_args[:-1], "not a dup")
+        with self.assertNumQueries(1):
+            with self.assertRaises(SingleDuplicateError):
+                dup_checker.press_on(*self.press_on_args)
+
+        # The new item may have been saved since, so it's checked in the DB.
+        with self.assertNumQueries(1):
+            dup_checker.press_on(*self.press_on_args[:-1], "not a dup")
+
+    def test_bloom_filter(self) -> None:
+        """Does the Bloom filter contain every value added and only a few
+        false positives?
+        """
+        bloom_filter = BloomFilter(1000, error_rate=0.01)
+        values = [str(i) * 4 for i in range(1000)]
+        for value in values:
+            bloom_filter.add(value)
+
+        self.assertTrue(all(value in bloom_filter for value in values))
+        false_positives = sum(
+            f"missing-{i}" in bloom_filter for i in range(10_000)
+        )
+        self.assertLess(false_positives, 300)
+
 
 class AudioFileTaskTest(TestCase):
     @classmethod
@@ -680,6 +737,73 @@ class ScraperContentTypeTest(TestCase):
             error_mock.assert_not_called()
 
 
+class ConcurrentScraperTest(SimpleTestCase):
+    """Test scraping many courts at once."""
+
+    def test_scrape_concurrently_limits_per_host(self) -> None:
+        """Are all the courts scraped, with no more than max_per_host courts
+        of the same website at a time?
+        """
+        urls = [
+            "https://courts.example.com/a",
+            "https://courts.example.com/b",
+            "https://courts.example.com/c",
+            "https://other.example.com/d",
+            "https://another.example.com/e",
+        ]
+        mods = [
+            mock.MagicMock(**{"Site.return_value.url": url}) for url in urls
+        ]
+        lock = threading.Lock()
+        scraped = []
+        running: Counter[str] = Counter()
+        max_running: Counter[str] = Counter()
+
+        def scrape_court_module(mod, options, site):
+            host = urlsplit(site.url).netloc
+            with lock:
+                running[host] += 1
+                max_running[host] = max(max_running[host], running[host])
+            time.sleep(0.05)
+            with lock:
+                running[host] -= 1
+                scraped.append(mod)
+
+        cmd = cl_scrape_opinions.Command()
+        with mock.patch.object(
+            cmd, "scrape_court_module", side_effect=scrape_court_module
+        ):
+            cmd.scrape_concurrently(mods, {"workers": 4, "max_per_host": 1})
+
+        self.assertCountEqual(scraped, mods)
+        self.assertEqual(max_running["courts.example.com"], 1)
+        # Each court's Site is made only once.
+        for mod in mods:
+            mod.Site.assert_called_once_with()
+
+    def test_prefetch_content(self) -> None:
+        """Is the content of the next item downloaded in the background, and
+        skipped when it was already scraped?
+        """
+        site = [
+            {"download_urls": "a.pdf"},
+            {"download_urls": "b.pdf", "content": b"content"},
+        ]
+        with mock.patch(
+            "cl.scrapers.management.commands.cl_scrape_opinions.get_binary_content",
+            return_value=b"downloaded",
+        ) as get_binary_content, ThreadPoolExecutor(1) as downloader:
+            futures = [
+                cl_scrape_opinions.Command.prefetch_content(
+                    downloader, site, i
+                )
+                for i in range(3)
+            ]
+            self.assertEqual(futures[0].result(), b"downloaded")
+        self.assertEqual(futures[1:], [None, None])
+        get_binary_content.assert_called_once_with("a.pdf", site)
+
+
 class ScrapeCitationsTest(TestCase):
     """This class only tests the update of existing clusters
     Since the ingestion of new clusters and their citations call
@@ -98,6 +98,8 @@ class DocketViewSet(LoggingMixin, viewsets.ModelViewSet):
         "date_created",
         "date_modified",
     ]
+    # Indexed fields that support keyset pagination
+    keyset_ordering_fields = ["date_blocked"]
     queryset = (
         Docket.objects.select_related(
             "court",
@@ -201,6 +203,8 @@ class OpinionClusterViewSet(LoggingMixin, viewsets.ModelViewSet):
         "date_created",
         "date_modified",
     ]
+    # Indexed fields that support keyset pagination
+    keyset_ordering_fields = ["date_filed", "citation_count", "date_blocked"]
     queryset = OpinionCluster.objects.prefetch_related(
         "sub_opinions", "panel", "non_participating_judges", "citations"
     ).order_by("-id")
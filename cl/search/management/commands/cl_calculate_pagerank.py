@@ -1,32 +1,124 @@
 import os
 
-import igraph
+import numpy as np
 from django.conf import settings
+from scipy.sparse import csr_matrix
 
-from cl.lib.command_utils import VerboseCommand
+from cl.lib.command_utils import VerboseCommand, logger
 from cl.lib.solr_core_admin import get_data_dir
 from cl.search.models import Opinion, OpinionsCited
 
+DAMPING_FACTOR = 0.85
+# The L1 distance between two iterations at which pagerank is considered
+# converged.
+TOLERANCE = 1e-10
+MAX_ITERATIONS = 100
 
-def make_and_populate_nx_graph() -> igraph.Graph:
-    """Create a new igraph object and populate it.
 
-    This pulls all of the inter-opinion citations into memory then passes all of
-    them to igraph as a directed graph.
+def fetch_citation_edges(chunk_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Stream all the inter-opinion citations into compact arrays.
+
+    Rows are read using a server-side cursor and packed into int32 arrays one
+    chunk at a time, so memory scales with the number of edges instead of
+    holding a Python tuple per citation.
+
+    :param chunk_size: The number of rows to fetch from the cursor at a time.
+    :return: A two tuple, the citing and cited opinion IDs of every citation.
     """
-    g = igraph.Graph(
-        directed=True,
-        edges=list(
-            OpinionsCited.objects.values_list(
-                "citing_opinion", "cited_opinion"
-            )
-        ),
+    chunks: list[np.ndarray] = []
+    rows: list[tuple[int, int]] = []
+    for row in OpinionsCited.objects.values_list(
+        "citing_opinion_id", "cited_opinion_id"
+    ).iterator(chunk_size=chunk_size):
+        rows.append(row)
+        if len(rows) >= chunk_size:
+            chunks.append(np.array(rows, dtype=np.int32))
+            rows = []
+    if rows:
+        chunks.append(np.array(rows, dtype=np.int32))
+
+    if not chunks:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty
+    edges = np.concatenate(chunks)
+    return edges[:, 0], edges[:, 1]
+
+
+def make_transition_matrix(
+    citing: np.ndarray, cited: np.ndarray, size: int
+) -> tuple[csr_matrix, np.ndarray]:
+    """Build the sparse transition matrix of the citation graph.
+
+    Nodes are indexed by opinion ID. Entry [cited, citing] is the share of the
+    citing opinion's rank that flows to the cited opinion; repeated edges add
+    up.
+
+    :param citing: The citing opinion IDs.
+    :param cited: The cited opinion IDs.
+    :param size: The number of nodes in the graph.
+    :return: A two tuple, the CSR matrix and a boolean mask of the dangling
+    nodes, the ones that don't cite anything.
+    """
+    out_degree = np.bincount(citing, minlength=size).astype(np.float64)
+    weights = 1.0 / out_degree[citing]
+    matrix = csr_matrix((weights, (cited, citing)), shape=(size, size))
+    return matrix, out_degree == 0
+
+
+def load_previous_ranks(path: str, size: int) -> np.ndarray | None:
+    """Load the ranks of a previous run to warm start the power iteration.
+
+    Nodes added since then start with the uniform rank.
+
+    :param path: The path of the file with the previous ranks.
+    :param size: The number of nodes in the graph.
+    :return: The normalized ranks or None if there are no previous ranks.
+    """
+    if not os.path.exists(path):
+        return None
+    previous = np.load(path)
+    ranks = np.full(size, 1.0 / size)
+    overlap = min(size, previous.size)
+    ranks[:overlap] = previous[:overlap]
+    return ranks / ranks.sum()
+
+
+def compute_pagerank(
+    matrix: csr_matrix,
+    dangling: np.ndarray,
+    initial_ranks: np.ndarray | None = None,
+) -> tuple[np.ndarray, int]:
+    """Run a vectorized power iteration until the ranks converge.
+
+    The rank of dangling nodes is spread uniformly over all the nodes.
+
+    :param matrix: The transition matrix from make_transition_matrix.
+    :param dangling: The mask of dangling nodes.
+    :param initial_ranks: Optional, the ranks to start from.
+    :return: A two tuple, the ranks indexed by opinion ID and the number of
+    iterations performed.
+    """
+    size = matrix.shape[0]
+    ranks = (
+        initial_ranks
+        if initial_ranks is not None
+        else np.full(size, 1.0 / size)
     )
-    return g
+    iteration = 0
+    for iteration in range(1, MAX_ITERATIONS + 1):
+        teleport = (
+            DAMPING_FACTOR * ranks[dangling].sum() + 1 - DAMPING_FACTOR
+        ) / size
+        new_ranks = DAMPING_FACTOR * (matrix @ ranks) + teleport
+        delta = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if delta < TOLERANCE:
+            break
+    return ranks, iteration
 
 
-def make_sorted_pr_file(pr_results, result_file_path):
-    """Convert the pagerank results list into something Solr can use.
+def make_sorted_pr_file(pr_results: np.ndarray, result_file_path: str) -> None:
+    """Convert the pagerank results into something Solr can use.
 
     Solr uses a file of the form:
 
@@ -34,46 +126,70 @@ def make_sorted_pr_file(pr_results, result_file_path):
         2=0.214810626172
         3=0.397399661529
 
-    The IDs must be sorted for performance, and every ID should be listed. This
-    function takes the pagerank results and converts them into a file like this,
-    using the os's `sort` executable for fastest sorting.
+    The IDs must be sorted for performance, and every ID should be listed.
+    Opinion IDs are streamed from the DB already sorted, and the file is
+    written to a temporary path first so Solr never reads a partial file.
     """
     temp_extension = ".tmp"
-    min_value = min(pr_results)
+    min_value = pr_results.min() if pr_results.size else 0.0
+    opinion_ids = (
+        Opinion.objects.values_list("pk", flat=True)
+        .order_by("pk")
+        .iterator(chunk_size=settings.PAGERANK_CHUNK_SIZE)
+    )
     with open(result_file_path + temp_extension, "w") as f:
         # pr_results has a score for every value between 0 and our highest
         # opinion id that has citations. Write a file that only contains values
         # matching valid Opinions.
-        for pk in Opinion.objects.values_list("pk", flat=True):
-            try:
-                score = pr_results[pk]
-            except IndexError:
-                # Happens because some items don't have citations, thus aren't
-                # in network.
-                score = min_value
+        for pk in opinion_ids:
+            # Items above the highest cited id don't have citations, thus
+            # aren't in network.
+            score = pr_results[pk] if pk < pr_results.size else min_value
             f.write(f"{pk}={score}\n")
-
-    # For improved Solr performance, sort the temp file, creating a new file
-    # without the temp_extension value.
-    os.system(
-        f"sort -n {result_file_path}{temp_extension} > {result_file_path}"
-    )
-    os.remove(result_file_path + temp_extension)
+    os.replace(result_file_path + temp_extension, result_file_path)
 
 
 class Command(VerboseCommand):
     args = "<args>"
     help = "Calculate pagerank value for every case"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--no-warm-start",
+            action="store_true",
+            default=False,
+            help="Start from uniform ranks instead of the ranks stored by "
+            "the previous run.",
+        )
+
     @staticmethod
-    def do_pagerank():
-        g = make_and_populate_nx_graph()
-        pr_results = g.pagerank()
+    def do_pagerank(warm_start: bool = False) -> np.ndarray:
+        citing, cited = fetch_citation_edges(settings.PAGERANK_CHUNK_SIZE)
+        size = int(max(citing.max(initial=0), cited.max(initial=0))) + 1
+        matrix, dangling = make_transition_matrix(citing, cited, size)
+        # The edges are no longer needed once the matrix is built.
+        del citing, cited
+
+        initial_ranks = None
+        if warm_start:
+            initial_ranks = load_previous_ranks(
+                settings.PAGERANK_PREVIOUS_RANKS_PATH, size
+            )
+        pr_results, iterations = compute_pagerank(
+            matrix, dangling, initial_ranks
+        )
+        logger.info(
+            "Pagerank converged after %s iterations for %s nodes.",
+            iterations,
+            size,
+        )
+        if warm_start:
+            np.save(settings.PAGERANK_PREVIOUS_RANKS_PATH, pr_results)
         return pr_results
 
     def handle(self, *args, **options):
         super().handle(*args, **options)
-        pr_results = self.do_pagerank()
+        pr_results = self.do_pagerank(warm_start=not options["no_warm_start"])
         pr_dest_dir = settings.SOLR_PAGERANK_DEST_DIR
         make_sorted_pr_file(pr_results, pr_dest_dir)
         normal_dest_dir = f"{get_data_dir('collection1')}external_pagerank"
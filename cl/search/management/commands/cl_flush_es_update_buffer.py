@@ -0,0 +1,21 @@
+from django.conf import settings
+
+from cl.lib.command_utils import PeriodicCommand, logger
+from cl.search.tasks import flush_es_update_buffer
+
+
+class Command(PeriodicCommand):
+    help = """Flush the ES update buffer periodically. Updates triggered by
+    signals are merged by document in Redis and sent to ES in bulk requests
+    once they have been waiting for ELASTICSEARCH_UPDATE_BUFFER_WINDOW
+    seconds."""
+
+    def get_interval(self) -> int:
+        # Check the buffer again in half the window so that updates don't
+        # wait much longer than the window.
+        return int(settings.ELASTICSEARCH_UPDATE_BUFFER_WINDOW) // 2
+
+    def run_once(self, testing_mode: bool) -> None:
+        flushed = flush_es_update_buffer(ignore_window=testing_mode)
+        if flushed:
+            logger.info("Flushed %s buffered ES updates.", flushed)
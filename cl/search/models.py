@@ -19,11 +19,11 @@ from django.utils import timezone
 from django.utils.encoding import force_str
 from django.utils.text import slugify
 from eyecite import get_citations
-from eyecite.tokenizers import HyperscanTokenizer
 from localflavor.us.models import USPostalCodeField, USZipCodeField
 from localflavor.us.us_states import OBSOLETE_STATES, USPS_CHOICES
 from model_utils import FieldTracker
 
+from cl.citations.tokenizers import HYPERSCAN_TOKENIZER
 from cl.citations.utils import get_citation_depth_between_clusters
 from cl.custom_filters.templatetags.text_filters import best_case_name
 from cl.lib import fields
@@ -47,8 +47,6 @@ from cl.lib.utils import deepgetattr
 from cl.search.docket_sources import DocketSources
 from cl.users.models import User
 
-HYPERSCAN_TOKENIZER = HyperscanTokenizer(cache_dir=".hyperscan")
-
 
 class PRECEDENTIAL_STATUS:
     PUBLISHED = "Published"
@@ -3245,6 +3243,9 @@ class Citation(models.Model):
     type = models.SmallIntegerField(
         help_text="The type of citation that this is.", choices=CITATION_TYPES
     )
+    # Tracks the previous value of the citation, to invalidate its cached
+    # resolutions when it changes.
+    lookup_field_tracker = FieldTracker(fields=["volume", "reporter", "page"])
 
     def __str__(self) -> str:
         # Note this representation is used in the front end.
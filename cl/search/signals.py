@@ -1,11 +1,15 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 from cl.audio.models import Audio
 from cl.citations.tasks import (
     find_citations_and_parantheticals_for_recap_documents,
 )
+from cl.citations.utils import (
+    invalidate_citation_lookup_table,
+    invalidate_citation_resolution_cache,
+)
 from cl.favorites.utils import send_prayer_emails
 from cl.lib.es_signal_processor import ESSignalProcessor
 from cl.people_db.models import (
@@ -575,3 +579,54 @@ def handle_recap_doc_change(
         and instance.is_available == True
     ):
         send_prayer_emails(instance)
+
+
+@receiver(
+    pre_save,
+    sender=Citation,
+    dispatch_uid="invalidate_previous_citation_resolution_uid",
+)
+def invalidate_previous_citation_resolution(
+    sender, instance: Citation, **kwargs
+):
+    """Invalidate the cached resolutions and lookup table entry of a
+    citation's previous value when it's changed.
+    """
+    if not instance.pk or not (
+        settings.CITATION_RESOLUTION_CACHE_TIMEOUT
+        or settings.CITATION_LOOKUP_TABLE_ENABLED
+    ):
+        return
+    tracker = instance.lookup_field_tracker
+    if not tracker.changed():
+        return
+    volume, reporter, page = (
+        tracker.previous(field) for field in ["volume", "reporter", "page"]
+    )
+    if settings.CITATION_RESOLUTION_CACHE_TIMEOUT:
+        invalidate_citation_resolution_cache(f"{volume} {reporter} {page}")
+    if settings.CITATION_LOOKUP_TABLE_ENABLED:
+        invalidate_citation_lookup_table(volume, reporter, page)
+
+
+@receiver(
+    post_save,
+    sender=Citation,
+    dispatch_uid="invalidate_citation_resolution_on_save_uid",
+)
+@receiver(
+    post_delete,
+    sender=Citation,
+    dispatch_uid="invalidate_citation_resolution_on_delete_uid",
+)
+def invalidate_citation_resolution(sender, instance: Citation, **kwargs):
+    """Invalidate the cached resolutions and lookup table entry of a citation
+    when it's added, changed or removed, since it can now match a different
+    number of opinions.
+    """
+    if settings.CITATION_RESOLUTION_CACHE_TIMEOUT:
+        invalidate_citation_resolution_cache(str(instance))
+    if settings.CITATION_LOOKUP_TABLE_ENABLED:
+        invalidate_citation_lookup_table(
+            instance.volume, instance.reporter, instance.page
+        )
@@ -1,7 +1,11 @@
+import json
 import logging
 import socket
+import time
+from collections import defaultdict
 from datetime import date, timedelta
 from importlib import import_module
+from itertools import batched
 from random import randint
 from typing import Any, Generator
 
@@ -39,6 +43,11 @@ from cl.alerts.tasks import (
 from cl.audio.models import Audio
 from cl.celery_init import app
 from cl.lib.elasticsearch_utils import build_daterange_query
+from cl.lib.redis_utils import (
+    create_redis_semaphore,
+    delete_redis_semaphore,
+    get_redis_interface,
+)
 from cl.lib.search_index_utils import (
     InvalidDocumentError,
     get_parties_from_case_name,
@@ -51,6 +60,7 @@ from cl.search.documents import (
     ESRECAPDocument,
     OpinionClusterDocument,
     OpinionDocument,
+    ParentheticalGroupDocument,
     PersonDocument,
     PositionDocument,
 )
@@ -63,6 +73,7 @@ from cl.search.models import (
     OpinionCluster,
     OpinionsCited,
     OpinionsCitedByRECAPDocument,
+    ParentheticalGroup,
     RECAPDocument,
 )
 from cl.search.types import (
@@ -82,6 +93,15 @@ logger = logging.getLogger(__name__)
 
 es_document_module = import_module("cl.search.documents")
 
+# Keys used by the ES update buffer.
+ES_UPDATE_DOCUMENT = "document"
+ES_UPDATE_CHILDREN = "children"
+ES_UPDATE_BUFFER_KEY = "es.update_buffer"
+ES_UPDATE_BUFFER_FLUSH_SEMAPHORE = "es.update_buffer.flushing"
+# The maximum number of batches a flush pops from the buffer, so a flush
+# finishes even if updates keep being buffered while it runs.
+ES_UPDATE_BUFFER_MAX_FLUSH_PASSES = 10
+
 
 @app.task
 def add_items_to_solr(item_pks, app_label, force_commit=False):
@@ -861,6 +881,348 @@ def update_children_docs_by_query(
         es_document._index.refresh()
 
 
+def make_es_document_update_key(
+    es_document_name: ESDocumentNameType,
+    main_instance_data: tuple[str, int],
+    related_instance_data: tuple[str, int] | None = None,
+    fields_map: dict | None = None,
+    percolate: bool = False,
+) -> str:
+    """Compose the key that identifies a pending update_es_document call in
+    the ES update buffer. Updates that share a key are merged into a single
+    request by combining their fields.
+
+    :param es_document_name: The Elasticsearch document type name.
+    :param main_instance_data: A two tuple, the main instance app label and the
+    main instance ID to update.
+    :param related_instance_data: A two-tuple: the related instance's app label
+    and the related instance ID or None.
+    :param fields_map: A dict containing fields that can be updated or None.
+    :param percolate: Whether the update should be followed by the percolator
+    tasks chain.
+    :return: A JSON string used as the buffer key.
+    """
+    return json.dumps(
+        [
+            ES_UPDATE_DOCUMENT,
+            es_document_name,
+            main_instance_data,
+            related_instance_data,
+            fields_map,
+            percolate,
+        ],
+        sort_keys=True,
+    )
+
+
+def make_es_children_update_key(
+    es_document_name: ESDocumentNameType,
+    parent_instance_id: int,
+    fields_map: dict | None = None,
+    event_table: EventTable | None = None,
+) -> str:
+    """Compose the key that identifies a pending update_children_docs_by_query
+    call in the ES update buffer.
+
+    :param es_document_name: The Elasticsearch Document type name to update.
+    :param parent_instance_id: The parent instance ID containing the fields to
+    update.
+    :param fields_map: A mapping from model fields to Elasticsearch document
+    fields or None.
+    :param event_table: Optional, the EventTable type that triggered the action
+    :return: A JSON string used as the buffer key.
+    """
+    return json.dumps(
+        [
+            ES_UPDATE_CHILDREN,
+            es_document_name,
+            parent_instance_id,
+            fields_map,
+            event_table,
+        ],
+        sort_keys=True,
+    )
+
+
+def is_percolated_es_update(update_key: str) -> bool:
+    """Check whether a buffered ES update must be followed by percolation.
+
+    :param update_key: The key that identifies the update in the buffer.
+    :return: True if the update is a document update that requires
+    percolation, otherwise False.
+    """
+    update_type, *args = json.loads(update_key)
+    return update_type == ES_UPDATE_DOCUMENT and bool(args[-1])
+
+
+def get_update_es_document_args(
+    update_key: str, fields_to_update: list[str]
+) -> tuple[
+    ESDocumentNameType,
+    list[str],
+    tuple[str, int],
+    tuple[str, int] | None,
+    dict | None,
+]:
+    """Rebuild the update_es_document arguments from a buffered update.
+
+    :param update_key: A key built by make_es_document_update_key.
+    :param fields_to_update: The merged fields to update.
+    :return: The update_es_document task arguments.
+    """
+    (
+        _,
+        es_document_name,
+        main_instance_data,
+        related_instance_data,
+        fields_map,
+        _,
+    ) = json.loads(update_key)
+    return (
+        es_document_name,
+        list(fields_to_update),
+        tuple(main_instance_data),
+        tuple(related_instance_data) if related_instance_data else None,
+        fields_map,
+    )
+
+
+def dispatch_es_updates(
+    updates: dict[str, list[str]], use_bulk: bool = False
+) -> None:
+    """Schedule the ES tasks for a set of merged updates that don't require
+    percolation.
+
+    :param updates: A dict mapping each update key to the list of fields that
+    need to be updated.
+    :param use_bulk: Whether document updates should be sent in batches
+    through bulk_update_es_documents instead of one update_es_document task
+    each.
+    :return: None
+    """
+    bulk_updates = []
+    for update_key, fields in updates.items():
+        update_type, es_document_name, *args = json.loads(update_key)
+        if update_type == ES_UPDATE_CHILDREN:
+            parent_instance_id, fields_map, event_table = args
+            update_children_docs_by_query.delay(
+                es_document_name,
+                parent_instance_id,
+                list(fields),
+                fields_map,
+                EventTable(event_table) if event_table else None,
+            )
+        elif use_bulk:
+            bulk_updates.append(
+                get_update_es_document_args(update_key, fields)
+            )
+        else:
+            update_es_document.delay(
+                *get_update_es_document_args(update_key, fields)
+            )
+
+    batch_size = int(settings.ELASTICSEARCH_BULK_BATCH_SIZE)
+    for i in range(0, len(bulk_updates), batch_size):
+        bulk_update_es_documents.delay(bulk_updates[i : i + batch_size])
+
+
+def make_es_update_buffer_fields_key(update_key: str) -> str:
+    return f"{ES_UPDATE_BUFFER_KEY}.fields:{update_key}"
+
+
+def add_es_updates_to_buffer(updates: dict[str, list[str]]) -> None:
+    """Append pending ES updates to the Redis buffer, merging their fields
+    with the ones already buffered for the same document.
+
+    If the buffer grows beyond ELASTICSEARCH_UPDATE_BUFFER_MAX_SIZE, a flush
+    is scheduled right away instead of waiting for the next window.
+
+    :param updates: A dict mapping each update key to the list of fields that
+    need to be updated.
+    :return: None
+    """
+    r = get_redis_interface("CACHE")
+    pipe = r.pipeline()
+    buffered_at = time.time()
+    for update_key, fields in updates.items():
+        if fields:
+            pipe.sadd(make_es_update_buffer_fields_key(update_key), *fields)
+        # Keep the time the document was first buffered so that frequently
+        # updated documents are not postponed forever.
+        pipe.zadd(ES_UPDATE_BUFFER_KEY, {update_key: buffered_at}, nx=True)
+    pipe.zcard(ES_UPDATE_BUFFER_KEY)
+    buffer_size = pipe.execute()[-1]
+
+    if buffer_size >= int(
+        settings.ELASTICSEARCH_UPDATE_BUFFER_MAX_SIZE
+    ) and create_redis_semaphore(
+        r,
+        ES_UPDATE_BUFFER_FLUSH_SEMAPHORE,
+        ttl=int(settings.ELASTICSEARCH_UPDATE_BUFFER_WINDOW),
+    ):
+        flush_es_update_buffer.delay(
+            ignore_window=True, release_semaphore=True
+        )
+
+
+@app.task(ignore_result=True)
+def flush_es_update_buffer(
+    ignore_window: bool = False, release_semaphore: bool = False
+) -> int:
+    """Pop the updates from the Redis ES update buffer that have been waiting
+    for longer than ELASTICSEARCH_UPDATE_BUFFER_WINDOW and schedule them.
+
+    At most ES_UPDATE_BUFFER_MAX_FLUSH_PASSES batches are popped per call;
+    the rest are left for the next flush.
+
+    :param ignore_window: If True, flush the buffered updates regardless of
+    how long they have been waiting. Used when the buffer is full.
+    :param release_semaphore: If True, release the semaphore taken by
+    add_es_updates_to_buffer when it scheduled this flush.
+    :return: The number of updates flushed.
+    """
+    r = get_redis_interface("CACHE")
+    max_score: float | str = "+inf"
+    if not ignore_window:
+        max_score = time.time() - int(
+            settings.ELASTICSEARCH_UPDATE_BUFFER_WINDOW
+        )
+
+    flushed = 0
+    batch_size = int(settings.ELASTICSEARCH_UPDATE_BUFFER_MAX_SIZE)
+    for _ in range(ES_UPDATE_BUFFER_MAX_FLUSH_PASSES):
+        update_keys = r.zrangebyscore(
+            ES_UPDATE_BUFFER_KEY, "-inf", max_score, start=0, num=batch_size
+        )
+        if not update_keys:
+            break
+
+        # Read and remove each update in a single transaction so that fields
+        # buffered concurrently are either flushed now or in the next run.
+        pipe = r.pipeline()
+        for update_key in update_keys:
+            fields_key = make_es_update_buffer_fields_key(update_key)
+            pipe.smembers(fields_key)
+            pipe.delete(fields_key)
+            pipe.zrem(ES_UPDATE_BUFFER_KEY, update_key)
+        results = pipe.execute()
+        updates = {
+            update_key: sorted(results[i * 3])
+            for i, update_key in enumerate(update_keys)
+        }
+        dispatch_es_updates(updates, use_bulk=True)
+        flushed += len(updates)
+
+    if release_semaphore:
+        delete_redis_semaphore(r, ES_UPDATE_BUFFER_FLUSH_SEMAPHORE)
+    return flushed
+
+
+@app.task(
+    bind=True,
+    autoretry_for=(ConnectionError, ConnectionTimeout),
+    max_retries=5,
+    retry_backoff=1 * 60,
+    retry_backoff_max=10 * 60,
+    retry_jitter=True,
+    queue=settings.CELERY_ETL_TASK_QUEUE,
+    ignore_result=True,
+)
+def bulk_update_es_documents(
+    self: Task,
+    updates: list[
+        tuple[
+            ESDocumentNameType,
+            list[str],
+            tuple[str, int],
+            tuple[str, int] | None,
+            dict | None,
+        ]
+    ],
+) -> None:
+    """Update many documents in Elasticsearch using a single bulk request.
+
+    This is the batched version of update_es_document. Documents that are
+    not indexed yet, or that fail to update, are handed off to
+    update_es_document, which takes care of indexing them.
+
+    :param self: The celery task
+    :param updates: A list of update_es_document arguments: the ES document
+    name, the fields to update, the main instance data, the related instance
+    data and the fields map.
+    :return: None
+    """
+
+    documents_to_update = []
+    updates_by_doc_id: defaultdict[str, list[tuple]] = defaultdict(list)
+    for update_args in updates:
+        (
+            es_document_name,
+            fields_to_update,
+            main_instance_data,
+            related_instance_data,
+            fields_map,
+        ) = update_args
+        es_document = getattr(es_document_module, es_document_name)
+        main_app_label, main_instance_id = main_instance_data
+        main_instance = get_instance_from_db(
+            main_instance_id, apps.get_model(main_app_label)
+        )
+        if not main_instance:
+            continue
+
+        related_instance = None
+        if related_instance_data:
+            related_app_label, related_instance_id = related_instance_data
+            related_instance = get_instance_from_db(
+                related_instance_id, apps.get_model(related_app_label)
+            )
+            if not related_instance:
+                continue
+
+        fields_values_to_update = document_fields_to_update(
+            es_document,
+            main_instance,
+            fields_to_update,
+            related_instance,
+            fields_map,
+        )
+        if not fields_values_to_update:
+            continue
+
+        doc_id, parent_id = get_es_doc_id_and_parent_id(
+            es_document, main_instance
+        )
+        doc_to_update = {
+            "_op_type": "update",
+            "_index": es_document._index._name,
+            "_id": doc_id,
+            "doc": fields_values_to_update,
+        }
+        if parent_id:
+            doc_to_update["_routing"] = parent_id
+        documents_to_update.append(doc_to_update)
+        updates_by_doc_id[str(doc_id)].append(update_args)
+
+    if not documents_to_update:
+        return
+
+    client = connections.get_connection(alias="no_retry_connection")
+    _, errors = bulk(
+        client,
+        documents_to_update,
+        raise_on_error=False,
+        refresh=settings.ELASTICSEARCH_DSL_AUTO_REFRESH,
+    )
+    for error in errors:
+        # Fall back to update_es_document for documents that couldn't be
+        # updated. It indexes documents that don't exist yet and retries on
+        # version conflicts.
+        doc_id = str(error.get("update", {}).get("_id"))
+        for update_args in updates_by_doc_id.pop(doc_id, []):
+            update_es_document.delay(*update_args)
+
+
 @app.task(
     bind=True,
     autoretry_for=(
@@ -922,6 +1284,30 @@ def index_docket_parties_in_es(
     ).apply_async()
 
 
+def prepare_documents_in_bulk(
+    docs_query_set: QuerySet, es_document: ESDocumentClassType
+) -> Generator[tuple[ESModelType, ESDictDocument], None, None]:
+    """Prepare the ES documents of a queryset in chunks.
+
+    Documents that have a prepare_in_bulk method fetch the related objects of
+    each chunk with a few queries, instead of several per instance.
+
+    :param docs_query_set: The queryset of model instances to be prepared.
+    :param es_document: The Elasticsearch document class corresponding to
+    the instance model.
+    :return: Yields two tuples, each instance and its prepared ES document.
+    """
+    chunk_size = int(settings.ELASTICSEARCH_BULK_BATCH_SIZE)
+    for chunk in batched(
+        docs_query_set.iterator(chunk_size=chunk_size), chunk_size
+    ):
+        if hasattr(es_document, "prepare_in_bulk"):
+            es_docs = es_document().prepare_in_bulk(list(chunk))
+        else:
+            es_docs = [es_document().prepare(doc) for doc in chunk]
+        yield from zip(chunk, es_docs)
+
+
 def bulk_indexing_generator(
     docs_query_set: QuerySet,
     es_document: ESDocumentClassType,
@@ -947,8 +1333,7 @@ def bulk_indexing_generator(
         "RECAP": lambda document: document.docket_entry.docket_id,
         "OPINION": lambda document: document.cluster_id,
     }
-    for doc in docs_query_set.iterator():
-        es_doc = es_document().prepare(doc)
+    for doc, es_doc in prepare_documents_in_bulk(docs_query_set, es_document):
         if child_id_property:
             if not parent_id:
                 routing_id_lambda = parent_id_mappings.get(child_id_property)
@@ -1354,6 +1739,56 @@ def index_dockets_in_bulk(
         DocketDocument._index.refresh()
 
 
+@app.task(
+    bind=True,
+    autoretry_for=(ConnectionError,),
+    max_retries=5,
+    interval_start=5,
+    ignore_result=True,
+)
+def index_parenthetical_groups_in_bulk(
+    self: Task, instance_ids: list[int]
+) -> None:
+    """Index parenthetical groups in bulk in Elasticsearch.
+
+    Groups created with bulk_create don't send post_save, so the signal
+    processor doesn't index them one at a time.
+
+    :param self: The Celery task instance
+    :param instance_ids: The ParentheticalGroup IDs to index.
+    :return: None
+    """
+
+    groups = ParentheticalGroup.objects.filter(pk__in=instance_ids)
+    client = connections.get_connection()
+    base_doc = {
+        "_op_type": "index",
+        "_index": ParentheticalGroupDocument._index._name,
+    }
+    failed_docs = []
+    # A cluster only has a handful of groups, so streaming_bulk is enough.
+    for success, info in streaming_bulk(
+        client,
+        bulk_indexing_generator(
+            groups,
+            ParentheticalGroupDocument,
+            base_doc,
+        ),
+        chunk_size=settings.ELASTICSEARCH_BULK_BATCH_SIZE,
+    ):
+        if not success:
+            failed_docs.append(info["index"]["_id"])
+
+    if failed_docs:
+        logger.error(
+            f"Error indexing ParentheticalGroups in bulk IDs are: {failed_docs}"
+        )
+
+    if settings.ELASTICSEARCH_DSL_AUTO_REFRESH:
+        # Set auto-refresh, used for testing.
+        ParentheticalGroupDocument._index.refresh()
+
+
 def build_bulk_cites_doc(
     es_child_doc_class: ESDocumentClassType,
     child_id: int,
@@ -6,6 +6,7 @@ from pathlib import Path
 from unittest import mock
 from urllib.parse import parse_qs
 
+import numpy as np
 import pytz
 import time_machine
 from asgiref.sync import async_to_sync
@@ -72,7 +73,12 @@ from cl.search.factories import (
     OpinionWithParentsFactory,
     RECAPDocumentFactory,
 )
-from cl.search.management.commands.cl_calculate_pagerank import Command
+from cl.search.management.commands.cl_calculate_pagerank import (
+    Command,
+    compute_pagerank,
+    fetch_citation_edges,
+    make_transition_matrix,
+)
 from cl.search.management.commands.cl_index_parent_and_child_docs import (
     get_unique_oldest_history_rows,
     log_last_document_indexed,
@@ -1122,6 +1128,19 @@ class PagerankTest(TestCase):
                 "%s" % (key, pr_results[key], answers[key]),
             )
 
+    def test_pagerank_warm_start(self) -> None:
+        """Does starting from the previous ranks converge faster to the same
+        result?
+        """
+        citing, cited = fetch_citation_edges(chunk_size=2)
+        matrix, dangling = make_transition_matrix(citing, cited, 4)
+        cold_ranks, cold_iterations = compute_pagerank(matrix, dangling)
+        warm_ranks, warm_iterations = compute_pagerank(
+            matrix, dangling, cold_ranks
+        )
+        self.assertLess(warm_iterations, cold_iterations)
+        self.assertTrue(np.allclose(cold_ranks, warm_ranks))
+
 
 class OpinionSearchFunctionalTest(AudioTestCase, BaseSeleniumTest):
     """
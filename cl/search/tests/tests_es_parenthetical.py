@@ -8,6 +8,7 @@ from django.urls import reverse
 from elasticsearch_dsl import Q
 from lxml import html
 
+from cl.citations.parenthetical_utils import create_parenthetical_groups
 from cl.lib.elasticsearch_utils import (
     build_daterange_query,
     build_es_main_query,
@@ -719,6 +720,23 @@ class ParentheticalESSignalProcessorTest(
         self.pg_test.delete()
         self.assertEqual(False, ParentheticalGroupDocument.exists(id=pg_id))
 
+    def test_index_parenthetical_groups_on_regroup(self) -> None:
+        """Confirm regrouping a cluster replaces its groups in ES, even though
+        the new groups are created in bulk.
+        """
+        old_group = ParentheticalGroupFactory(
+            opinion=self.o_2, representative=self.p5, score=0.3236, size=1
+        )
+        self.assertTrue(ParentheticalGroupDocument.exists(id=old_group.pk))
+
+        create_parenthetical_groups(self.cluster_2)
+
+        self.assertFalse(ParentheticalGroupDocument.exists(id=old_group.pk))
+        new_group = self.cluster_2.parenthetical_groups.get()
+        doc = ParentheticalGroupDocument.get(id=new_group.pk)
+        self.assertEqual(self.p5.text, doc.representative_text)
+        self.assertEqual(self.cluster_2.pk, doc.cluster_id)
+
     def test_parenthetical_indexing_and_tasks_count(self) -> None:
         """Confirm a ParentheticalGroup is properly indexed in ES with the
         right number of indexing tasks.
@@ -11,7 +11,9 @@ from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.management import call_command
+from django.db import connection
 from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.timezone import now
 from elasticsearch_dsl import Q
@@ -6996,6 +6998,80 @@ class RECAPIndexingTest(
             {firm.name, firm_2.name, firm_2_1.name, firm_1_2.name},
         )
 
+    def test_prepare_in_bulk(self) -> None:
+        """Confirm prepare_in_bulk returns the same documents as prepare and
+        doesn't run more queries for more instances.
+        """
+
+        d = DocketFactory(court=self.court, source=Docket.RECAP)
+        BankruptcyInformationFactory(docket=d, chapter="7")
+        firm = AttorneyOrganizationFactory(
+            lookup_key="00kingofprussiaroadradnorkesslertopazmeltzercheck1908",
+            name="Law Firm LLP",
+        )
+        attorney = AttorneyFactory(
+            name="Emily Green", organizations=[firm], docket=d
+        )
+        PartyTypeFactory.create(
+            party=PartyFactory(
+                name="Mary Williams Corp.", docket=d, attorneys=[attorney]
+            ),
+            docket=d,
+        )
+        d_2 = DocketFactory(
+            court=self.court, source=Docket.RECAP, case_name="Lorem v. Ipsum"
+        )
+        rd = RECAPDocumentFactory(
+            docket_entry=DocketEntryWithParentsFactory(docket=d),
+            document_number="1",
+        )
+        OpinionsCitedByRECAPDocument.objects.bulk_create(
+            [
+                OpinionsCitedByRECAPDocument(
+                    citing_document=rd,
+                    cited_opinion=OpinionWithParentsFactory(),
+                    depth=1,
+                )
+                for _ in range(2)
+            ]
+        )
+        rd_2 = RECAPDocumentFactory(
+            docket_entry=DocketEntryWithParentsFactory(docket=d_2),
+            document_number="1",
+        )
+
+        for es_document, instances in [
+            (DocketDocument, [d, d_2]),
+            (ESRECAPDocument, [rd, rd_2]),
+        ]:
+            model = es_document.Django.model
+            with self.subTest(es_document=es_document.__name__):
+                expected_docs = [
+                    es_document().prepare(model.objects.get(pk=i.pk))
+                    for i in instances
+                ]
+                with CaptureQueriesContext(connection) as one_instance:
+                    es_document().prepare_in_bulk(
+                        list(model.objects.filter(pk=instances[0].pk))
+                    )
+                with CaptureQueriesContext(connection) as all_instances:
+                    es_docs = es_document().prepare_in_bulk(
+                        list(
+                            model.objects.filter(
+                                pk__in=[i.pk for i in instances]
+                            ).order_by("pk")
+                        )
+                    )
+
+                for es_doc, expected_doc in zip(es_docs, expected_docs):
+                    es_doc.pop("timestamp")
+                    expected_doc.pop("timestamp")
+                    self.assertEqual(es_doc, expected_doc)
+                self.assertEqual(
+                    len(all_instances.captured_queries),
+                    len(one_instance.captured_queries),
+                )
+
     def test_index_party_from_case_name_when_parties_are_not_available(
         self,
     ) -> None:
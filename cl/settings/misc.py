@@ -57,6 +57,16 @@ FTM_LAST_UPDATED = env("FTM_LAST_UPDATED", default=date.today())
 # Pay and Pray quota
 ALLOWED_PRAYER_COUNT = env.int("ALLOWED_PRAYER_COUNT", default=5)
 
+# Buffer page view counts in Redis and write them to the DB in bulk with the
+# cl_flush_view_counts command, instead of updating the row on every view.
+VIEW_COUNT_BUFFER_ENABLED = env.bool(
+    "VIEW_COUNT_BUFFER_ENABLED", default=False
+)
+VIEW_COUNT_FLUSH_INTERVAL = env.int("VIEW_COUNT_FLUSH_INTERVAL", default=60)
+VIEW_COUNT_FLUSH_BATCH_SIZE = env.int(
+    "VIEW_COUNT_FLUSH_BATCH_SIZE", default=1000
+)
+
 
 # CAP
 CAP_R2_ENDPOINT_URL = env("CAP_R2_ENDPOINT_URL", default="")
@@ -1,4 +1,100 @@
 import environ
 
+from .testing import TESTING
+
 env = environ.FileAwareEnv()
 MAX_CITATIONS_PER_REQUEST = env.int("MAX_CITATIONS_PER_REQUEST", default=250)
+
+# How long, in seconds, to keep the resolutions of full case citations in the
+# cache. Setting it to 0 disables the cache. It's disabled in tests, since
+# cached resolutions would leak between test cases.
+CITATION_RESOLUTION_CACHE_TIMEOUT = (
+    0
+    if TESTING
+    else env.int("CITATION_RESOLUTION_CACHE_TIMEOUT", default=60 * 60 * 24 * 7)
+)
+# How long, in seconds, to keep citations that don't match any opinion in the
+# cache. It's short because the search indexes are updated asynchronously, so
+# a citation added right before a lookup can be missing from them.
+CITATION_RESOLUTION_NO_MATCH_CACHE_TIMEOUT = env.int(
+    "CITATION_RESOLUTION_NO_MATCH_CACHE_TIMEOUT", default=60 * 10
+)
+
+# How long, in seconds, to keep the MinHash signatures of the parentheticals
+# of a cluster, so regrouping them only hashes the new ones. Setting it to 0
+# disables the cache.
+PARENTHETICAL_SIGNATURES_CACHE_TIMEOUT = (
+    0
+    if TESTING
+    else env.int(
+        "PARENTHETICAL_SIGNATURES_CACHE_TIMEOUT", default=60 * 60 * 24 * 30
+    )
+)
+
+# When enabled, clusters that get new parentheticals while finding citations
+# are marked as dirty and regrouped once per window by the
+# cl_recompute_parenthetical_groups daemon, instead of right away.
+PARENTHETICAL_GROUPS_DEBOUNCE_ENABLED = env.bool(
+    "PARENTHETICAL_GROUPS_DEBOUNCE_ENABLED", default=False
+)
+# The number of seconds a dirty cluster waits before being regrouped.
+PARENTHETICAL_GROUPS_DEBOUNCE_WINDOW = env.int(
+    "PARENTHETICAL_GROUPS_DEBOUNCE_WINDOW", default=300
+)
+# The number of dirty clusters to take from the queue at a time.
+PARENTHETICAL_GROUPS_BATCH_SIZE = env.int(
+    "PARENTHETICAL_GROUPS_BATCH_SIZE", default=100
+)
+
+# Whether to load an in-memory table of every (volume, reporter, page) once
+# per worker process when citations are resolved using the DB. Citations
+# missing from the table are still looked up in the DB.
+CITATION_LOOKUP_TABLE_ENABLED = env.bool(
+    "CITATION_LOOKUP_TABLE_ENABLED", default=False
+)
+# The number of rows fetched per query when loading the lookup table, and the
+# number of citations looked up per query when it's not used.
+CITATION_LOOKUP_TABLE_CHUNK_SIZE = env.int(
+    "CITATION_LOOKUP_TABLE_CHUNK_SIZE", default=2000
+)
+# How long, in seconds, a worker keeps its lookup table before reloading it,
+# to pick up changes the Citation signals don't invalidate, like clusters
+# that become precedential. It's reloaded every time in tests, since the data
+# changes between test cases.
+CITATION_LOOKUP_TABLE_TTL = (
+    0 if TESTING else env.int("CITATION_LOOKUP_TABLE_TTL", default=60 * 60)
+)
+
+# How long, in seconds, SCOTUSMap keeps its in-memory index of the citations
+# between Supreme Court cases before reloading it. It's reloaded every time
+# in tests, since the data changes between test cases.
+SCOTUS_CITATION_INDEX_TTL = (
+    0 if TESTING else env.int("SCOTUS_CITATION_INDEX_TTL", default=60 * 60)
+)
+
+# Whether to serve the citation graph API from an index of every citation
+# between opinions, memory-mapped by every worker process.
+CITATION_GRAPH_ENABLED = env.bool("CITATION_GRAPH_ENABLED", default=False)
+# Where cl_update_citation_graph saves the graph and the workers load it from.
+# It has to be shared by them.
+CITATION_GRAPH_DIR = env("CITATION_GRAPH_DIR", default="/tmp/citation_graph/")
+# The number of rows fetched from the DB at a time when building the graph.
+CITATION_GRAPH_CHUNK_SIZE = env.int("CITATION_GRAPH_CHUNK_SIZE", default=10000)
+# How long, in seconds, workers keep using the graph they loaded before
+# checking for a newer saved version. It's checked every time in tests.
+CITATION_GRAPH_REFRESH_INTERVAL = (
+    0 if TESTING else env.int("CITATION_GRAPH_REFRESH_INTERVAL", default=60)
+)
+# How long, in seconds, cl_update_citation_graph merges the new citations
+# into the saved graph before rebuilding it from scratch to pick up edits and
+# deletions.
+CITATION_GRAPH_REBUILD_INTERVAL = env.int(
+    "CITATION_GRAPH_REBUILD_INTERVAL", default=60 * 60 * 24
+)
+# The maximum number of hops a traversal can take.
+CITATION_GRAPH_MAX_HOPS = env.int("CITATION_GRAPH_MAX_HOPS", default=6)
+
+# Whether Celery workers load the Hyperscan database used to find citations
+# before forking their pool processes, so the processes share it instead of
+# each loading a copy.
+HYPERSCAN_PRELOAD = env.bool("HYPERSCAN_PRELOAD", default=True)
@@ -5,6 +5,33 @@ env = environ.FileAwareEnv()
 DISCLOSURE_HOST = env("DISCLOSURE_HOST", default="http://cl-disclosures:5050")
 DOCTOR_HOST = env("DOCTOR_HOST", default="http://cl-doctor:5050")
 
+# Connection pool of each microservice host, shared by every call in a
+# process.
+MICROSERVICE_MAX_CONNECTIONS = env.int(
+    "MICROSERVICE_MAX_CONNECTIONS", default=20
+)
+MICROSERVICE_MAX_KEEPALIVE_CONNECTIONS = env.int(
+    "MICROSERVICE_MAX_KEEPALIVE_CONNECTIONS", default=10
+)
+# Seconds an idle connection is kept open.
+MICROSERVICE_KEEPALIVE_EXPIRY = env.int(
+    "MICROSERVICE_KEEPALIVE_EXPIRY", default=60
+)
+# The maximum number of concurrent requests to each service in a process. 0
+# means unbounded.
+MICROSERVICE_MAX_CONCURRENCY = env.int(
+    "MICROSERVICE_MAX_CONCURRENCY", default=0
+)
+# Services that download the files of items in S3 by themselves from a
+# presigned URL sent in the file_url field, instead of getting them uploaded.
+MICROSERVICE_PRESIGNED_URL_SERVICES = env.list(
+    "MICROSERVICE_PRESIGNED_URL_SERVICES", default=[]
+)
+# Seconds a presigned URL is valid for.
+MICROSERVICE_PRESIGNED_URL_EXPIRY = env.int(
+    "MICROSERVICE_PRESIGNED_URL_EXPIRY", default=60 * 60
+)
+
 MICROSERVICE_URLS = {
     # DOCTOR Endpoints
     "doctor-heartbeat": {
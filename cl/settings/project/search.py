@@ -2,11 +2,19 @@ import os
 
 import environ
 
+from .testing import TESTING
+
 env = environ.FileAwareEnv()
 
 SOLR_HOST = env("SOLR_HOST", default="http://cl-solr:8983")
 SOLR_RECAP_HOST = env("SOLR_RECAP_HOST", default="http://cl-solr:8983")
 SOLR_PAGERANK_DEST_DIR = env("SOLR_PAGERANK_DEST_DIR", default="/tmp/")
+# Where the ranks of the last pagerank run are kept, so the next run can
+# start from them and converge in fewer iterations.
+PAGERANK_PREVIOUS_RANKS_PATH = env(
+    "PAGERANK_PREVIOUS_RANKS_PATH", default="/tmp/pagerank_ranks.npy"
+)
+PAGERANK_CHUNK_SIZE = env.int("PAGERANK_CHUNK_SIZE", default=100_000)
 
 ########
 # Solr #
@@ -74,6 +82,18 @@ OPINION_HITS_PER_RESULT = 20
 PEOPLE_HITS_PER_RESULT = 999
 VIEW_MORE_CHILD_HITS = 99
 SEARCH_API_PAGE_SIZE = 20
+
+##########################
+# Docket entries display #
+##########################
+DOCKET_ENTRIES_PAGE_SIZE = 200
+# How long the number of entries of a docket is cached. It's only used to
+# estimate the number of pages, so it can be a bit stale.
+DOCKET_ENTRIES_COUNT_CACHE_TIMEOUT = (
+    0
+    if TESTING
+    else env.int("DOCKET_ENTRIES_COUNT_CACHE_TIMEOUT", default=60 * 60)
+)
 # The amount of text to return from the beginning of the field if there are no
 # matching fragments to highlight.
 NO_MATCH_HL_SIZE = 500
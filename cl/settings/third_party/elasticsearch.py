@@ -230,10 +230,29 @@ ELASTICSEARCH_PAGINATION_BATCH_SIZE = 100
 # The maximum number of scheduled hits per alert.
 SCHEDULED_ALERT_HITS_LIMIT = 20
 
+# The number of RECAP alerts whose searches are sent together in a single
+# multi search request by the RECAP sweep alerts command, and the number of
+# those requests sent in parallel.
+RECAP_SWEEP_ALERTS_BATCH_SIZE = env.int(
+    "RECAP_SWEEP_ALERTS_BATCH_SIZE", default=50
+)
+RECAP_SWEEP_ALERTS_WORKERS = env.int("RECAP_SWEEP_ALERTS_WORKERS", default=4)
+
 PERCOLATOR_RECAP_SEARCH_ALERTS_ENABLED = env(
     "PERCOLATOR_RECAP_SEARCH_ALERTS_ENABLED", default=False
 )
 
+# When enabled, documents saved by signals are gathered in Redis and
+# percolated together in a single multi-document percolator query by the
+# cl_flush_percolator_batch daemon, instead of one query per document.
+PERCOLATOR_BATCH_ENABLED = env.bool("PERCOLATOR_BATCH_ENABLED", default=False)
+# The number of seconds a document can wait in the batch before being
+# percolated.
+PERCOLATOR_BATCH_WINDOW = env.int("PERCOLATOR_BATCH_WINDOW", default=5)
+# The maximum number of documents percolated in a single query. A batch this
+# size is percolated right away.
+PERCOLATOR_BATCH_MAX_SIZE = env.int("PERCOLATOR_BATCH_MAX_SIZE", default=100)
+
 ################################
 # ES bulk indexing batch size #
 ################################
@@ -249,6 +268,24 @@ ELASTICSEARCH_PARALLEL_BULK_THREADS = env(
 )
 
 
+####################
+# ES update buffer #
+####################
+# When enabled, non-percolated updates triggered by signals are buffered in
+# Redis, merged by document and sent to ES in bulk requests.
+ELASTICSEARCH_UPDATE_BUFFER_ENABLED = env.bool(
+    "ELASTICSEARCH_UPDATE_BUFFER_ENABLED", default=False
+)
+# The number of seconds an update can wait in the buffer before being flushed.
+ELASTICSEARCH_UPDATE_BUFFER_WINDOW = env.int(
+    "ELASTICSEARCH_UPDATE_BUFFER_WINDOW", default=30
+)
+# The number of buffered documents that triggers an immediate flush.
+ELASTICSEARCH_UPDATE_BUFFER_MAX_SIZE = env.int(
+    "ELASTICSEARCH_UPDATE_BUFFER_MAX_SIZE", default=1000
+)
+
+
 ##########################
 # Sweep indexer settings #
 ##########################
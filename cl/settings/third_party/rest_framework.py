@@ -120,3 +120,15 @@ if DEVELOPMENT:
     REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]["anon"] = "10000/day"  # type: ignore
 
 BLOCK_NEW_V3_USERS = env.bool("BLOCK_NEW_V3_USERS", default=False)
+
+# When enabled, API usage stats are tallied in memory by each process and
+# written to Redis in a single pipeline by a background thread, every
+# API_USAGE_BUFFER_FLUSH_INTERVAL milliseconds or once
+# API_USAGE_BUFFER_MAX_REQUESTS requests have been tallied.
+API_USAGE_BUFFER_ENABLED = env.bool("API_USAGE_BUFFER_ENABLED", default=False)
+API_USAGE_BUFFER_FLUSH_INTERVAL = env.int(
+    "API_USAGE_BUFFER_FLUSH_INTERVAL", default=1000
+)
+API_USAGE_BUFFER_MAX_REQUESTS = env.int(
+    "API_USAGE_BUFFER_MAX_REQUESTS", default=500
+)
@@ -1,3 +1,28 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+@dataclass
+class SCOTUSCitationIndex:
+    """The citations between Supreme Court clusters, as adjacency lists."""
+
+    # The date filed of every cluster.
+    dates: dict[int, date] = field(default_factory=dict)
+    # The clusters cited by each cluster, sorted by date filed.
+    authorities: dict[int, list[int]] = field(default_factory=dict)
+    # The clusters citing each cluster.
+    citing: dict[int, list[int]] = field(default_factory=dict)
+    loaded_at: float = 0.0
+
+
+_scotus_citation_index: SCOTUSCitationIndex | None = None
+
+
 def new_title_for_viz(referer):
     """Check if a visualization already has a referer with a given title."""
     from cl.visualizations.models import Referer
@@ -21,42 +46,107 @@ def reverse_endpoints_if_needed(start, end):
         return end, start
 
 
-def within_max_hops(good_nodes, child_authority_id, hops_taken, max_hops):
-    """Determine if a new route to a node that's already in the network is
-    within the max_hops of the start_point.
+def load_scotus_citation_index() -> SCOTUSCitationIndex:
+    """Load the citations between Supreme Court clusters from the DB.
+
+    :return: The index of the citations.
     """
-    shortest_path = good_nodes[child_authority_id]["shortest_path"]
-    if (shortest_path + hops_taken) > max_hops:
-        return False
-    return True
+    from cl.search.models import OpinionCluster, OpinionsCited
 
+    index = SCOTUSCitationIndex(loaded_at=time.monotonic())
+    index.dates = dict(
+        OpinionCluster.objects.filter(docket__court_id="scotus")
+        .values_list("pk", "date_filed")
+        .iterator()
+    )
+    edges = (
+        OpinionsCited.objects.filter(
+            citing_opinion__cluster__docket__court_id="scotus",
+            cited_opinion__cluster__docket__court_id="scotus",
+        )
+        .values_list("citing_opinion__cluster_id", "cited_opinion__cluster_id")
+        .distinct()
+        .iterator()
+    )
+    for citing_id, cited_id in edges:
+        index.authorities.setdefault(citing_id, []).append(cited_id)
+        index.citing.setdefault(cited_id, []).append(citing_id)
+    for authorities in index.authorities.values():
+        authorities.sort(key=lambda pk: index.dates[pk])
+    return index
 
-def graphs_intersect(good_nodes, main_graph, sub_graph):
-    """Test if two graphs have common nodes.
 
-    First check if it's in the main graph, then check if it's in good_nodes,
-    indicating a second path to the start node.
+async def aget_scotus_citation_index() -> SCOTUSCitationIndex:
+    """Get the index of the citations between Supreme Court clusters,
+    reloading it once it's older than SCOTUS_CITATION_INDEX_TTL.
     """
-    return any((node in main_graph) for node in sub_graph.nodes()) or any(
-        (node in good_nodes) for node in sub_graph.nodes()
-    )
+    global _scotus_citation_index
+    index = _scotus_citation_index
+    if (
+        index is None
+        or time.monotonic() - index.loaded_at
+        >= settings.SCOTUS_CITATION_INDEX_TTL
+    ):
+        index = await sync_to_async(load_scotus_citation_index)()
+        _scotus_citation_index = index
+    return index
+
+
+def find_network_edges(
+    index: SCOTUSCitationIndex,
+    start_id: int,
+    end_id: int,
+    max_hops: int,
+) -> list[tuple[int, int]]:
+    """Find the citations on the paths from the end cluster back to the start
+    cluster that take at most max_hops citations.
 
+    Only clusters filed on or after the start cluster are followed. A first
+    breadth-first search goes backwards from the start cluster to get how
+    many hops each cluster is from it. A second one goes forward from the end
+    cluster and only follows citations to clusters that can still reach the
+    start within the remaining hops, so it never explores dead ends.
 
-def set_shortest_path_to_end(good_nodes, node_id, target_id) -> bool:
-    """Determine if a path is to the end is shorter, and if so, update the
-    current value.
+    :param index: The index of the citations between Supreme Court clusters.
+    :param start_id: The ID of the starting cluster, the oldest one.
+    :param end_id: The ID of the ending cluster, the most recent one.
+    :param max_hops: The maximum degree of separation for the network.
+    :return: The (citing, cited) cluster ID pairs in the network, in the order
+    they're found.
     """
-    is_shorter = False
-    if node_id in good_nodes:
-        current_length = good_nodes[node_id]["shortest_path"]
-        previous_length = good_nodes[target_id]["shortest_path"] + 1
-        if current_length < previous_length:
-            is_shorter = True
-        good_nodes[node_id]["shortest_path"] = min(
-            current_length, previous_length
-        )
-    else:
-        good_nodes[node_id] = {
-            "shortest_path": good_nodes[target_id]["shortest_path"] + 1
-        }
-    return is_shorter
+    if start_id not in index.dates:
+        return []
+    start_date = index.dates[start_id]
+
+    hops_to_start = {start_id: 0}
+    queue = deque([start_id])
+    while queue:
+        node = queue.popleft()
+        hops = hops_to_start[node]
+        if hops == max_hops:
+            continue
+        for citing_id in index.citing.get(node, []):
+            if citing_id in hops_to_start:
+                continue
+            if citing_id != end_id and index.dates[citing_id] < start_date:
+                continue
+            hops_to_start[citing_id] = hops + 1
+            queue.append(citing_id)
+
+    edges = []
+    hops_from_end = {end_id: 0}
+    queue = deque([end_id])
+    while queue:
+        node = queue.popleft()
+        hops = hops_from_end[node] + 1
+        for cited_id in index.authorities.get(node, []):
+            if index.dates[cited_id] < start_date:
+                continue
+            remaining = hops_to_start.get(cited_id)
+            if remaining is None or hops + remaining > max_hops:
+                continue
+            edges.append((node, cited_id))
+            if cited_id not in hops_from_end:
+                hops_from_end[cited_id] = hops
+                queue.append(cited_id)
+    return edges
@@ -21,6 +21,7 @@ from cl.users.factories import (
     UserWithChildProfileFactory,
 )
 from cl.visualizations import views
+from cl.visualizations.exceptions import TooManyNodes
 from cl.visualizations.factories import VisualizationFactory
 from cl.visualizations.forms import VizForm
 from cl.visualizations.models import JSONVersion, SCOTUSMap
@@ -89,14 +90,43 @@ class TestVizModels(TestCase):
 
         build_kwargs = {
             "parent_authority": end,
-            "visited_nodes": {},
-            "good_nodes": {},
             "max_hops": 3,
         }
 
         g = await viz.build_nx_digraph(**build_kwargs)
         self.assertTrue(len(g.edges()) > 0)
 
+    async def test_SCOTUSMap_nx_digraph_max_hops_and_nodes(self) -> None:
+        """Does the network only include citations on paths within max_hops,
+        and abort when it's too big?
+        """
+        start = await OpinionCluster.objects.aget(
+            case_name="Marsh v. Chambers"
+        )
+        end = await OpinionCluster.objects.aget(
+            case_name="Town of Greece v. Galloway"
+        )
+        viz = await sync_to_async(VisualizationFactory.create)(
+            cluster_start=start,
+            cluster_end=end,
+            title="Test SCOTUSMap",
+            notes="Test Notes",
+        )
+
+        g = await viz.build_nx_digraph(parent_authority=end, max_hops=1)
+        self.assertEqual(list(g.edges()), [(end.pk, start.pk)])
+
+        g = await viz.build_nx_digraph(parent_authority=end, max_hops=2)
+        self.assertGreater(len(g.edges()), 1)
+        for citing_id, cited_id in g.edges():
+            # Every citation is on a path of at most two hops.
+            self.assertTrue(citing_id == end.pk or cited_id == start.pk)
+
+        with self.assertRaises(TooManyNodes):
+            await viz.build_nx_digraph(
+                parent_authority=end, max_hops=3, max_nodes=2
+            )
+
     def test_SCOTUSMap_deletes_cascade(self) -> None:
         """
         Make sure we delete JSONVersion instances when deleted SCOTUSMaps
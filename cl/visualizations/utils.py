@@ -18,8 +18,6 @@ async def build_visualization(viz):
     """
     build_kwargs = {
         "parent_authority": viz.cluster_end,
-        "visited_nodes": {},
-        "good_nodes": {},
         "max_hops": 3,
     }
     t1 = time.time()